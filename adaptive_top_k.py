@@ -0,0 +1,116 @@
+"""
+File name: adaptive_top_k.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide the adaptive selection of the number of tables
+    retrieved for a request (instead of a fixed TOP_K)
+
+    The similarity search over-fetches max_k candidates, then the list is cut:
+        - at the knee of the score curve: the position where the scores
+          before it are separated the most from the ones after it
+          (if the separation is at least min_gap)
+        - when the estimated tokens of the table chunks exceed token_budget
+    and at least min_k tables are always kept.
+    A simple request keeps only the few tables with high score, a complex
+    one (ex: star schema joins) can keep more than TOP_K.
+
+Inspired by:
+    Satopaa et al., Finding a "Kneedle" in a Haystack
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        docs_and_scores = select_adaptive_top_k(docs_and_scores)
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+"""
+
+from config import (
+    ADAPTIVE_TOP_K_MIN,
+    ADAPTIVE_TOP_K_MAX,
+    ADAPTIVE_TOP_K_MIN_GAP,
+    ADAPTIVE_TOP_K_TOKEN_BUDGET,
+)
+
+# rough estimate, used only for the budget (no tokenizer for the models)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """
+    estimated number of tokens of the text
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def find_knee(scores, min_k=ADAPTIVE_TOP_K_MIN, min_gap=ADAPTIVE_TOP_K_MIN_GAP):
+    """
+    scores: in the order of retrieval (for hybrid retrieval they can be
+    not sorted, and None for tables found only by BM25: these are never
+    cut, the knee can only be after them)
+
+    return the number of results before the knee, None if there is no knee
+    (no separation >= min_gap after the first min_k results)
+    """
+    best_n = None
+    best_gap = min_gap
+
+    # the first position after the last result without score
+    first_cut = max(
+        (i + 1 for i, score in enumerate(scores) if score is None), default=0
+    )
+
+    for n in range(max(min_k, first_cut, 1), len(scores)):
+        head_scores = [score for score in scores[:n] if score is not None]
+        head_min = min(head_scores) if head_scores else float("inf")
+        gap = head_min - max(scores[n:])
+
+        if gap >= best_gap:
+            best_n, best_gap = n, gap
+
+    return best_n
+
+
+def select_adaptive_top_k(
+    docs_and_scores,
+    min_k=ADAPTIVE_TOP_K_MIN,
+    max_k=ADAPTIVE_TOP_K_MAX,
+    min_gap=ADAPTIVE_TOP_K_MIN_GAP,
+    token_budget=ADAPTIVE_TOP_K_TOKEN_BUDGET,
+):
+    """
+    docs_and_scores: list of (Document, similarity) from the similarity
+    search (at least max_k if available)
+
+    return the first part of the list, cut at the knee of the scores
+    or at the token budget of the table chunks
+    """
+    docs_and_scores = docs_and_scores[:max_k]
+
+    n_selected = find_knee(
+        [score for _, score in docs_and_scores], min_k=min_k, min_gap=min_gap
+    )
+    if n_selected is None:
+        n_selected = len(docs_and_scores)
+
+    # the chunks go in the prompts (rerank and SQL generation)
+    total_tokens = 0
+    for i, (doc, _) in enumerate(docs_and_scores[:n_selected]):
+        total_tokens += estimate_tokens(doc.metadata.get("table_chunk") or "")
+
+        if total_tokens > token_budget and i >= min_k:
+            n_selected = i
+            break
+
+    return docs_and_scores[:n_selected]
@@ -27,7 +27,6 @@ Warnings:
     This module is in development, may change in future versions.
 """
 
-import oracledb
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import (
     ChatPromptTemplate,
@@ -35,17 +34,23 @@ from langchain_core.prompts import (
 )
 from langchain_community.vectorstores.oraclevs import OracleVS
 
-# now it supports batching, OK
-from langchain_community.embeddings.oci_generative_ai import OCIGenAIEmbeddings
+from embedding_service import get_embedding_service
 from llm_manager import LLMManager
 from ai_reranker import Reranker
+from db_pools import get_connection, VECTOR_POOL
+from vector_index_manager import (
+    create_vector_index,
+    rebuild_vector_index,
+    approx_similarity_search,
+)
 
 from config import (
-    AUTH_TYPE,
-    CONNECT_ARGS_VECTOR,
     DISTANCE_STRATEGY,
     TOP_K,
     INDEX_MODEL_FOR_EXPLANATION,
+    VECTOR_INDEX_TYPE,
+    ENABLE_APPROX_SEARCH,
+    APPROX_SEARCH_TARGET_ACCURACY,
 )
 
 
@@ -113,23 +118,74 @@ class AIRAGAgent:
         return Reranker(self.llm_manager, self.logger)
 
     def _get_embed_model(self):
-        """get the embedding model"""
-        return OCIGenAIEmbeddings(
-            auth_type=AUTH_TYPE,
-            model_id=self.embed_model_name,
-            service_endpoint=self.embed_endpoint,
-            compartment_id=self.compartment_ocid,
+        """
+        get the embedding model (shared with the SQL Agent: the request
+        is embedded only once, see embedding_service.py)
+        """
+        return get_embedding_service(
+            self.embed_model_name, self.embed_endpoint, self.compartment_ocid
         )
 
-    def get_relevant_docs(self, user_request):
+    def ensure_vector_index(self):
+        """
+        create the vector index (VECTOR_INDEX_TYPE) on the collection,
+        if it doesn't exist
+
+        DDL: not called at start, to be used after loading the collection
+        (or see sql_scripts/create_vector_indexes.sql)
+        """
+        try:
+            with self._get_vector_db_connection() as conn:
+                if create_vector_index(conn, RAG_COLLECTION_NAME):
+                    self.logger.info(
+                        "Created %s vector index on %s...",
+                        VECTOR_INDEX_TYPE,
+                        RAG_COLLECTION_NAME,
+                    )
+
+        except Exception as e:
+            self.logger.error("Error in AIRAGAgent:ensure_vector_index: %s", e)
+
+    def rebuild_vector_index(self):
+        """
+        drop and create the vector index on the collection
+        (ex: after loading new documents)
+        """
+        try:
+            with self._get_vector_db_connection() as conn:
+                rebuild_vector_index(conn, RAG_COLLECTION_NAME)
+
+            self.logger.info("Rebuilt vector index on %s...", RAG_COLLECTION_NAME)
+
+        except Exception as e:
+            self.logger.error("Error in AIRAGAgent:rebuild_vector_index: %s", e)
+
+    def get_relevant_docs(self, user_request, target_accuracy=None):
         """ "
         given a user request, get from the collection relevant chunks of doc
+
+        with ENABLE_APPROX_SEARCH the search uses the vector index, with
+        target_accuracy (default: APPROX_SEARCH_TARGET_ACCURACY)
         """
         # TODO: improve, user request should be rephrased with the msg history
 
         embed_model = self._get_embed_model()
 
         with self._get_vector_db_connection() as conn:
+            if ENABLE_APPROX_SEARCH:
+                if target_accuracy is None:
+                    target_accuracy = APPROX_SEARCH_TARGET_ACCURACY
+
+                return approx_similarity_search(
+                    conn,
+                    embed_model,
+                    RAG_COLLECTION_NAME,
+                    user_request,
+                    TOP_K,
+                    target_accuracy=target_accuracy,
+                    distance_strategy=DISTANCE_STRATEGY,
+                )
+
             v_store = OracleVS(
                 conn,
                 embed_model,
@@ -174,5 +230,5 @@ class AIRAGAgent:
         return answer_chain.invoke({"msgs": msgs})
 
     def _get_vector_db_connection(self):
-        """Return a database connection to the vector store."""
-        return oracledb.connect(**CONNECT_ARGS_VECTOR)
+        """Return a database connection (from the pool) to the vector store."""
+        return get_connection(VECTOR_POOL)
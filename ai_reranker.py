@@ -9,6 +9,7 @@ Description:
 
     in this way all the code needed for reranking is in a single class
     - I have added reranking to RAG, after vector search
+    - (18/10/2026) results are cached (see rerank_cache.py)
 
 Inspired by:
    
@@ -34,8 +35,9 @@ import re
 from langchain_core.prompts import PromptTemplate
 
 from prompt_template import PROMPT_RERANK_TABLES
+from rerank_cache import get_rerank_cache
 
-from config import TOP_N, INDEX_MODEL_FOR_RERANKING
+from config import TOP_N, INDEX_MODEL_FOR_RERANKING, ENABLE_RERANK_CACHE
 
 RERANK_DOCS_PROMPT = """
 Rank the following documents by their relevance to the question:
@@ -73,11 +75,32 @@ class Reranker:
         self.llm_manager = llm_manager
         self.logger = logger
 
-    def rerank_table_list(self, query, top_k_schemas):
+        # shared by all the Reranker in the process
+        self.tables_cache = get_rerank_cache("tables") if ENABLE_RERANK_CACHE else None
+        self.docs_cache = get_rerank_cache("docs") if ENABLE_RERANK_CACHE else None
+
+    def rerank_table_list(self, query, top_k_schemas, top_n=TOP_N, schema_version=None):
         """
         query: the user query in NL
         top_k_schemas: schemas returned from similarity search
+        top_n: max number of tables returned
+        schema_version: version of the vector table, if it changes
+            the cached results are discarded
         """
+        if self.tables_cache is not None:
+            key = self.tables_cache.make_key(
+                query,
+                [top_k_schemas],
+                self._get_model_id(),
+                PROMPT_RERANK_TABLES,
+                top_n,
+            )
+            result = self.tables_cache.get(key, schema_version)
+
+            if result is not None:
+                self.logger.info("Rerank result found in cache...")
+                return result
+
         table_select_prompt = PromptTemplate.from_template(PROMPT_RERANK_TABLES)
 
         llm_r = self.llm_manager.llm_models[INDEX_MODEL_FOR_RERANKING]
@@ -85,18 +108,34 @@ class Reranker:
 
         result = rerank_chain.invoke(
             {
-                "top_n": TOP_N,
+                "top_n": top_n,
                 "table_schemas": top_k_schemas,
                 "question": query,
             }
         )
 
+        if self.tables_cache is not None:
+            self.tables_cache.put(key, result, schema_version)
+
         return result
 
     def rerank_docs_for_rag(self, query, docs):
         """
         This is the function used by the RAG Agent
         """
+        if self.docs_cache is not None:
+            key = self.docs_cache.make_key(
+                query,
+                [doc.page_content for doc in docs],
+                self._get_model_id(),
+                RERANK_DOCS_PROMPT,
+            )
+            indexes = self.docs_cache.get(key)
+
+            if indexes is not None:
+                self.logger.info("Rerank result found in cache...")
+                return [docs[i - 1] for i in indexes]
+
         rerank_docs_prompt = PromptTemplate.from_template(RERANK_DOCS_PROMPT)
 
         llm_r = self.llm_manager.llm_models[INDEX_MODEL_FOR_RERANKING]
@@ -116,6 +155,18 @@ class Reranker:
 
         self.logger.info(indexes)
 
+        # the LLM can return indexes not in the list: they are never cached
+        valid_indexes = [i for i in indexes if 1 <= i <= len(docs)]
+        if len(valid_indexes) != len(indexes):
+            self.logger.warning(
+                "Rerank: invalid document indexes removed: %s",
+                [i for i in indexes if i not in valid_indexes],
+            )
+        indexes = valid_indexes
+
+        if self.docs_cache is not None:
+            self.docs_cache.put(key, indexes)
+
         # be careful, in the list index start by 0 not i
         # in indexes they start from 1
         extracted_docs = [docs[i - 1] for i in indexes]
@@ -124,6 +175,12 @@ class Reranker:
         return extracted_docs
 
     # helper functions
+    def _get_model_id(self):
+        """
+        the model used for reranking (part of the cache key)
+        """
+        return self.llm_manager.model_list[INDEX_MODEL_FOR_RERANKING]
+
     def _extract_docs_indexes(self, content):
         """
         thel list is enclosed in triple backticks
@@ -28,15 +28,24 @@ Warnings:
 """
 
 import time
-from langchain_community.embeddings import OCIGenAIEmbeddings
 from core_functions import clean_sql_query
 from database_manager import DatabaseManager
 from llm_manager import LLMManager
 from schema_manager_23ai import SchemaManager23AI
-from request_cache import RequestCache
+from request_cache import create_request_cache
+from semantic_cache import SemanticCache
+from embedding_service import get_embedding_service
+from sql_template_cache import SQLTemplateCache, extract_literals
+from single_flight import SingleFlight
+from negative_cache import NegativeCache
+from rerank_cache import get_rerank_caches_info
 
 from utils import get_console_logger
-from config import AUTH_TYPE
+from config import (
+    ENABLE_SEMANTIC_CACHE,
+    ENABLE_TEMPLATE_CACHE,
+    ENABLE_NEGATIVE_CACHE,
+)
 
 
 class AISQLAgent:
@@ -88,8 +97,22 @@ class AISQLAgent:
         self.embed_model = self._initialize_embed_model()
         self.schema_manager = self._initialize_schema_manager()
 
-        # added for an exact cache
-        self.request_cache = RequestCache()
+        # added for an exact cache (in memory or persistent, see config)
+        self.request_cache = create_request_cache()
+        # second tier: search for similar requests (near-duplicates)
+        self.semantic_cache = (
+            SemanticCache(self.embed_model, self.logger)
+            if ENABLE_SEMANTIC_CACHE
+            else None
+        )
+        # requests differing only in literals: reuse the SQL template
+        self.template_cache = (
+            SQLTemplateCache(self.logger) if ENABLE_TEMPLATE_CACHE else None
+        )
+        # concurrent identical requests share a single generation
+        self.single_flight = SingleFlight()
+        # requests for which all the models failed recently
+        self.negative_cache = NegativeCache() if ENABLE_NEGATIVE_CACHE else None
 
         self.logger.info("AI SQL Agent initialized successfully.")
 
@@ -108,12 +131,12 @@ class AISQLAgent:
         )
 
     def _initialize_embed_model(self):
-        """Initialize the embedding model for schema manager."""
-        return OCIGenAIEmbeddings(
-            auth_type=AUTH_TYPE,
-            model_id=self.embed_model_name,
-            service_endpoint=self.embed_endpoint,
-            compartment_id=self.compartment_ocid,
+        """
+        Initialize the embedding model for schema manager
+        (shared, with a cache of the embeddings, see embedding_service.py)
+        """
+        return get_embedding_service(
+            self.embed_model_name, self.embed_endpoint, self.compartment_ocid
         )
 
     def _initialize_schema_manager(self):
@@ -142,19 +165,56 @@ class AISQLAgent:
 
         return restricted_schema
 
-    def get_sql_from_cache(self, user_request):
+    def get_sql_from_cache(self, user_request, user_group_id=None):
         """
-        try to find the request (NL) in the SQL cache
+        try to find the request (NL) in the SQL cache, for the user group
+
+        first look for the exact request, then (if enabled)
+        for a similar request already translated with success
         """
-        cached_result = self.request_cache.get_request_with_stats(user_request)
+        cached_result = self.request_cache.get_request_with_stats(
+            user_request, user_group_id
+        )
         if cached_result:
             if len(cached_result["sql"]) > 0:
                 self.logger.info("")
                 self.logger.info("Found request in cache...")
                 return cached_result["sql"]
+
+        if self.semantic_cache is not None:
+            return self._get_sql_from_semantic_cache(user_request, user_group_id)
+
         # if not found return None
         return None
 
+    def get_cache_info(self):
+        """
+        return info on the caches used by the agent (size, evictions...)
+        """
+        cache_info = {"request_cache": self.request_cache.get_cache_info()}
+
+        if self.semantic_cache is not None:
+            cache_info["semantic_cache"] = self.semantic_cache.get_cache_info()
+        if self.template_cache is not None:
+            cache_info["template_cache"] = self.template_cache.get_cache_info()
+        if self.negative_cache is not None:
+            cache_info["negative_cache"] = self.negative_cache.get_cache_info()
+        cache_info["single_flight"] = self.single_flight.get_stats()
+        cache_info["embedding_cache"] = self.embed_model.get_cache_info()
+
+        vector_index = getattr(self.schema_manager, "vector_index", None)
+        if vector_index is not None:
+            cache_info["schema_vector_index"] = vector_index.get_index_info()
+        hybrid_retriever = getattr(self.schema_manager, "hybrid_retriever", None)
+        if hybrid_retriever is not None:
+            cache_info["lexical_index"] = hybrid_retriever.get_index_info()
+        cache_info["rerank_cache"] = get_rerank_caches_info()
+        rerank_gate = getattr(self.schema_manager, "rerank_gate", None)
+        if rerank_gate is not None:
+            cache_info["rerank_gate"] = rerank_gate.get_gate_info()
+
+        return cache_info
+
     def generate_sql_query(self, user_request, user_group_id=None):
         """
         Generate the SQL query based on the user request and restricted schema.
@@ -166,14 +226,59 @@ class AISQLAgent:
             str: The generated SQL query.
         """
         # if the request is found in cache return it
-        sql_in_cache = self.get_sql_from_cache(user_request)
+        sql_in_cache = self.get_sql_from_cache(user_request, user_group_id)
 
         if sql_in_cache is not None:
             # return immediately
             return sql_in_cache
 
+        # if the same request is already in progress, wait and share its result
+        return self.single_flight.do(
+            (user_request, user_group_id),
+            self._generate_and_cache_sql,
+            user_request,
+            user_group_id,
+        )
+
+    #
+    # Helper
+    #
+    def _generate_and_cache_sql(self, user_request, user_group_id=None):
+        """
+        generate the SQL (from template or with LLM) and add to cache
+        """
+        # the request could have been added just before we started
+        cached_result = self.request_cache.get_request_with_stats(
+            user_request, user_group_id
+        )
+        if cached_result is not None and len(cached_result["sql"]) > 0:
+            return cached_result["sql"]
+
+        # all the models failed recently for this request: don't retry
+        if self.negative_cache is not None and self.negative_cache.contains(
+            (user_request, user_group_id), self.schema_manager.get_schema_version()
+        ):
+            self.logger.info("")
+            self.logger.info("Request found in negative cache, SQL not generated.")
+            return ""
+
         # generate
         time_start = time.time()
+
+        # same request with different literals: bind them in the SQL template
+        sql_from_template = self._get_sql_from_template_cache(
+            user_request, user_group_id
+        )
+        if sql_from_template is not None:
+            self.request_cache.add_to_cache(
+                user_request,
+                sql_from_template,
+                success=True,
+                generation_time=round(time.time() - time_start, 1),
+                user_group_id=user_group_id,
+            )
+            return sql_from_template
+
         restricted_schema = self.generate_restricted_schema(user_request)
 
         self.logger.info("Generating SQL query...")
@@ -197,13 +302,71 @@ class AISQLAgent:
             success = False
 
         self.request_cache.add_to_cache(
-            user_request, sql_query, success=success, generation_time=time_elapsed
+            user_request,
+            sql_query,
+            success=success,
+            generation_time=time_elapsed,
+            user_group_id=user_group_id,
         )
+        if self.negative_cache is not None:
+            if success:
+                self.negative_cache.remove((user_request, user_group_id))
+            else:
+                self.negative_cache.add(
+                    (user_request, user_group_id),
+                    self.schema_manager.get_schema_version(),
+                )
+        if success and self.semantic_cache is not None:
+            self.semantic_cache.add(user_request, user_group_id)
+        if success and self.template_cache is not None:
+            self.template_cache.add(user_request, sql_query, user_group_id)
+
         return sql_query
 
-    #
-    # Helper
-    #
+    def _get_sql_from_semantic_cache(self, user_request, user_group_id=None):
+        """
+        search for a similar request in the cache, return the SQL or None
+        """
+        result = self.semantic_cache.search(user_request, user_group_id)
+
+        if result is None:
+            return None
+
+        similar_request, similarity = result
+
+        # similar but with different literals (ex: top 5 vs top 10): not the same
+        if extract_literals(similar_request)[1] != extract_literals(user_request)[1]:
+            return None
+
+        cached_result = self.request_cache.get_request_with_stats(
+            similar_request, user_group_id
+        )
+
+        if cached_result is None or len(cached_result["sql"]) == 0:
+            # evicted from the request cache in the meantime
+            self.semantic_cache.remove(similar_request, user_group_id)
+            return None
+
+        self.logger.info("")
+        self.logger.info(
+            "Found similar request in cache (similarity: %4.3f): %s",
+            similarity,
+            similar_request,
+        )
+        return cached_result["sql"]
+
+    def _get_sql_from_template_cache(self, user_request, user_group_id=None):
+        """
+        bind the literals of the request in a cached SQL template
+        the SQL is validated against the DB, return None if not found or not valid
+        """
+        if self.template_cache is None:
+            return None
+
+        return self.template_cache.get_sql(
+            user_request, self.db_manager.test_query_syntax, user_group_id
+        )
+
     def _generate_sql_with_models(
         self,
         user_query,
@@ -50,6 +50,8 @@ from ai_sql_agent import AISQLAgent
 from ai_rag_agent import AIRAGAgent
 from ai_reranker import Reranker
 from ai_data_analyzer import AIDataAnalyzer
+from cache_prewarmer import CachePrewarmer, log_request
+from db_pools import get_pool_stats, close_pools
 
 from prompt_template import PROMPT_TEMPLATE
 from utils import get_console_logger, to_dict
@@ -66,6 +68,7 @@ from config import (
     API_PORT,
     VERBOSE,
     RETURN_DATA_AS_MARKDOWN,
+    ENABLE_CACHE_PREWARM,
 )
 from config_private import COMPARTMENT_OCID
 
@@ -136,6 +139,27 @@ rag_agent = AIRAGAgent(
 )
 
 
+# to fill the SQL cache in background at startup
+prewarmer = CachePrewarmer(ai_sql_agent, logger)
+
+
+@app.on_event("startup")
+def start_prewarm():
+    """
+    start the prewarm of the SQL cache, without delaying readiness
+    """
+    if ENABLE_CACHE_PREWARM:
+        prewarmer.start()
+
+
+@app.on_event("shutdown")
+def shutdown_pools():
+    """
+    close the connection pools
+    """
+    close_pools()
+
+
 class UserInput(BaseModel):
     """
     class for the body of the request
@@ -250,7 +274,7 @@ def generate_and_exec_sql(request: UserInput):
         sql_query = ai_sql_agent.generate_sql_query(user_query, user_group_id=None)
 
         if len(sql_query) > 0:
-            rows = db_manager.execute_sql(sql_query)
+            rows = db_manager.execute_sql(sql_query, user_group_id=None)
 
     # serialize each row in a dict
     rows_ser = [to_dict(row) for row in rows]
@@ -376,7 +400,7 @@ def generate_and_exec_sql_v2(request):
         sql_query = ai_sql_agent.generate_sql_query(user_query, user_group_id=None)
 
         if len(sql_query) > 0:
-            rows = db_manager.execute_sql(sql_query)
+            rows = db_manager.execute_sql(sql_query, user_group_id=None)
 
             # serialize each row in a dict
             if rows is not None:
@@ -414,7 +438,10 @@ def handle_generic_request_v2(request):
     logger.info("Request received: %s", user_query)
 
     # try to see if the request is in cache, to avoid a call to the router
-    if ai_sql_agent.get_sql_from_cache(user_query) is not None:
+    # (exact match or, if enabled, a near-duplicate of a cached request)
+    in_cache = ai_sql_agent.get_sql_from_cache(user_query) is not None
+
+    if in_cache:
         # cache contains ONLY Text2SQL request
         # already in cache: the request is to generate_sql!
         classification = "generate_sql"
@@ -431,6 +458,10 @@ def handle_generic_request_v2(request):
 
     # add output to history
     if classification == "generate_sql":
+        if result["status"] == "OK" and not in_cache:
+            # used to prewarm the cache at next startup
+            log_request(user_query)
+
         data_msg = HumanMessage(
             content="These are the data for your analysis.\nData:\n"
             + str(result["content"])
@@ -503,6 +534,64 @@ def get_cache_stats():
 
     # uniform output
     obj_output = {"status": "OK", "type": "data", "content": all_stats, "msg": ""}
+    # size, limits and evictions counters of the caches
+    cache_info = ai_sql_agent.get_cache_info()
+    if db_manager.result_cache is not None:
+        cache_info["result_cache"] = db_manager.result_cache.get_cache_info()
+    cache_info["router_single_flight"] = router.single_flight.get_stats()
+    cache_info["prewarm"] = prewarmer.get_status()
+    obj_output["cache_info"] = cache_info
+
+    return JSONResponse(content=obj_output, status_code=200)
+
+
+# readiness and progress of the cache prewarm
+@app.get("/v2/get_prewarm_status", tags=["V2"])
+def get_prewarm_status():
+    """
+    return the status of the prewarm: warm is True when completed
+    """
+    obj_output = {
+        "status": "OK",
+        "type": "data",
+        "content": prewarmer.get_status(),
+        "msg": "",
+    }
+
+    return JSONResponse(content=obj_output, status_code=200)
+
+
+# sessions opened and busy in the connection pools
+@app.get("/v2/get_pool_stats", tags=["V2"])
+def pool_stats():
+    """
+    return the stats of the connection pools (data and vector schema)
+    """
+    obj_output = {
+        "status": "OK",
+        "type": "data",
+        "content": get_pool_stats(),
+        "msg": "",
+    }
+
+    return JSONResponse(content=obj_output, status_code=200)
+
+
+# to invalidate cached results after the refresh of a table
+@app.delete("/v2/invalidate_results", tags=["V2"])
+def invalidate_results(table_name: str):
+    """
+    remove from the result cache all the queries using the table
+
+    only in the worker (process) serving this call: with many workers
+    the others keep their entries until RESULT_CACHE_TTL
+    """
+    if VERBOSE:
+        logger.info("Called invalidate_results, table: %s...", table_name)
+
+    n_removed = db_manager.invalidate_results_for_table(table_name)
+
+    obj_output = {"status": "OK", "type": "data", "content": n_removed, "msg": ""}
 
     return JSONResponse(content=obj_output, status_code=200)
 
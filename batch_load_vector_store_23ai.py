@@ -11,6 +11,10 @@ Description:
 
     This is the script to be used to do the first/complete load of the SCHEMA_VECTORS.
     It will drop and reload the collection.
+    With SCHEMA_LOAD_BLUE_GREEN the collection is loaded in a new generation,
+    used by the API only when the load is completed and verified
+    (rollback: batch_rollback_vector_store_23ai.py, one-time migration of
+    an existing table: batch_migrate_vector_store_23ai.py).
 
 Inspired by:
    
@@ -75,6 +79,7 @@ logger.info("Loading Schema Manager...")
 schema_manager = SchemaManager23AI(db_manager, llm_manager, embed_model, logger)
 
 # read the data from the data DB (using db_manager)
+# (for big schemas see SCHEMA_EXTRACTION_MODE and SCHEMA_EXTRACTION_PARALLELISM)
 # generate for each table a summary using LLM
 # embeds summary and store summary + embeddings + metadata
 # in 23AI Vector Store
@@ -0,0 +1,74 @@
+"""
+File name: batch_migrate_vector_store_23ai.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    One-time migration of SCHEMA_VECTORS to generations, to be run
+    before the first blue/green load (see SCHEMA_LOAD_BLUE_GREEN in config)
+
+    The table is renamed as SCHEMA_VECTORS_G0 and SCHEMA_VECTORS becomes
+    a synonym for it.
+
+Inspired by:
+
+Usage:
+    python batch_migrate_vector_store_23ai.py
+
+Dependencies:
+    LangChain
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+    Stop the API before: between the rename and the creation of the
+    synonym SCHEMA_VECTORS doesn't exist.
+"""
+
+from langchain_community.embeddings import OCIGenAIEmbeddings
+from database_manager import DatabaseManager
+from llm_manager import LLMManager
+from schema_manager_23ai import SchemaManager23AI
+from utils import get_console_logger
+from config import (
+    AUTH_TYPE,
+    CONNECT_ARGS,
+    MODEL_LIST,
+    MODEL_ENDPOINTS,
+    TEMPERATURE,
+    EMBED_MODEL_NAME,
+    EMBED_ENDPOINT,
+)
+from config_private import COMPARTMENT_OCID
+
+#
+# Main
+#
+logger = get_console_logger()
+
+logger.info("")
+logger.info("Migration of the Vector Store to generations...")
+logger.info("")
+
+db_manager = DatabaseManager(CONNECT_ARGS, logger)
+llm_manager = LLMManager(
+    MODEL_LIST, MODEL_ENDPOINTS, COMPARTMENT_OCID, TEMPERATURE, logger
+)
+
+embed_model = OCIGenAIEmbeddings(
+    auth_type=AUTH_TYPE,
+    model_id=EMBED_MODEL_NAME,
+    service_endpoint=EMBED_ENDPOINT,
+    compartment_id=COMPARTMENT_OCID,
+)
+
+schema_manager = SchemaManager23AI(db_manager, llm_manager, embed_model, logger)
+
+schema_manager.migrate_to_generations()
@@ -0,0 +1,72 @@
+"""
+File name: batch_rollback_vector_store_23ai.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    Switch the SCHEMA_VECTORS back to the previous generation
+    (blue/green load, see SCHEMA_LOAD_BLUE_GREEN in config)
+
+    The API picks up the previous generation at the next version check,
+    without a restart.
+
+Inspired by:
+
+Usage:
+    python batch_rollback_vector_store_23ai.py
+
+Dependencies:
+    LangChain
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+"""
+
+from langchain_community.embeddings import OCIGenAIEmbeddings
+from database_manager import DatabaseManager
+from llm_manager import LLMManager
+from schema_manager_23ai import SchemaManager23AI
+from utils import get_console_logger
+from config import (
+    AUTH_TYPE,
+    CONNECT_ARGS,
+    MODEL_LIST,
+    MODEL_ENDPOINTS,
+    TEMPERATURE,
+    EMBED_MODEL_NAME,
+    EMBED_ENDPOINT,
+)
+from config_private import COMPARTMENT_OCID
+
+#
+# Main
+#
+logger = get_console_logger()
+
+logger.info("")
+logger.info("Rollback of the Vector Store to the previous generation...")
+logger.info("")
+
+db_manager = DatabaseManager(CONNECT_ARGS, logger)
+llm_manager = LLMManager(
+    MODEL_LIST, MODEL_ENDPOINTS, COMPARTMENT_OCID, TEMPERATURE, logger
+)
+
+embed_model = OCIGenAIEmbeddings(
+    auth_type=AUTH_TYPE,
+    model_id=EMBED_MODEL_NAME,
+    service_endpoint=EMBED_ENDPOINT,
+    compartment_id=COMPARTMENT_OCID,
+)
+
+schema_manager = SchemaManager23AI(db_manager, llm_manager, embed_model, logger)
+
+schema_manager.rollback_schema_generation()
@@ -48,7 +48,12 @@ from config import (
 )
 from config_private import COMPARTMENT_OCID
 
+# if the list is empty, the update is incremental: only the tables
+# changed since the last load/update (LAST_DDL_TIME, see sync_schema_manager)
 tables_list = ["D_LOCATION"]
+# rebuild the vector index after the update (accuracy of HNSW can
+# degrade after many updates)
+REBUILD_VECTOR_INDEX = False
 
 #
 # Main
@@ -82,5 +87,11 @@ logger.info("")
 # schema manager encapsulate the connection to vector store db
 schema_manager = SchemaManager23AI(db_manager, llm_manager, embed_model, logger)
 
-# update the record in the VECTOR schema only for tables in the list
-schema_manager.update_schema_manager(tables_list)
+if tables_list:
+    # update the record in the VECTOR schema only for tables in the list
+    schema_manager.update_schema_manager(tables_list)
+else:
+    schema_manager.sync_schema_manager()
+
+if REBUILD_VECTOR_INDEX:
+    schema_manager.rebuild_vector_index()
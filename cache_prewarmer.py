@@ -0,0 +1,274 @@
+"""
+File name: cache_prewarmer.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide a class to prewarm the SQL cache at API startup
+
+    The requests most frequently made are taken from:
+        - sample_queries.json
+        - the SAMPLE_QUERIES table (Vector DB)
+        - the log of requests captured by the API (REQUEST_LOG_FILE)
+    For each one we generate and validate the SQL in background, with
+    bounded concurrency, so that the API is ready immediately.
+
+    Only the requests not found in cache are logged, and the log is rotated
+    at REQUEST_LOG_MAX_BYTES. With many API workers (processes) the prewarm
+    is done by the one that gets the lock on PREWARM_LOCK_FILE.
+
+Inspired by:
+
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        prewarmer = CachePrewarmer(ai_sql_agent, logger)
+        prewarmer.start()
+        prewarmer.get_status()
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+"""
+
+import os
+import json
+import fcntl
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    PREWARM_CONCURRENCY,
+    PREWARM_MAX_REQUESTS,
+    PREWARM_LOCK_FILE,
+    REQUEST_LOG_FILE,
+    REQUEST_LOG_MAX_BYTES,
+)
+
+SAMPLES_FILE = "sample_queries.json"
+
+
+def log_request(user_query, log_file=REQUEST_LOG_FILE):
+    """
+    append a request (translated in SQL with success, not in cache) to
+    the log, used for prewarm at the next startup
+    """
+    if log_file is None:
+        return
+
+    _rotate_log(log_file)
+
+    with open(log_file, "a", encoding="UTF-8") as file:
+        file.write(json.dumps({"user_query": user_query}) + "\n")
+
+
+def _rotate_log(log_file, max_bytes=REQUEST_LOG_MAX_BYTES):
+    """
+    if the log is too big, it becomes the old log (the previous one is lost)
+    """
+    try:
+        if os.path.getsize(log_file) > max_bytes:
+            os.replace(log_file, log_file + ".1")
+    except FileNotFoundError:
+        pass
+
+
+class CachePrewarmer:
+    """
+    Generate in background the SQL for the most frequent requests
+    """
+
+    def __init__(
+        self,
+        ai_sql_agent,
+        logger,
+        concurrency=PREWARM_CONCURRENCY,
+        max_requests=PREWARM_MAX_REQUESTS,
+        log_file=REQUEST_LOG_FILE,
+        lock_file=PREWARM_LOCK_FILE,
+    ):
+        self.ai_sql_agent = ai_sql_agent
+        self.logger = logger
+        self.concurrency = concurrency
+        self.max_requests = max_requests
+        self.log_file = log_file
+        self.lock_file = lock_file
+
+        self.lock = threading.Lock()
+        self.thread = None
+        # set when the prewarm is completed
+        self.warm = threading.Event()
+
+        self.status = {
+            "state": "not_started",
+            "total": 0,
+            "done": 0,
+            "generated": 0,
+            "already_cached": 0,
+            "failed": 0,
+        }
+
+    def start(self):
+        """
+        start the prewarm in a background thread (returns immediately)
+        """
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.status["state"] = "running"
+
+        self.thread = threading.Thread(target=self._run, name="prewarm", daemon=True)
+        self.thread.start()
+
+    def is_warm(self):
+        """
+        True if the prewarm is completed
+        """
+        return self.warm.is_set()
+
+    def get_status(self):
+        """
+        return the state and the progress counters of the prewarm
+        """
+        with self.lock:
+            return dict(self.status, warm=self.is_warm())
+
+    #
+    # Helper
+    #
+    def _run(self):
+        lock_fd = None
+
+        try:
+            if self.lock_file is not None:
+                lock_fd = self._acquire_lock()
+
+                if lock_fd is None:
+                    self.logger.info("Prewarm: done by another worker.")
+                    with self.lock:
+                        self.status["state"] = "skipped"
+                    return
+
+            requests = self._collect_requests()
+
+            with self.lock:
+                self.status["total"] = len(requests)
+
+            self.logger.info(
+                "Prewarm: generating SQL for %s requests...", len(requests)
+            )
+
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                # consume the results to propagate exceptions
+                list(executor.map(self._prewarm_request, requests))
+
+            with self.lock:
+                self.status["state"] = "completed"
+
+            self.logger.info("Prewarm completed: %s", self.status)
+
+        except Exception as e:
+            self.logger.error("Error in CachePrewarmer:_run: %s", e)
+            with self.lock:
+                self.status["state"] = "failed"
+        finally:
+            if lock_fd is not None:
+                # closing the file releases the lock
+                os.close(lock_fd)
+            self.warm.set()
+
+    def _acquire_lock(self):
+        """
+        return the fd of the lock file (locked), None if another worker
+        holds the lock (released by the OS if the process dies)
+        """
+        lock_fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(lock_fd)
+            return None
+
+        return lock_fd
+
+    def _prewarm_request(self, user_request):
+        if self.ai_sql_agent.get_sql_from_cache(user_request) is not None:
+            outcome = "already_cached"
+        else:
+            try:
+                sql_query = self.ai_sql_agent.generate_sql_query(user_request)
+                outcome = "generated" if len(sql_query) > 0 else "failed"
+            except Exception as e:
+                self.logger.error("Error in CachePrewarmer: %s", e)
+                outcome = "failed"
+
+        with self.lock:
+            self.status[outcome] += 1
+            self.status["done"] += 1
+
+    def _collect_requests(self):
+        """
+        return the list of requests to prewarm, without duplicates:
+        first the ones from the log (most frequent first), then samples
+        """
+        requests = [request for request, _ in self._read_request_log().most_common()]
+        requests += self._read_samples_file()
+        requests += self._read_samples_table()
+
+        # remove duplicates, keep order
+        requests = list(dict.fromkeys(r.strip() for r in requests if r and r.strip()))
+
+        return requests[: self.max_requests]
+
+    def _read_request_log(self):
+        """
+        return a Counter with the requests in the log (and in the old log)
+        """
+        counter = Counter()
+
+        if self.log_file is None:
+            return counter
+
+        for log_file in (self.log_file + ".1", self.log_file):
+            try:
+                with open(log_file, "r", encoding="UTF-8") as file:
+                    for line in file:
+                        if line.strip():
+                            counter[json.loads(line)["user_query"]] += 1
+            except FileNotFoundError:
+                self.logger.info("Prewarm: request log %s not found.", log_file)
+            except Exception as e:
+                self.logger.error("Error reading request log %s: %s", log_file, e)
+
+        return counter
+
+    def _read_samples_file(self):
+        try:
+            with open(SAMPLES_FILE, "r", encoding="UTF-8") as file:
+                data = json.load(file)
+
+            return [query for element in data for query in element["sample_queries"]]
+        except Exception as e:
+            self.logger.error(
+                "Error reading sample queries from %s: %s", SAMPLES_FILE, e
+            )
+            return []
+
+    def _read_samples_table(self):
+        # returns a dict: {table_name: {"sample_queries": [...]}}
+        tables_dict = self.ai_sql_agent.schema_manager.read_samples_query()
+
+        return [
+            query
+            for element in tables_dict.values()
+            for query in element["sample_queries"]
+        ]
@@ -42,6 +42,24 @@ SCENARIO = "general"
 
 # enable use of reranker (LLM) to select table for SQL generation
 ENABLE_RERANKING = True
+# skip the rerank when the similarity scores separate clearly the relevant
+# tables (see rerank_gate.py), thresholds are on cosine similarity
+# Off until the thresholds are tuned on your schema: enable it with
+# RERANK_GATE_AUDIT_RATE = 1.0 (audit only: the rerank is always done and
+# compared with the gate, see the stats) before lowering the audit rate
+ENABLE_RERANK_GATE = False
+RERANK_GATE_MIN_SCORE = 0.5
+RERANK_GATE_MIN_GAP = 0.15
+# max number of tables selected without rerank
+RERANK_GATE_MAX_SELECTED = 3
+# fraction of the skips checked with the rerank anyway (to tune thresholds)
+RERANK_GATE_AUDIT_RATE = 0.1
+# cache of the results of the rerank (tables and RAG docs), key:
+# question, candidates, model and prompt (see rerank_cache.py)
+ENABLE_RERANK_CACHE = True
+RERANK_CACHE_MAX_ENTRIES = 1000
+# sec., None means no expiration
+RERANK_CACHE_TTL = 3600
 # if True add the AI explanation
 ENABLE_AI_EXPLANATION = True
 
@@ -84,6 +102,8 @@ AUTH_TYPE = "API_KEY"
 # for embeddings
 EMBED_MODEL_NAME = "cohere.embed-english-v3.0"
 EMBED_ENDPOINT = "https://inference.generativeai.eu-frankfurt-1.oci.oraclecloud.com"
+# max number of embeddings kept in cache (see embedding_service.py)
+EMBED_CACHE_MAX_ENTRIES = 2048
 
 #
 # DB connectivity settings
@@ -110,6 +130,14 @@ CONNECT_ARGS_VECTOR = {
     "wallet_location": VECTOR_WALLET_DIR,
     "wallet_password": VECTOR_WALLET_PWD,
 }
+# connection pools, shared by all the components (see db_pools.py)
+ENABLE_DB_POOLS = True
+DB_POOL_MIN = 1
+DB_POOL_MAX = 8
+DB_POOL_INCREMENT = 1
+# sec. of idle after which a session is checked before use
+DB_POOL_PING_INTERVAL = 60
+
 # the name of the table where we store tables summary and embeddings
 
 # this one is dedicated to Ebiz tests
@@ -117,9 +145,43 @@ CONNECT_ARGS_VECTOR = {
 # this one is dedicated to our internal tests
 VECTOR_TABLE_NAME = "SCHEMA_VECTORS_SH"
 
+# here we keep a version of VECTOR_TABLE_NAME, incremented at every load
+# (see sql_scripts/create_schema_version.sql)
+SCHEMA_VERSION_TABLE_NAME = "SCHEMA_VECTORS_VERSION"
+# how often (sec.) the API checks if the version has changed
+SCHEMA_VERSION_CHECK_INTERVAL = 30
+# similarity search on an in-process copy of the vector table (refreshed
+# when the version changes) instead of a query to 23AI for every request
+ENABLE_SCHEMA_VECTOR_INDEX = True
+# hybrid retrieval: BM25 on names, comments and summaries fused with
+# the vector search (Reciprocal Rank Fusion), needs the in-process index
+ENABLE_HYBRID_RETRIEVAL = True
+HYBRID_VECTOR_WEIGHT = 1.0
+HYBRID_LEXICAL_WEIGHT = 1.0
+HYBRID_RRF_K = 60
+# length of each ranking before fusion
+HYBRID_N_CANDIDATES = 50
+
 # the strategy for similarity search Don't change
 DISTANCE_STRATEGY = DistanceStrategy.COSINE
 
+# 23AI vector index on the vector tables (SCHEMA_VECTORS, POLICIES_COLLECTION)
+# "HNSW" (in-memory neighbor graph, needs VECTOR_MEMORY_SIZE), "IVF" or None
+# (None: no index, exact search)
+VECTOR_INDEX_TYPE = None
+# accuracy (1..100) used to build the index, and the default for searches
+VECTOR_INDEX_TARGET_ACCURACY = 95
+VECTOR_INDEX_HNSW_NEIGHBORS = 32
+VECTOR_INDEX_HNSW_EFCONSTRUCTION = 300
+# None: the number of partitions is chosen by the DB
+VECTOR_INDEX_IVF_PARTITIONS = None
+# similarity search in 23AI with FETCH APPROX (uses the vector index)
+# enable only after the indexes are created (see VECTOR_INDEX_TYPE and
+# sql_scripts/create_vector_indexes.sql): without an index the search is exact
+ENABLE_APPROX_SEARCH = False
+# target accuracy for the approximate search (None: the one of the index)
+APPROX_SEARCH_TARGET_ACCURACY = None
+
 # the table where we store a list of user_queries for each table in the data schema
 TABLE_NAME_SQ = "sample_queries"
 
@@ -132,6 +194,43 @@ INCLUDE_TABLES_PREFIX = "ALL"
 # number of samples read from each table
 N_SAMPLES = 3
 
+# how to read the schema: "per_table" (queries for each table),
+# "bulk" (set-based queries, better for big schemas)
+# or "parallel" (per_table queries for many tables concurrently)
+SCHEMA_EXTRACTION_MODE = "bulk"
+# number of DB sessions (and workers) used in "parallel" mode
+SCHEMA_EXTRACTION_PARALLELISM = 8
+# arraysize and prefetch for the queries reading the schema
+SCHEMA_FETCH_ARRAYSIZE = 1000
+
+# number of table summaries generated concurrently (LLM calls)
+SUMMARY_CONCURRENCY = 8
+# attempts for each summary, with exponential backoff (sec.) between them
+SUMMARY_MAX_ATTEMPTS = 3
+SUMMARY_RETRY_BACKOFF = 2
+# summaries saved on disk, keyed by hash of (table, sample queries, prompt, model)
+ENABLE_SUMMARY_CACHE = True
+SUMMARY_CACHE_DIR = "summary_cache"
+
+# full load of the Vector Store as a pipeline (extract, summarize, embed, insert)
+# working in batches of tables, with a commit and a checkpoint for every batch:
+# an interrupted load resumes from the last committed batch.
+# Without SCHEMA_LOAD_BLUE_GREEN the load drops and refills the table in use:
+# until it is completed the API sees only the tables already loaded
+SCHEMA_LOAD_STREAMING = True
+# tables for each batch
+SCHEMA_LOAD_BATCH_SIZE = 20
+# batches ready to be loaded, waiting in memory (backpressure)
+SCHEMA_LOAD_QUEUE_SIZE = 2
+SCHEMA_LOAD_CHECKPOINT_FILE = "schema_load_checkpoint.json"
+# blue/green full load: load in a new table ({VECTOR_TABLE_NAME}_G{n}), verify
+# it and then switch the synonym VECTOR_TABLE_NAME (needs CREATE SYNONYM).
+# An existing table must be migrated once, with the API stopped, before
+# enabling it (batch_migrate_vector_store_23ai.py)
+SCHEMA_LOAD_BLUE_GREEN = False
+# old generations kept for rollback (see rollback_schema_generation)
+SCHEMA_GENERATIONS_TO_KEEP = 2
+
 
 #
 # Similarity search and reranking
@@ -143,3 +242,78 @@ N_SAMPLES = 3
 TOP_K = 6
 # top_n after reranking
 TOP_N = 6
+# adaptive TOP_K: over-fetch ADAPTIVE_TOP_K_MAX tables and cut at the knee
+# of the similarity scores or at the token budget (see adaptive_top_k.py)
+ENABLE_ADAPTIVE_TOP_K = False
+ADAPTIVE_TOP_K_MIN = 2
+ADAPTIVE_TOP_K_MAX = 12
+# min difference in similarity to cut at the knee
+ADAPTIVE_TOP_K_MIN_GAP = 0.05
+# max (estimated) tokens of the table chunks selected
+ADAPTIVE_TOP_K_TOKEN_BUDGET = 8000
+
+#
+# Request cache (NL request -> SQL)
+#
+# "memory": private to the process, "sqlite": persistent on disk
+# and shared between API workers (use a local disk, not NFS)
+REQUEST_CACHE_BACKEND = "sqlite"
+REQUEST_CACHE_DB_PATH = "request_cache.db"
+# max number of requests kept in cache (LRU eviction)
+REQUEST_CACHE_MAX_ENTRIES = 5000
+# approx. memory ceiling for the cache, in bytes
+REQUEST_CACHE_MAX_BYTES = 50 * 1024 * 1024
+# time to live for each entry, in sec. (None: never expire)
+REQUEST_CACHE_TTL = 24 * 3600
+
+# second tier of the cache: search for a similar request already translated.
+# The index is in memory, in every API worker, also with the "sqlite" backend:
+# after a restart it is empty, and it is filled by the new translations
+ENABLE_SEMANTIC_CACHE = True
+# min cosine similarity to accept a cached request as a near-duplicate
+# keep it high: "top 5 sales" and "top 10 sales" are very similar
+SEMANTIC_CACHE_THRESHOLD = 0.97
+SEMANTIC_CACHE_MAX_ENTRIES = 5000
+
+# cache of SQL templates: reuse SQL when requests differ only in literals
+ENABLE_TEMPLATE_CACHE = True
+TEMPLATE_CACHE_MAX_ENTRIES = 2000
+
+#
+# Result cache (SQL + user_group_id -> rows)
+#
+ENABLE_RESULT_CACHE = True
+RESULT_CACHE_MAX_ENTRIES = 500
+RESULT_CACHE_MAX_BYTES = 200 * 1024 * 1024
+# results with more rows are not cached
+RESULT_CACHE_MAX_ROWS = 10000
+# in sec. The cache is in process: /v2/invalidate_results clears only the
+# worker serving the call, the other API workers can return stale rows until
+# their entries expire
+RESULT_CACHE_TTL = 5 * 60
+
+#
+# Negative cache (requests for which all the models failed)
+#
+ENABLE_NEGATIVE_CACHE = True
+# TTL (sec.) after the first failure, doubles at every new failure
+NEGATIVE_CACHE_TTL = 5 * 60
+NEGATIVE_CACHE_MAX_TTL = 6 * 3600
+NEGATIVE_CACHE_MAX_ENTRIES = 5000
+
+#
+# Prewarm of the SQL cache at API startup
+#
+# every request not already in cache is an LLM generation at every startup:
+# enable it with a cap sized on the LLM budget
+ENABLE_CACHE_PREWARM = False
+# max number of requests translated in parallel during prewarm
+PREWARM_CONCURRENCY = 4
+PREWARM_MAX_REQUESTS = 50
+# requests translated in SQL (not found in cache) are logged here
+# (None: don't log); the log is used for prewarm at next startup
+REQUEST_LOG_FILE = "request_log.jsonl"
+# when the log is bigger, it is rotated (a single old file is kept)
+REQUEST_LOG_MAX_BYTES = 5_000_000
+# with many API workers, only the one holding the lock does the prewarm
+PREWARM_LOCK_FILE = "prewarm.lock"
@@ -8,7 +8,7 @@ Description:
     This file provide a class to handle the interaction with the
     Data Schema:
         - test_query_syntax
-        - execute_sql
+        - execute_sql (with a cache for the results)
 
 Inspired by:
    
@@ -35,6 +35,9 @@ from sqlalchemy import create_engine
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
+from result_cache import ResultCache
+from config import ENABLE_RESULT_CACHE
+
 
 class DatabaseManager:
     """
@@ -45,6 +48,8 @@ class DatabaseManager:
         self.connect_args = connect_args
         self.logger = logger
         self.engine = self.create_engine()
+        # cache for the rows returned by execute_sql
+        self.result_cache = ResultCache() if ENABLE_RESULT_CACHE else None
 
     def create_engine(self):
         """
@@ -102,16 +107,29 @@ class DatabaseManager:
             self.logger.error("SQL query generic error: %s", e)
             return False
 
-    def execute_sql(self, sql_query):
+    def execute_sql(self, sql_query, user_group_id=None):
         """
         execute the given SQL and return a set of rows
+
+        user_group_id: the group of the user (RBAC), part of the key
+        of the result cache
         """
+        if self.result_cache is not None:
+            rows = self.result_cache.get(sql_query, user_group_id)
+
+            if rows is not None:
+                self.logger.info("Found %s rows in result cache..", len(rows))
+                return rows
+
         try:
             with self.engine.connect() as connection:
                 rows = connection.execute(text(sql_query)).mappings().all()
 
                 self.logger.info("Found %s rows..", len(rows))
 
+                if self.result_cache is not None:
+                    self.result_cache.put(sql_query, rows, user_group_id)
+
                 return rows
         except SQLAlchemyError as db_err:
             self.logger.error("Error in DatabaseManager:execute_sql...")
@@ -122,6 +140,21 @@ class DatabaseManager:
             self.logger.error("Generic Error executing SQL query: %s", e)
             return None
 
+    def invalidate_results_for_table(self, table_name):
+        """
+        remove from the result cache the queries using the table
+        (to be called when the table is refreshed)
+
+        return the number of cached results removed
+        """
+        if self.result_cache is None:
+            return 0
+
+        n_removed = self.result_cache.invalidate_table(table_name)
+        self.logger.info("Removed %s cached results for %s", n_removed, table_name)
+
+        return n_removed
+
     #
     # to get a list of tables whose names starts with PREFIX
     #
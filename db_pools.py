@@ -0,0 +1,153 @@
+"""
+File name: db_pools.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide the registry of the connection pools, shared
+    by all the components in the process:
+        - "data": the Data Schema (CONNECT_ARGS)
+        - "vector": the schema with the Vector Store (CONNECT_ARGS_VECTOR)
+
+    Opening a connection to ADB (with wallet) requires a TLS handshake:
+    with the pools it is done only when a new session is created,
+    not for every operation.
+
+    Sessions can be initialised with tags: a component registers
+    a function for a tag (ex: DBMS_METADATA settings) and the function
+    is called only when the session doesn't have that tag yet.
+
+Inspired by:
+    python-oracledb docs: Connection Pooling, Session Callbacks
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        with get_connection("vector") as conn:
+            ...
+        get_pool_stats()
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+"""
+
+import threading
+import oracledb
+
+from config import (
+    CONNECT_ARGS,
+    CONNECT_ARGS_VECTOR,
+    ENABLE_DB_POOLS,
+    DB_POOL_MIN,
+    DB_POOL_MAX,
+    DB_POOL_INCREMENT,
+    DB_POOL_PING_INTERVAL,
+)
+
+DATA_POOL = "data"
+VECTOR_POOL = "vector"
+
+POOLS_CONNECT_ARGS = {DATA_POOL: CONNECT_ARGS, VECTOR_POOL: CONNECT_ARGS_VECTOR}
+
+# pools created, by name
+_pools = {}
+# functions to initialise a session, by tag
+_session_initializers = {}
+_lock = threading.Lock()
+
+
+def register_session_tag(tag, init_func):
+    """
+    init_func(conn) is called on a session when acquired with this tag
+    (only once for every session)
+    """
+    _session_initializers[tag] = init_func
+
+
+def get_pool(name):
+    """
+    return the pool (created at first use)
+    """
+    with _lock:
+        pool = _pools.get(name)
+
+        if pool is None:
+            pool = oracledb.create_pool(
+                **POOLS_CONNECT_ARGS[name],
+                min=DB_POOL_MIN,
+                max=DB_POOL_MAX,
+                increment=DB_POOL_INCREMENT,
+                ping_interval=DB_POOL_PING_INTERVAL,
+                getmode=oracledb.POOL_GETMODE_WAIT,
+                session_callback=_session_callback,
+            )
+            _pools[name] = pool
+
+    return pool
+
+
+def get_connection(name, tag=None):
+    """
+    return a connection from the pool name ("data" or "vector")
+
+    to be used in a with: at the end the connection is released to the pool
+    if pools are disabled, return a new connection
+    """
+    if not ENABLE_DB_POOLS:
+        conn = oracledb.connect(**POOLS_CONNECT_ARGS[name])
+        init_func = _session_initializers.get(tag)
+        if init_func is not None:
+            init_func(conn)
+        return conn
+
+    return get_pool(name).acquire(tag=tag)
+
+
+def get_pool_stats():
+    """
+    return for every pool: sessions opened and busy, limits
+    """
+    with _lock:
+        return {
+            name: {
+                "opened": pool.opened,
+                "busy": pool.busy,
+                "min": pool.min,
+                "max": pool.max,
+                "increment": pool.increment,
+                "ping_interval": pool.ping_interval,
+            }
+            for name, pool in _pools.items()
+        }
+
+
+def close_pools():
+    """
+    close all the pools (ex: at the end of a batch)
+    """
+    with _lock:
+        for pool in _pools.values():
+            pool.close(force=True)
+        _pools.clear()
+
+
+#
+# Helper
+#
+def _session_callback(conn, requested_tag):
+    """
+    called when a new session is created or has a different tag
+    """
+    init_func = _session_initializers.get(requested_tag)
+
+    if init_func is not None:
+        init_func(conn)
+        conn.tag = requested_tag
@@ -0,0 +1,185 @@
+"""
+File name: embedding_service.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide the embedding service shared by all the components:
+    semantic cache, schema retrieval (SchemaManager) and RAG retrieval.
+
+    - one client (OCIGenAIEmbeddings) for every model, for the process
+    - an LRU cache keyed by (model, normalized text): the user request
+      is embedded only once, even if used for table and docs retrieval
+    - embed_documents embeds in a single batch call only the texts
+      not found in cache
+
+    CachedEmbeddings implements the LangChain Embeddings interface,
+    so it can be used as it is with OracleVS.
+
+Inspired by:
+
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        embed_model = get_embedding_service(model_name, endpoint, compartment_id)
+        embedding = embed_model.embed_query(user_request)
+
+Dependencies:
+    LangChain
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+"""
+
+import threading
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+from langchain_community.embeddings import OCIGenAIEmbeddings
+
+from config import AUTH_TYPE, EMBED_CACHE_MAX_ENTRIES
+
+# the services created, key: (model, endpoint, compartment)
+_services = {}
+_lock = threading.Lock()
+
+
+def get_embedding_service(embed_model_name, embed_endpoint, compartment_id):
+    """
+    return the (shared) embedding service for the model
+    """
+    key = (embed_model_name, embed_endpoint, compartment_id)
+
+    with _lock:
+        service = _services.get(key)
+
+        if service is None:
+            client = OCIGenAIEmbeddings(
+                auth_type=AUTH_TYPE,
+                model_id=embed_model_name,
+                service_endpoint=embed_endpoint,
+                compartment_id=compartment_id,
+            )
+            service = CachedEmbeddings(client, embed_model_name)
+            _services[key] = service
+
+    return service
+
+
+def normalize_text(text):
+    """
+    normalize blanks: texts different only in spaces have the same embedding
+    """
+    return " ".join(text.split())
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embedding model with an LRU cache of the embeddings
+    """
+
+    def __init__(self, embed_model, model_name, max_entries=EMBED_CACHE_MAX_ENTRIES):
+        self.embed_model = embed_model
+        self.model_name = model_name
+        self.max_entries = max_entries
+
+        # key: (model_name, normalized text)
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.stats = {"hits": 0, "misses": 0, "embed_calls": 0}
+
+    def embed_query(self, text):
+        """
+        return the embedding for a query
+        """
+        key = (self.model_name, normalize_text(text))
+
+        embedding = self._get(key)
+
+        if embedding is None:
+            embedding = self.embed_model.embed_query(key[1])
+
+            with self.lock:
+                self.stats["embed_calls"] += 1
+            self._put(key, embedding)
+
+        return list(embedding)
+
+    def embed_documents(self, texts):
+        """
+        return the embeddings for a list of texts: the ones not in cache
+        are embedded with a single (batch) call
+        """
+        keys = [(self.model_name, normalize_text(text)) for text in texts]
+        embeddings = [self._get(key) for key in keys]
+
+        # texts not in cache, without duplicates
+        missing_keys = list(
+            dict.fromkeys(
+                key for key, embedding in zip(keys, embeddings) if embedding is None
+            )
+        )
+
+        if missing_keys:
+            new_embeddings = self.embed_model.embed_documents(
+                [text for _, text in missing_keys]
+            )
+
+            with self.lock:
+                self.stats["embed_calls"] += 1
+
+            new_embeddings = dict(zip(missing_keys, new_embeddings))
+            for key, embedding in new_embeddings.items():
+                self._put(key, embedding)
+
+            embeddings = [
+                embedding if embedding is not None else new_embeddings[key]
+                for key, embedding in zip(keys, embeddings)
+            ]
+
+        return [list(embedding) for embedding in embeddings]
+
+    def get_cache_info(self):
+        """
+        get info on the cache: size, hits and calls to the model
+        """
+        with self.lock:
+            return {
+                "model": self.model_name,
+                "entries": len(self.cache),
+                "max_entries": self.max_entries,
+                **self.stats,
+            }
+
+    #
+    # Helper
+    #
+    def _get(self, key):
+        with self.lock:
+            embedding = self.cache.get(key)
+
+            if embedding is None:
+                self.stats["misses"] += 1
+                return None
+
+            self.cache.move_to_end(key)
+            self.stats["hits"] += 1
+
+            return embedding
+
+    def _put(self, key, embedding):
+        with self.lock:
+            self.cache[key] = embedding
+            self.cache.move_to_end(key)
+
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
@@ -0,0 +1,336 @@
+"""
+File name: hybrid_retriever.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide the hybrid (lexical + vector) retrieval of tables
+
+    Requests that use the exact name of a table or of a column are often
+    missed by the vector search. A BM25 index on table names, column names,
+    comments and summaries is kept in process and its ranking is fused
+    with the vector ranking using Reciprocal Rank Fusion (RRF):
+        score(t) = w_vector / (k + rank_vector(t)) + w_lexical / (k + rank_lexical(t))
+
+    The BM25 index is a term-major sparse matrix (CSR layout in numpy
+    arrays); documents are tokenized only when they change and the
+    matrix is recompiled lazily, when the schema store is updated
+    (see SchemaVectorIndex).
+
+Inspired by:
+    tests/test_bm25.py
+    Cormack et al., Reciprocal Rank Fusion outperforms Condorcet
+    and individual Rank Learning Methods
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        retriever = HybridRetriever(vector_index, logger)
+        docs = retriever.search(user_request, k=TOP_K)
+
+Dependencies:
+    numpy
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+"""
+
+import re
+import math
+import threading
+from collections import Counter
+import numpy as np
+
+from config import (
+    HYBRID_VECTOR_WEIGHT,
+    HYBRID_LEXICAL_WEIGHT,
+    HYBRID_RRF_K,
+    HYBRID_N_CANDIDATES,
+)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+# the sample records are not indexed (values, not names)
+SAMPLES_MARKER = "--- First "
+
+
+def tokenize(text):
+    """
+    lower case words; identifiers with _ are indexed also by parts
+    (CUST_ID -> cust_id, cust, id)
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if "_" in token:
+            tokens.extend(part for part in token.split("_") if part)
+    return tokens
+
+
+class BM25Index:
+    """
+    BM25 on a set of documents, identified by doc_id
+
+    postings are stored term-major, CSR layout: for term i, documents are
+    indices[indptr[i]:indptr[i + 1]] with term frequencies in tfs
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+
+        # tokenized documents, key: doc_id
+        self.doc_terms = {}
+
+        # compiled arrays, rebuilt when documents change
+        self.compiled = None
+        self.lock = threading.Lock()
+
+    def set_document(self, doc_id, text):
+        """
+        add or replace a document
+        """
+        terms = Counter(tokenize(text))
+
+        with self.lock:
+            self.doc_terms[doc_id] = terms
+            self.compiled = None
+
+    def remove_document(self, doc_id):
+        """
+        remove a document, if present
+        """
+        with self.lock:
+            if self.doc_terms.pop(doc_id, None) is not None:
+                self.compiled = None
+
+    def search(self, query, k):
+        """
+        return the list of (doc_id, score) for the k documents with the
+        highest score (only documents with score > 0)
+        """
+        compiled = self._get_compiled()
+        doc_ids, term_positions, indptr, indices, tfs, doc_lens = compiled
+
+        n_docs = len(doc_ids)
+        if n_docs == 0:
+            return []
+
+        avg_len = max(float(doc_lens.mean()), 1.0)
+        scores = np.zeros(n_docs, dtype=np.float32)
+
+        for term in set(tokenize(query)):
+            position = term_positions.get(term)
+            if position is None:
+                continue
+
+            start, end = indptr[position], indptr[position + 1]
+            docs, tf = indices[start:end], tfs[start:end]
+
+            df = end - start
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * doc_lens[docs] / avg_len)
+
+            # a document appears once in the postings of a term
+            scores[docs] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        n_found = int(np.count_nonzero(scores))
+        k = min(k, n_found)
+        if k == 0:
+            return []
+
+        top_k = np.argpartition(-scores, k - 1)[:k]
+        top_k = top_k[np.argsort(-scores[top_k])]
+
+        return [(doc_ids[i], float(scores[i])) for i in top_k]
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    #
+    # Helper
+    #
+    def _get_compiled(self):
+        with self.lock:
+            if self.compiled is None:
+                self.compiled = self._compile()
+            return self.compiled
+
+    def _compile(self):
+        """
+        build the CSR arrays from the tokenized documents
+        """
+        doc_ids = list(self.doc_terms)
+
+        postings = {}
+        for doc_pos, doc_id in enumerate(doc_ids):
+            for term, tf in self.doc_terms[doc_id].items():
+                postings.setdefault(term, []).append((doc_pos, tf))
+
+        term_positions = {}
+        indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        n_postings = sum(len(p) for p in postings.values())
+        indices = np.empty(n_postings, dtype=np.int32)
+        tfs = np.empty(n_postings, dtype=np.float32)
+
+        offset = 0
+        for position, (term, term_postings) in enumerate(postings.items()):
+            term_positions[term] = position
+            for doc_pos, tf in term_postings:
+                indices[offset] = doc_pos
+                tfs[offset] = tf
+                offset += 1
+            indptr[position + 1] = offset
+
+        doc_lens = np.array(
+            [sum(self.doc_terms[doc_id].values()) for doc_id in doc_ids],
+            dtype=np.float32,
+        )
+
+        return doc_ids, term_positions, indptr, indices, tfs, doc_lens
+
+
+class HybridRetriever:
+    """
+    Fusion (RRF) of the ranking of the vector index and of BM25
+
+    the BM25 index is synchronized with the docs in the vector index,
+    re-tokenizing only the tables changed
+    """
+
+    def __init__(
+        self,
+        vector_index,
+        logger,
+        vector_weight=HYBRID_VECTOR_WEIGHT,
+        lexical_weight=HYBRID_LEXICAL_WEIGHT,
+        rrf_k=HYBRID_RRF_K,
+        n_candidates=HYBRID_N_CANDIDATES,
+    ):
+        self.vector_index = vector_index
+        self.logger = logger
+        self.vector_weight = vector_weight
+        self.lexical_weight = lexical_weight
+        self.rrf_k = rrf_k
+        self.n_candidates = n_candidates
+
+        self.lexical_index = BM25Index()
+
+        # docs by table name, and the text indexed for each table
+        self.docs_by_table = {}
+        self.indexed_texts = {}
+        # the load of the vector index the BM25 index is aligned to
+        self.synced_load = None
+
+        self.sync_lock = threading.Lock()
+
+    def search(self, query, k):
+        """
+        return the Documents of the k tables with the highest fused score
+        """
+        return [doc for doc, _ in self.search_with_scores(query, k)]
+
+    def search_with_scores(self, query, k):
+        """
+        return the list of (Document, cosine similarity) for the k tables
+        with the highest fused score, in fused order
+
+        the score is the one of the vector search, so that it can be compared
+        with thresholds; None for tables found only by BM25 (no vector score:
+        they must not be cut by the rerank gate or adaptive TOP_K)
+        """
+        # the vector search also refreshes the vector index, if needed
+        vector_results = self.vector_index.search_with_scores(query, self.n_candidates)
+        similarities = {
+            doc.metadata.get("table"): similarity for doc, similarity in vector_results
+        }
+
+        self._sync_if_needed()
+
+        docs_by_table = self.docs_by_table
+        lexical_results = self.lexical_index.search(query, self.n_candidates)
+
+        scores = {}
+        for rank, (doc, _) in enumerate(vector_results, start=1):
+            table_name = doc.metadata.get("table")
+            scores[table_name] = scores.get(table_name, 0.0) + self.vector_weight / (
+                self.rrf_k + rank
+            )
+        for rank, (table_name, _) in enumerate(lexical_results, start=1):
+            scores[table_name] = scores.get(table_name, 0.0) + self.lexical_weight / (
+                self.rrf_k + rank
+            )
+
+        ranked_tables = sorted(scores, key=scores.get, reverse=True)
+
+        return [
+            (docs_by_table[table_name], similarities.get(table_name))
+            for table_name in ranked_tables[:k]
+            if table_name in docs_by_table
+        ]
+
+    def get_index_info(self):
+        """
+        get info on the lexical index and on the weights used
+        """
+        return {
+            "entries": len(self.lexical_index),
+            "vector_weight": self.vector_weight,
+            "lexical_weight": self.lexical_weight,
+            "rrf_k": self.rrf_k,
+            "n_candidates": self.n_candidates,
+        }
+
+    #
+    # Helper
+    #
+    def _sync_if_needed(self):
+        """
+        align the BM25 index to the docs of the vector index
+        """
+        if self.synced_load == self.vector_index.stats["loads"]:
+            return
+
+        with self.sync_lock:
+            current_load = self.vector_index.stats["loads"]
+            if self.synced_load == current_load:
+                return
+
+            docs_by_table = {
+                doc.metadata.get("table"): doc for doc in self.vector_index.get_docs()
+            }
+
+            n_changed = 0
+            for table_name, doc in docs_by_table.items():
+                text = self._get_indexed_text(doc)
+
+                if self.indexed_texts.get(table_name) != text:
+                    self.lexical_index.set_document(table_name, text)
+                    self.indexed_texts[table_name] = text
+                    n_changed += 1
+
+            for table_name in set(self.indexed_texts) - set(docs_by_table):
+                self.lexical_index.remove_document(table_name)
+                del self.indexed_texts[table_name]
+                n_changed += 1
+
+            self.docs_by_table = docs_by_table
+            self.synced_load = current_load
+
+            self.logger.info("Lexical index: %s tables updated", n_changed)
+
+    def _get_indexed_text(self, doc):
+        """
+        table name, summary, DDL and comments (without sample records)
+        """
+        table_chunk = doc.metadata.get("table_chunk") or ""
+
+        return doc.page_content + "\n" + table_chunk.split(SAMPLES_MARKER)[0]
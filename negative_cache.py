@@ -0,0 +1,153 @@
+"""
+File name: negative_cache.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide a class to handle a cache of the requests
+    for which we have not been able to generate SQL with any model.
+
+    A request in the cache is immediately answered with "SQL not generated",
+    without calling again all the models. The entry expires after a short TTL,
+    that doubles (backoff) every time the request fails again.
+    The cache is cleared when the schema in the vector store changes.
+
+Inspired by:
+
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        negative_cache = NegativeCache()
+        if negative_cache.contains(key, schema_version): ...
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+"""
+
+import time
+import threading
+
+from config import (
+    NEGATIVE_CACHE_TTL,
+    NEGATIVE_CACHE_MAX_TTL,
+    NEGATIVE_CACHE_MAX_ENTRIES,
+)
+
+
+class NegativeCache:
+    """
+    In memory cache of failed requests, with TTL and backoff
+
+    # Dato: {key: {"failures": n, "expires_at": t}}
+    """
+
+    def __init__(
+        self,
+        ttl=NEGATIVE_CACHE_TTL,
+        max_ttl=NEGATIVE_CACHE_MAX_TTL,
+        max_entries=NEGATIVE_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.max_ttl = max_ttl
+        self.max_entries = max_entries
+
+        self.cache = {}
+        # version of the schema when the entries have been added
+        self.schema_version = None
+
+        self.lock = threading.Lock()
+
+        self.stats = {"hits": 0, "added": 0, "invalidations": 0}
+
+    def contains(self, key, schema_version=None):
+        """
+        True if the request has failed recently (and the schema is the same)
+        """
+        with self.lock:
+            self._check_schema_version(schema_version)
+
+            entry = self.cache.get(key)
+
+            if entry is None or entry["expires_at"] <= time.time():
+                return False
+
+            self.stats["hits"] += 1
+            return True
+
+    def add(self, key, schema_version=None):
+        """
+        register a failure: the TTL doubles at every new failure
+        """
+        with self.lock:
+            self._check_schema_version(schema_version)
+
+            entry = self.cache.get(key, {"failures": 0})
+            entry["failures"] += 1
+            ttl = min(self.ttl * 2 ** (entry["failures"] - 1), self.max_ttl)
+            entry["expires_at"] = time.time() + ttl
+
+            self.cache[key] = entry
+            self.stats["added"] += 1
+
+            if len(self.cache) > self.max_entries:
+                self._remove_expired()
+            while len(self.cache) > self.max_entries:
+                # the oldest (dict keeps insertion order)
+                del self.cache[next(iter(self.cache))]
+
+    def remove(self, key):
+        """
+        remove the request (for example, after a success)
+        """
+        with self.lock:
+            self.cache.pop(key, None)
+
+    def clear(self):
+        """
+        remove all the entries
+        """
+        with self.lock:
+            self.cache.clear()
+            self.stats["invalidations"] += 1
+
+    def get_cache_info(self):
+        """
+        get info on the cache: size, ttl and hits
+        """
+        with self.lock:
+            return {
+                "entries": len(self.cache),
+                "ttl": self.ttl,
+                "max_ttl": self.max_ttl,
+                "schema_version": self.schema_version,
+                **self.stats,
+            }
+
+    #
+    # Helper
+    #
+    def _check_schema_version(self, schema_version):
+        """
+        if the schema has changed failures could now succeed: clear the cache
+        """
+        if schema_version is None or schema_version == self.schema_version:
+            return
+
+        if self.cache:
+            self.cache.clear()
+            self.stats["invalidations"] += 1
+        self.schema_version = schema_version
+
+    def _remove_expired(self):
+        now = time.time()
+        for key in [k for k, entry in self.cache.items() if entry["expires_at"] <= now]:
+            del self.cache[key]
@@ -1,20 +1,31 @@
 """
 File name: request_cache.py
 Author: Luigi Saetta
-Date last modified: 2024-10-21
+Date last modified: 2026-10-18
 Python Version: 3.11
 
 Description:
     This file provide a class to handle a cache with all the requests
     more frequently mad, in NL, and the resulting SQL code
 
+    The cache is bounded: LRU eviction on number of entries and on an
+    (approximate) memory ceiling, plus a TTL for each entry.
+
+    The key is (request, user_group_id): the SQL generated for a group
+    (RBAC) is never returned to another group.
+
+    Two backends are available (see REQUEST_CACHE_BACKEND in config):
+        - memory: a private cache for the process
+        - sqlite: persistent on disk (WAL mode), survives restarts
+          and is shared between all the workers of the API
+
 Inspired by:
    
 
 Usage:
     Import this module into other scripts to use its functions. 
     Example:
-
+        request_cache = create_request_cache()
 
 License:
     This code is released under the MIT License.
@@ -27,67 +38,534 @@ Warnings:
     This module is in development, may change in future versions.
 """
 
+import sys
+import time
+import threading
+import sqlite3
+from collections import OrderedDict
+
+from config import (
+    REQUEST_CACHE_BACKEND,
+    REQUEST_CACHE_DB_PATH,
+    REQUEST_CACHE_MAX_ENTRIES,
+    REQUEST_CACHE_MAX_BYTES,
+    REQUEST_CACHE_TTL,
+)
+
+# fixed overhead (approx) for the dict with stats of each entry
+ENTRY_OVERHEAD_BYTES = 600
+
+# sqlite backend: how long (sec.) to wait for a lock held by another process
+SQLITE_BUSY_TIMEOUT = 10
+# sqlite backend: last access time is updated at most every N sec.
+# to avoid a write for every hit
+SQLITE_TOUCH_INTERVAL = 60
+
+EVICTION_REASONS = ["capacity", "memory", "expired"]
+
+
+def create_request_cache():
+    """
+    create the request cache, with the backend defined in config
+    """
+    if REQUEST_CACHE_BACKEND == "sqlite":
+        return PersistentRequestCache(REQUEST_CACHE_DB_PATH)
+
+    return RequestCache()
+
 
 class RequestCache:
     """
     In memory cache for the request to be translated in SQL
 
-    # Dato: {request_nl: {'sql': sql, 'count': 0, 'success': 0, 'failures': 0, 'total_time': 0}}
+    # Dato: {(request_nl, user_group_id): {'sql': sql, 'count': 0, 'success': 0, 'failures': 0, 'total_time': 0}}
+
+    (18/10/2026) the cache is now bounded:
+        - max_entries: max number of requests, LRU eviction
+        - max_bytes: approx. memory ceiling, LRU eviction
+        - ttl: time to live (sec.) of an entry, None means no expiration
     """
 
-    def __init__(self):
-        self.cache = {}
+    def __init__(
+        self,
+        max_entries=REQUEST_CACHE_MAX_ENTRIES,
+        max_bytes=REQUEST_CACHE_MAX_BYTES,
+        ttl=REQUEST_CACHE_TTL,
+    ):
+        # ordered from least to most recently used
+        self.cache = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
 
-    def add_to_cache(self, request_nl, sql_query, success=True, generation_time=None):
+        # the API is served by a thread pool
+        self.lock = threading.RLock()
+
+        self.total_bytes = 0
+        self.evictions = {reason: 0 for reason in EVICTION_REASONS}
+
+    def add_to_cache(
+        self,
+        request_nl,
+        sql_query,
+        success=True,
+        generation_time=None,
+        user_group_id=None,
+    ):
         """
         add a pair (user_request, sql) to the cache, together with stats
         """
-        if request_nl not in self.cache:
-            self.cache[request_nl] = {
-                "sql": sql_query,
-                "count": 0,
-                "success": 0,
-                "failures": 0,
-                "total_time": 0,
-            }
+        key = (request_nl, user_group_id)
+
+        with self.lock:
+            entry = self._get_entry(key)
 
-        # Aggiornamento delle statistiche
-        self.cache[request_nl]["count"] += 1
-        if success:
-            self.cache[request_nl]["success"] += 1
-            # add sql to cache (fix bug 27/10/2024)
-            self.cache[request_nl]["sql"] = sql_query
-        else:
-            self.cache[request_nl]["failures"] += 1
+            if entry is None:
+                entry = {
+                    "sql": sql_query,
+                    "count": 0,
+                    "success": 0,
+                    "failures": 0,
+                    "total_time": 0,
+                    "expires_at": None,
+                    "size": 0,
+                }
+                self.cache[key] = entry
+
+            # Aggiornamento delle statistiche
+            entry["count"] += 1
+            if success:
+                entry["success"] += 1
+                # add sql to cache (fix bug 27/10/2024)
+                entry["sql"] = sql_query
+            else:
+                entry["failures"] += 1
+
+            if generation_time is not None:
+                entry["total_time"] += generation_time
+
+            # the ttl starts when the entry is (re)written
+            entry["expires_at"] = (
+                time.time() + self.ttl if self.ttl is not None else None
+            )
 
-        if generation_time is not None:
-            self.cache[request_nl]["total_time"] += generation_time
+            # update the memory accounting
+            new_size = self._estimate_size(request_nl, entry["sql"])
+            self.total_bytes += new_size - entry["size"]
+            entry["size"] = new_size
 
-    def get_request_with_stats(self, request_nl):
+            self.cache.move_to_end(key)
+            self._evict()
+
+    def get_request_with_stats(self, request_nl, user_group_id=None):
         """
         get an entry (with stats)
         """
-        if request_nl in self.cache:
-            data = self.cache[request_nl]
-            avg_time = (
-                round(data["total_time"] / data["count"], 2)
-                if data["count"] > 0
-                else None
-            )
+        key = (request_nl, user_group_id)
+
+        with self.lock:
+            data = self._get_entry(key)
+
+            if data is None:
+                return None
+
+            # mark as most recently used
+            self.cache.move_to_end(key)
+
+            return self._format_stats(data)
+
+    def get_all_stats(self, user_group_id=None):
+        """
+        get all stats (for the requests of the group)
+        """
+        with self.lock:
+            self._remove_expired()
+
+            all_stats = {}
+            for (request_nl, group_id), data in self.cache.items():
+                if group_id == user_group_id:
+                    all_stats[request_nl] = self._format_stats(data)
+        return all_stats
+
+    def get_cache_info(self):
+        """
+        get info on the cache itself: size, limits and eviction counters
+        """
+        with self.lock:
             return {
-                "sql": data["sql"],
-                "total_count": data["count"],
-                "success_count": data["success"],
-                "failure_count": data["failures"],
-                "average_generation_time": str(avg_time),
+                "backend": "memory",
+                "entries": len(self.cache),
+                "max_entries": self.max_entries,
+                "approx_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "evictions": dict(self.evictions),
             }
-        return None
 
-    def get_all_stats(self):
+    #
+    # Helper
+    #
+    def _format_stats(self, data):
         """
-        get all stats
+        format the stats for an entry
         """
-        all_stats = {}
-        for request_nl in self.cache:
-            all_stats[request_nl] = self.get_request_with_stats(request_nl)
-        return all_stats
+        return format_stats(data)
+
+    def _get_entry(self, key):
+        """
+        return the entry, None if not found or expired (expired are removed)
+        """
+        data = self.cache.get(key)
+
+        if data is not None and self._is_expired(data, time.time()):
+            self._remove(key, "expired")
+            data = None
+
+        return data
+
+    def _is_expired(self, data, now):
+        return data["expires_at"] is not None and data["expires_at"] <= now
+
+    def _remove_expired(self):
+        now = time.time()
+        expired = [
+            key for key, data in self.cache.items() if self._is_expired(data, now)
+        ]
+
+        for key in expired:
+            self._remove(key, "expired")
+
+    def _remove(self, key, reason):
+        data = self.cache.pop(key)
+        self.total_bytes -= data["size"]
+        self.evictions[reason] += 1
+
+    def _evict(self):
+        """
+        remove least recently used entries until we're within limits
+        """
+        while self.max_entries is not None and len(self.cache) > self.max_entries:
+            self._remove(next(iter(self.cache)), "capacity")
+
+        # keep at least the last entry added
+        while (
+            self.max_bytes is not None
+            and self.total_bytes > self.max_bytes
+            and len(self.cache) > 1
+        ):
+            self._remove(next(iter(self.cache)), "memory")
+
+    def _estimate_size(self, request_nl, sql_query):
+        """
+        approx. size in bytes of an entry
+        """
+        return estimate_size(request_nl, sql_query)
+
+
+class PersistentRequestCache:
+    """
+    Persistent cache for the request to be translated in SQL
+
+    Same interface and stats of RequestCache, data are stored in a
+    SQLite db in WAL mode: many readers (also in different processes)
+    and atomic updates (a single UPSERT) in add_to_cache.
+
+    Limits (max_entries, max_bytes, ttl) are the same of RequestCache,
+    eviction is LRU based on the last access time.
+    """
+
+    def __init__(
+        self,
+        db_path,
+        max_entries=REQUEST_CACHE_MAX_ENTRIES,
+        max_bytes=REQUEST_CACHE_MAX_BYTES,
+        ttl=REQUEST_CACHE_TTL,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        # sqlite connections can't be shared between threads
+        self.local = threading.local()
+
+        self._create_tables()
+
+    def add_to_cache(
+        self,
+        request_nl,
+        sql_query,
+        success=True,
+        generation_time=None,
+        user_group_id=None,
+    ):
+        """
+        add a pair (user_request, sql) to the cache, together with stats
+        """
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl is not None else None
+
+        conn = self._get_connection()
+
+        # a single transaction: upsert and eviction
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                """
+                INSERT INTO request_cache (request_nl, user_group_id, sql, count,
+                    success, failures, total_time, expires_at, last_access, size)
+                VALUES (:request_nl, :user_group_id, :sql, 1, :success, :failures,
+                    :total_time, :expires_at, :now, :size)
+                ON CONFLICT (request_nl, user_group_id) DO UPDATE SET
+                    sql = CASE WHEN excluded.success = 1
+                        THEN excluded.sql ELSE request_cache.sql END,
+                    count = request_cache.count + 1,
+                    success = request_cache.success + excluded.success,
+                    failures = request_cache.failures + excluded.failures,
+                    total_time = request_cache.total_time + excluded.total_time,
+                    expires_at = excluded.expires_at,
+                    last_access = excluded.last_access,
+                    size = CASE WHEN excluded.success = 1
+                        THEN excluded.size ELSE request_cache.size END
+                """,
+                {
+                    "request_nl": request_nl,
+                    "user_group_id": _to_group_key(user_group_id),
+                    "sql": sql_query,
+                    "success": 1 if success else 0,
+                    "failures": 0 if success else 1,
+                    "total_time": generation_time or 0,
+                    "expires_at": expires_at,
+                    "now": now,
+                    "size": estimate_size(request_nl, sql_query),
+                },
+            )
+            self._evict(conn, now)
+
+    def get_request_with_stats(self, request_nl, user_group_id=None):
+        """
+        get an entry (with stats)
+        """
+        now = time.time()
+        group_key = _to_group_key(user_group_id)
+        conn = self._get_connection()
+
+        row = conn.execute(
+            """
+            SELECT sql, count, success, failures, total_time, last_access
+            FROM request_cache
+            WHERE request_nl = ? AND user_group_id = ?
+            AND (expires_at IS NULL OR expires_at > ?)
+            """,
+            (request_nl, group_key, now),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        if now - row["last_access"] > SQLITE_TOUCH_INTERVAL:
+            # mark as recently used
+            try:
+                with conn:
+                    conn.execute(
+                        """UPDATE request_cache SET last_access = ?
+                        WHERE request_nl = ? AND user_group_id = ?""",
+                        (now, request_nl, group_key),
+                    )
+            except sqlite3.OperationalError:
+                # db locked by a writer, not important: next time
+                pass
+
+        return format_stats(row)
+
+    def get_all_stats(self, user_group_id=None):
+        """
+        get all stats (for the requests of the group)
+        """
+        conn = self._get_connection()
+
+        rows = conn.execute(
+            """
+            SELECT request_nl, sql, count, success, failures, total_time
+            FROM request_cache
+            WHERE user_group_id = ? AND (expires_at IS NULL OR expires_at > ?)
+            ORDER BY last_access
+            """,
+            (_to_group_key(user_group_id), time.time()),
+        ).fetchall()
+
+        return {row["request_nl"]: format_stats(row) for row in rows}
+
+    def get_cache_info(self):
+        """
+        get info on the cache itself: size, limits and eviction counters
+        """
+        conn = self._get_connection()
+
+        n_entries, total_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM request_cache"
+        ).fetchone()
+        evictions = dict(
+            conn.execute("SELECT reason, counter FROM cache_evictions").fetchall()
+        )
+
+        return {
+            "backend": "sqlite",
+            "db_path": self.db_path,
+            "entries": n_entries,
+            "max_entries": self.max_entries,
+            "approx_bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "evictions": evictions,
+        }
+
+    #
+    # Helper
+    #
+    def _get_connection(self):
+        """
+        return the connection for the current thread (create if needed)
+        """
+        conn = getattr(self.local, "conn", None)
+
+        if conn is None:
+            # autocommit: transactions are explicit
+            conn = sqlite3.connect(
+                self.db_path, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+
+        return conn
+
+    def _create_tables(self):
+        conn = self._get_connection()
+
+        with conn:
+            columns = [
+                row["name"] for row in conn.execute("PRAGMA table_info(request_cache)")
+            ]
+            if columns and "user_group_id" not in columns:
+                # created by a previous version, key without the group:
+                # it is a cache, entries are generated again
+                conn.execute("DROP TABLE request_cache")
+
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS request_cache (
+                    request_nl TEXT NOT NULL,
+                    user_group_id TEXT NOT NULL,
+                    sql TEXT,
+                    count INTEGER NOT NULL,
+                    success INTEGER NOT NULL,
+                    failures INTEGER NOT NULL,
+                    total_time REAL NOT NULL,
+                    expires_at REAL,
+                    last_access REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    PRIMARY KEY (request_nl, user_group_id)
+                )
+                """
+            )
+            conn.execute(
+                """CREATE INDEX IF NOT EXISTS request_cache_last_access
+                ON request_cache (last_access)"""
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_evictions (
+                    reason TEXT PRIMARY KEY,
+                    counter INTEGER NOT NULL
+                )
+                """
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache_evictions VALUES (?, 0)",
+                [(reason,) for reason in EVICTION_REASONS],
+            )
+
+    def _evict(self, conn, now):
+        """
+        remove expired entries, then the least recently used
+        until we're within limits (called inside the transaction)
+        """
+        n_removed = conn.execute(
+            "DELETE FROM request_cache WHERE expires_at <= ?", (now,)
+        ).rowcount
+        self._count_evictions(conn, "expired", n_removed)
+
+        if self.max_entries is not None:
+            n_removed = conn.execute(
+                """
+                DELETE FROM request_cache WHERE rowid IN (
+                    SELECT rowid FROM request_cache ORDER BY last_access
+                    LIMIT MAX((SELECT COUNT(*) FROM request_cache) - ?, 0))
+                """,
+                (self.max_entries,),
+            ).rowcount
+            self._count_evictions(conn, "capacity", n_removed)
+
+        if self.max_bytes is not None:
+            # remove the oldest entries exceeding the memory ceiling,
+            # keeping at least the most recent one
+            n_removed = conn.execute(
+                """
+                DELETE FROM request_cache WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, last_access,
+                            SUM(size) OVER (ORDER BY last_access DESC
+                                ROWS UNBOUNDED PRECEDING) AS cum_size
+                        FROM request_cache)
+                    WHERE cum_size > ?
+                    AND last_access < (SELECT MAX(last_access) FROM request_cache))
+                """,
+                (self.max_bytes,),
+            ).rowcount
+            self._count_evictions(conn, "memory", n_removed)
+
+    def _count_evictions(self, conn, reason, n_removed):
+        if n_removed > 0:
+            conn.execute(
+                "UPDATE cache_evictions SET counter = counter + ? WHERE reason = ?",
+                (n_removed, reason),
+            )
+
+
+#
+# functions shared by the two backends
+#
+def format_stats(data):
+    """
+    format the stats for an entry (a dict or a sqlite3.Row)
+    """
+    avg_time = (
+        round(data["total_time"] / data["count"], 2) if data["count"] > 0 else None
+    )
+    return {
+        "sql": data["sql"],
+        "total_count": data["count"],
+        "success_count": data["success"],
+        "failure_count": data["failures"],
+        "average_generation_time": str(avg_time),
+    }
+
+
+def _to_group_key(user_group_id):
+    """
+    the group in the sqlite key (NULL is not equal to NULL in the primary key)
+    """
+    return "" if user_group_id is None else str(user_group_id)
+
+
+def estimate_size(request_nl, sql_query):
+    """
+    approx. size in bytes of an entry
+    """
+    return (
+        sys.getsizeof(request_nl)
+        + sys.getsizeof(sql_query if sql_query is not None else "")
+        + ENTRY_OVERHEAD_BYTES
+    )
@@ -0,0 +1,195 @@
+"""
+File name: rerank_cache.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide a class to handle a cache of the results of the
+    LLM reranking (see Reranker), shared in the process
+
+    Repeated questions in a conversation often retrieve the same candidates:
+    the result of the rerank is reused. The key is:
+        (normalized question, fingerprint of the ordered candidates,
+         model, prompt version)
+    the fingerprint is a hash of the content of the candidates, so if the
+    rows in the vector store change the key changes too.
+    LRU eviction on number of entries, plus a TTL. For the tables, the cache
+    is cleared when the version of the schema changes.
+
+Inspired by:
+
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        rerank_cache = get_rerank_cache("tables")
+        key = rerank_cache.make_key(question, candidates, model_id, prompt)
+        result = rerank_cache.get(key, schema_version)
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from config import RERANK_CACHE_MAX_ENTRIES, RERANK_CACHE_TTL
+
+# the caches created, by name ("tables", "docs")
+_caches = {}
+_lock = threading.Lock()
+
+
+def get_rerank_cache(name):
+    """
+    return the (shared) rerank cache with the name
+    """
+    with _lock:
+        cache = _caches.get(name)
+
+        if cache is None:
+            cache = RerankCache()
+            _caches[name] = cache
+
+    return cache
+
+
+def get_rerank_caches_info():
+    """
+    return the info for all the rerank caches, by name
+    """
+    with _lock:
+        caches = dict(_caches)
+
+    return {name: cache.get_cache_info() for name, cache in caches.items()}
+
+
+class RerankCache:
+    """
+    In memory LRU cache, with TTL, for the results of the rerank
+
+    # Dato: {key: (result, expires_at)}
+    """
+
+    def __init__(self, max_entries=RERANK_CACHE_MAX_ENTRIES, ttl=RERANK_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        # ordered from least to most recently used
+        self.cache = OrderedDict()
+        # version of the schema when the entries have been added
+        self.schema_version = None
+
+        self.lock = threading.Lock()
+
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def make_key(question, candidates, model_id, prompt, *params):
+        """
+        question: the user request
+        candidates: list of texts (ordered) given to the reranker
+        prompt: the template, its hash is the version of the prompt
+        params: other parameters of the rerank (ex: top_n)
+        """
+        fingerprint = hashlib.sha256()
+        for candidate in candidates:
+            fingerprint.update(candidate.encode("utf-8"))
+            # separator: different splits give different fingerprints
+            fingerprint.update(b"\x00")
+
+        prompt_version = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+        return (
+            " ".join(question.lower().split()),
+            fingerprint.hexdigest(),
+            model_id,
+            prompt_version,
+            params,
+        )
+
+    def get(self, key, schema_version=None):
+        """
+        return the result of the rerank, None if not found or expired
+        """
+        with self.lock:
+            self._check_schema_version(schema_version)
+
+            entry = self.cache.get(key)
+
+            if entry is not None and entry[1] is not None and entry[1] <= time.time():
+                del self.cache[key]
+                self.stats["evictions"] += 1
+                entry = None
+
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            self.cache.move_to_end(key)
+            self.stats["hits"] += 1
+
+            return entry[0]
+
+    def put(self, key, result, schema_version=None):
+        """
+        add the result of the rerank
+        """
+        with self.lock:
+            self._check_schema_version(schema_version)
+
+            expires_at = time.time() + self.ttl if self.ttl is not None else None
+            self.cache[key] = (result, expires_at)
+            self.cache.move_to_end(key)
+
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        """
+        remove all the entries
+        """
+        with self.lock:
+            self.cache.clear()
+            self.stats["invalidations"] += 1
+
+    def get_cache_info(self):
+        """
+        get info on the cache: size, ttl, hits and invalidations
+        """
+        with self.lock:
+            return {
+                "entries": len(self.cache),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "schema_version": self.schema_version,
+                **self.stats,
+            }
+
+    #
+    # Helper
+    #
+    def _check_schema_version(self, schema_version):
+        """
+        if the vector rows have changed the results can be different:
+        clear the cache (called with the lock held)
+        """
+        if schema_version is None or schema_version == self.schema_version:
+            return
+
+        if self.cache:
+            self.cache.clear()
+            self.stats["invalidations"] += 1
+
+        self.schema_version = schema_version
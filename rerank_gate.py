@@ -0,0 +1,213 @@
+"""
+File name: rerank_gate.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide a class to decide if the LLM rerank of the tables
+    (see Reranker:rerank_table_list) can be skipped
+
+    The rerank sends the DDL of all the TOP_K tables to the LLM and is often
+    the slowest step of a request. When the similarity scores already
+    separate clearly the relevant tables, the rerank is skipped and the
+    tables before the separation are used. Retrieval is confident if there
+    is a cut, within the first max_selected results, such that:
+        - all the tables before the cut have score >= min_score
+        - the lowest score before the cut exceeds the highest after it
+          by at least min_gap (no results after it also counts)
+    A result without a vector score (None: found only by BM25 in hybrid
+    retrieval) can't be judged on similarity: the rerank is never skipped.
+
+    A fraction (audit_rate) of the skips is audited: the rerank is done
+    anyway, its result is used and compared with the tables selected by
+    the gate. Skip rate and agreement are in the stats, to tune thresholds.
+
+Inspired by:
+
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        rerank_gate = RerankGate(logger)
+        n_selected = rerank_gate.select(scores)
+        if n_selected is not None and not rerank_gate.should_audit(): ...
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+    Thresholds are on cosine similarity (see DISTANCE_STRATEGY).
+"""
+
+import random
+import threading
+
+from config import (
+    TOP_N,
+    RERANK_GATE_MIN_SCORE,
+    RERANK_GATE_MIN_GAP,
+    RERANK_GATE_MAX_SELECTED,
+    RERANK_GATE_AUDIT_RATE,
+)
+
+
+class RerankGate:
+    """
+    Confidence gate on the scores of the similarity search
+    """
+
+    def __init__(
+        self,
+        logger,
+        min_score=RERANK_GATE_MIN_SCORE,
+        min_gap=RERANK_GATE_MIN_GAP,
+        max_selected=RERANK_GATE_MAX_SELECTED,
+        audit_rate=RERANK_GATE_AUDIT_RATE,
+    ):
+        self.logger = logger
+        self.min_score = min_score
+        self.min_gap = min_gap
+        # the tables selected are never more than what the reranker returns
+        self.max_selected = min(max_selected, TOP_N)
+        self.audit_rate = audit_rate
+
+        self.lock = threading.Lock()
+
+        self.stats = {
+            "evaluated": 0,
+            "skipped": 0,
+            # why the rerank has not been skipped
+            "no_results": 0,
+            "lexical_only": 0,
+            "low_score": 0,
+            "small_gap": 0,
+            "audited": 0,
+            "audit_agreements": 0,
+            # sum of the Jaccard similarity between gate and rerank selections
+            "audit_overlap": 0.0,
+        }
+
+    def select(self, scores):
+        """
+        scores: the scores of the results, in the order of retrieval
+            (None for results without a vector score)
+
+        return the number of results to keep if retrieval is confident,
+        None if the rerank is needed
+        """
+        n_selected, reason = self._find_cut(scores)
+
+        with self.lock:
+            self.stats["evaluated"] += 1
+            if n_selected is None:
+                self.stats[reason] += 1
+
+        return n_selected
+
+    def should_audit(self):
+        """
+        True if a confident result must be checked with the rerank
+        """
+        audit = random.random() < self.audit_rate
+
+        with self.lock:
+            if audit:
+                self.stats["audited"] += 1
+            else:
+                self.stats["skipped"] += 1
+
+        return audit
+
+    def record_audit(self, selected_tables, reranked_tables):
+        """
+        compare the tables selected by the gate with the result of the rerank
+        """
+        selected = {table_name.upper() for table_name in selected_tables}
+        reranked = {table_name.upper() for table_name in reranked_tables}
+        union = selected | reranked
+        overlap = len(selected & reranked) / len(union) if union else 1.0
+
+        with self.lock:
+            if selected == reranked:
+                self.stats["audit_agreements"] += 1
+            self.stats["audit_overlap"] += overlap
+
+        if selected != reranked:
+            self.logger.info(
+                "Rerank gate audit, selected: %s, reranked: %s",
+                sorted(selected),
+                sorted(reranked),
+            )
+
+    def get_gate_info(self):
+        """
+        get info on the gate: thresholds, skip rate and audit results
+        """
+        with self.lock:
+            stats = dict(self.stats)
+
+        confident = stats["skipped"] + stats["audited"]
+
+        return {
+            "min_score": self.min_score,
+            "min_gap": self.min_gap,
+            "max_selected": self.max_selected,
+            "audit_rate": self.audit_rate,
+            "skip_rate": (
+                round(stats["skipped"] / stats["evaluated"], 3)
+                if stats["evaluated"]
+                else None
+            ),
+            "audit_agreement_rate": (
+                round(stats["audit_agreements"] / stats["audited"], 3)
+                if stats["audited"]
+                else None
+            ),
+            "audit_avg_overlap": (
+                round(stats["audit_overlap"] / stats["audited"], 3)
+                if stats["audited"]
+                else None
+            ),
+            "confident": confident,
+            **stats,
+        }
+
+    #
+    # Helper
+    #
+    def _find_cut(self, scores):
+        """
+        return (n_selected, "confident") or (None, reason)
+        """
+        if not scores:
+            return None, "no_results"
+        if any(score is None for score in scores):
+            return None, "lexical_only"
+
+        best_n = None
+        best_gap = float("-inf")
+
+        for n in range(1, min(self.max_selected, len(scores)) + 1):
+            head_min = min(scores[:n])
+            if head_min < self.min_score:
+                # longer heads have the same or a lower min
+                break
+
+            tail = scores[n:]
+            gap = head_min - max(tail) if tail else float("inf")
+
+            if gap > best_gap:
+                best_n, best_gap = n, gap
+
+        if best_n is None:
+            return None, "low_score"
+        if best_gap < self.min_gap:
+            return None, "small_gap"
+
+        return best_n, "confident"
@@ -0,0 +1,275 @@
+"""
+File name: result_cache.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide a class to handle a cache of the rows returned
+    by the SQL queries executed against the Data Schema.
+
+    The key is (normalized SQL, user_group_id), entries have a TTL and
+    the cache is bounded (entries, bytes). For every entry we keep the
+    tables used in the query, so that the refresh of a table invalidates
+    only the queries that depend on it.
+
+    The cache is in process: with many API workers an invalidation
+    reaches only the worker that receives it, the TTL bounds how long
+    the others can return stale rows.
+
+Inspired by:
+
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        result_cache = ResultCache()
+        rows = result_cache.get(sql_query, user_group_id)
+        result_cache.invalidate_table("F_ABSENCE")
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+"""
+
+import re
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+from config import (
+    RESULT_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_MAX_BYTES,
+    RESULT_CACHE_MAX_ROWS,
+    RESULT_CACHE_TTL,
+)
+
+# SQL string literals and quoted identifiers (not to be normalized)
+QUOTED_PATTERN = re.compile(r"'(?:[^']|'')*'|\"[^\"]*\"")
+SQL_STRING_PATTERN = re.compile(r"'(?:[^']|'')*'")
+
+# the FROM clause, until the next clause, a subquery or the end of a subquery
+FROM_CLAUSE_PATTERN = re.compile(
+    r"\bFROM\s+(.*?)(?=\bWHERE\b|\bGROUP\b|\bORDER\b|\bHAVING\b|\bFETCH\b"
+    r"|\bCONNECT\b|\bSTART\b|\bUNION\b|\bINTERSECT\b|\bMINUS\b|\bJOIN\b"
+    r"|\bLEFT\b|\bRIGHT\b|\bINNER\b|\bFULL\b|\bCROSS\b|\bNATURAL\b|\(|\)|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+JOIN_PATTERN = re.compile(r"\bJOIN\s+([\w$#.\"]+)", re.IGNORECASE)
+# FROM inside a function call, ex: EXTRACT(YEAR FROM hire_date), TRIM(' ' FROM name)
+FUNCTION_FROM_PATTERN = re.compile(
+    r"\b(EXTRACT|TRIM)(\s*\([^()]*?)\bFROM\b", re.IGNORECASE
+)
+
+# approx. overhead for every row and value
+ROW_OVERHEAD_BYTES = 100
+
+
+def normalize_sql(sql_query):
+    """
+    normalize the SQL: blanks, case (outside literals) and final ;
+    """
+    parts = []
+    last_end = 0
+    for match in QUOTED_PATTERN.finditer(sql_query):
+        parts.append(" ".join(sql_query[last_end : match.start()].upper().split()))
+        parts.append(match.group())
+        last_end = match.end()
+    parts.append(" ".join(sql_query[last_end:].upper().split()))
+
+    return " ".join(part for part in parts if part).rstrip("; ")
+
+
+def extract_tables(sql_query):
+    """
+    return the set of the names of tables (upper case, without schema)
+    referenced in the SQL query (FROM and JOIN clauses)
+    """
+    names = []
+
+    # text in literals can contain FROM or JOIN
+    sql_query = SQL_STRING_PATTERN.sub("''", sql_query)
+    # the FROM of EXTRACT and TRIM is not a FROM clause
+    sql_query = FUNCTION_FROM_PATTERN.sub(r"\1\2", sql_query)
+
+    for match in FROM_CLAUSE_PATTERN.finditer(sql_query):
+        for item in match.group(1).split(","):
+            tokens = item.split()
+            # subqueries are matched by the pattern itself
+            if tokens:
+                names.append(tokens[0])
+
+    names.extend(match.group(1) for match in JOIN_PATTERN.finditer(sql_query))
+
+    return {name.split(".")[-1].strip('"').upper() for name in names}
+
+
+class ResultCache:
+    """
+    In memory cache for the results of SQL queries
+
+    bounded: LRU eviction on number of entries and on approx. size
+    """
+
+    def __init__(
+        self,
+        max_entries=RESULT_CACHE_MAX_ENTRIES,
+        max_bytes=RESULT_CACHE_MAX_BYTES,
+        max_rows=RESULT_CACHE_MAX_ROWS,
+        ttl=RESULT_CACHE_TTL,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.ttl = ttl
+
+        # key: (normalized sql, user_group_id)
+        self.cache = OrderedDict()
+        # key: table name, value: set of keys of cache entries
+        self.tables_index = {}
+
+        self.total_bytes = 0
+        self.lock = threading.RLock()
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "not_cached_too_large": 0,
+            "evictions": 0,
+            "expired": 0,
+            "invalidated": 0,
+        }
+
+    def get(self, sql_query, user_group_id=None):
+        """
+        return the cached rows, None if not found
+        """
+        key = (normalize_sql(sql_query), user_group_id)
+
+        with self.lock:
+            entry = self.cache.get(key)
+
+            if entry is not None and entry["expires_at"] <= time.time():
+                self._remove(key)
+                self.stats["expired"] += 1
+                entry = None
+
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            self.cache.move_to_end(key)
+            self.stats["hits"] += 1
+
+            return entry["rows"]
+
+    def put(self, sql_query, rows, user_group_id=None):
+        """
+        add the rows returned by the query to the cache
+        """
+        if len(rows) > self.max_rows:
+            with self.lock:
+                self.stats["not_cached_too_large"] += 1
+            return
+
+        key = (normalize_sql(sql_query), user_group_id)
+        entry = {
+            "rows": rows,
+            "tables": extract_tables(key[0]),
+            "expires_at": time.time() + self.ttl,
+            "size": self._estimate_size(key[0], rows),
+        }
+
+        with self.lock:
+            if key in self.cache:
+                self._remove(key)
+
+            self.cache[key] = entry
+            self.total_bytes += entry["size"]
+            for table_name in entry["tables"]:
+                self.tables_index.setdefault(table_name, set()).add(key)
+
+            self._evict()
+
+    def invalidate_table(self, table_name):
+        """
+        remove all the entries for queries using the table
+
+        return the number of entries removed
+        """
+        with self.lock:
+            keys = self.tables_index.get(table_name.upper(), set()).copy()
+
+            for key in keys:
+                self._remove(key)
+
+            self.stats["invalidated"] += len(keys)
+
+        return len(keys)
+
+    def clear(self):
+        """
+        remove all the entries
+        """
+        with self.lock:
+            self.stats["invalidated"] += len(self.cache)
+            self.cache.clear()
+            self.tables_index.clear()
+            self.total_bytes = 0
+
+    def get_cache_info(self):
+        """
+        get info on the cache: size, limits, hits and evictions
+        """
+        with self.lock:
+            return {
+                "entries": len(self.cache),
+                "max_entries": self.max_entries,
+                "approx_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "max_rows": self.max_rows,
+                "ttl": self.ttl,
+                **self.stats,
+            }
+
+    #
+    # Helper
+    #
+    def _remove(self, key):
+        entry = self.cache.pop(key)
+        self.total_bytes -= entry["size"]
+
+        for table_name in entry["tables"]:
+            keys = self.tables_index.get(table_name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tables_index[table_name]
+
+    def _evict(self):
+        """
+        remove least recently used entries until we're within limits
+        """
+        while len(self.cache) > 1 and (
+            len(self.cache) > self.max_entries or self.total_bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self.cache)))
+            self.stats["evictions"] += 1
+
+    def _estimate_size(self, sql_query, rows):
+        """
+        approx. size in bytes of an entry
+        """
+        size = sys.getsizeof(sql_query)
+        for row in rows:
+            size += ROW_OVERHEAD_BYTES
+            for value in row.values():
+                size += sys.getsizeof(value)
+        return size
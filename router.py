@@ -31,6 +31,7 @@ Warnings:
 from langchain_core.prompts import PromptTemplate
 from llm_manager import LLMManager
 from prompt_routing import PROMPT_ROUTING
+from single_flight import SingleFlight
 from utils import get_console_logger
 
 from config import INDEX_MODEL_FOR_ROUTING, DEBUG
@@ -68,6 +69,8 @@ class Router:
         """
         self.llm_manager = llm_manager
         self.logger = get_console_logger()
+        # concurrent identical requests share a single LLM call
+        self.single_flight = SingleFlight()
 
     def classify(self, user_request: str) -> str:
         """
@@ -76,6 +79,12 @@ class Router:
             analyze_text
             ...
         """
+        return self.single_flight.do(user_request, self._classify, user_request)
+
+    def _classify(self, user_request: str) -> str:
+        """
+        classify using the LLM
+        """
         # define the prompt to be used with few shot examples
         classify_prompt = PromptTemplate.from_template(PROMPT_ROUTING)
         # get llm to be used
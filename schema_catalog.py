@@ -0,0 +1,204 @@
+"""
+File name: schema_catalog.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide the structured, in memory, catalog of the Data Schema
+    read by the SchemaManager.
+
+    Every table is a record (with __slots__) with DDL, columns, comments,
+    sample records, foreign keys and stats; the catalog is keyed by table name.
+    Extraction, filtering, summarization and preparation of documents
+    work on the catalog (O(1) lookup by name), without building and
+    re-splitting a single big string.
+
+Inspired by:
+
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        catalog = SchemaCatalog()
+        catalog.add(TableInfo("D_LOCATION", ddl))
+        chunk = catalog["D_LOCATION"].get_chunk()
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+"""
+
+
+class ColumnInfo:
+    """
+    A column of a table
+    """
+
+    __slots__ = ("name", "data_type", "data_length", "nullable", "comments")
+
+    def __init__(
+        self, name, data_type=None, data_length=None, nullable=True, comments=None
+    ):
+        self.name = name
+        self.data_type = data_type
+        self.data_length = data_length
+        self.nullable = nullable
+        self.comments = comments
+
+
+class ForeignKeyInfo:
+    """
+    A foreign key: columns of the table referencing columns of ref_table
+    """
+
+    __slots__ = ("name", "columns", "ref_table", "ref_columns")
+
+    def __init__(self, name, columns, ref_table, ref_columns):
+        self.name = name
+        self.columns = columns
+        self.ref_table = ref_table
+        self.ref_columns = ref_columns
+
+
+class TableInfo:
+    """
+    All the info read from the DB for a table
+
+    ddl: the DDL, already cleaned (see SchemaManager:_clean_ddl)
+    columns: list of ColumnInfo (comments are here)
+    sample_columns, sample_rows: the first records (sample_rows is None
+        if the records couldn't be read)
+    foreign_keys: list of ForeignKeyInfo
+    stats: dict (num_rows, last_analyzed...)
+    """
+
+    __slots__ = (
+        "name",
+        "ddl",
+        "columns",
+        "n_samples",
+        "sample_columns",
+        "sample_rows",
+        "foreign_keys",
+        "stats",
+        "_chunk",
+    )
+
+    def __init__(self, name, ddl, columns=None, n_samples=0):
+        self.name = name
+        self.ddl = ddl
+        self.columns = columns if columns is not None else []
+        self.n_samples = n_samples
+        self.sample_columns = []
+        self.sample_rows = None
+        self.foreign_keys = []
+        self.stats = {}
+        # the chunk is built once, when needed
+        self._chunk = None
+
+    def get_comments_text(self):
+        """
+        the comments on columns, as in the chunk
+        """
+        lines = [
+            f"Column {column.name}: {column.comments}\n"
+            for column in self.columns
+            if column.comments
+        ]
+        return "".join(lines)
+
+    def get_chunk(self):
+        """
+        the portion of schema for the table, used in prompts:
+        DDL, comments on columns and sample records
+        """
+        if self._chunk is None:
+            parts = [_remove_compress_lines(self.ddl).strip(), "\n\n"]
+
+            if self.columns:
+                parts.append("--- Column Comments ---\n")
+                parts.append(self.get_comments_text())
+                parts.append("\n")
+
+            if self.sample_rows is not None:
+                parts.append(
+                    f"--- First {self.n_samples} records from {self.name} ---\n"
+                )
+                if self.sample_rows:
+                    parts.append(" | ".join(self.sample_columns) + "\n")
+                    parts.extend(str(record) + "\n" for record in self.sample_rows)
+                else:
+                    parts.append(f"No records found in {self.name}\n")
+
+            self._chunk = "".join(parts)
+
+        return self._chunk
+
+
+class SchemaCatalog:
+    """
+    The tables of the schema, keyed by table name (UPPERCASE)
+
+    iteration follows the order in which tables are added
+    """
+
+    def __init__(self, tables=None):
+        self.tables = {}
+
+        for table in tables or []:
+            self.add(table)
+
+    def add(self, table):
+        """
+        add (or replace) a table
+        """
+        self.tables[table.name.upper()] = table
+
+    def get(self, table_name, default=None):
+        """
+        return the TableInfo, default if not found
+        """
+        return self.tables.get(table_name.upper(), default)
+
+    def filter(self, predicate):
+        """
+        return a new catalog with the tables whose name satisfies predicate
+        """
+        return SchemaCatalog(
+            table for name, table in self.tables.items() if predicate(name)
+        )
+
+    def get_table_names(self):
+        """
+        the list of the names of the tables
+        """
+        return list(self.tables)
+
+    def __getitem__(self, table_name):
+        return self.tables[table_name.upper()]
+
+    def __contains__(self, table_name):
+        return table_name.upper() in self.tables
+
+    def __iter__(self):
+        return iter(self.tables.values())
+
+    def __len__(self):
+        return len(self.tables)
+
+
+#
+# Helper
+#
+def _remove_compress_lines(ddl):
+    """
+    remove the lines containing COMPRESS FOR... to reduce prompt length
+    """
+    return "\n".join(line for line in ddl.splitlines() if "COMPRESS" not in line)
@@ -10,27 +10,70 @@ number of tables is limited to TOP_N (see config)
 this is an abstract class
 """
 
-import re
 import json
+import time
+import hashlib
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 import oracledb
 from langchain_core.prompts import PromptTemplate
 from langchain.docstore.document import Document
 
 from ai_reranker import Reranker
+from db_pools import get_connection, register_session_tag, DATA_POOL
+from schema_catalog import SchemaCatalog, TableInfo, ColumnInfo, ForeignKeyInfo
+from summary_cache import SummaryCache
 from prompt_template import PROMPT_TABLE_SUMMARY
 from config import (
-    CONNECT_ARGS,
     DEBUG,
     TOP_N,
     N_SAMPLES,
     INDEX_MODEL_FOR_SUMMARY,
+    SCHEMA_EXTRACTION_MODE,
+    SCHEMA_FETCH_ARRAYSIZE,
+    SCHEMA_EXTRACTION_PARALLELISM,
+    SUMMARY_CONCURRENCY,
+    SUMMARY_MAX_ATTEMPTS,
+    SUMMARY_RETRY_BACKOFF,
+    ENABLE_SUMMARY_CACHE,
 )
 from config_private import DB_USER
 
 SAMPLES_FILE = "sample_queries.json"
 
+# to simplify DDL generation removing info not needed
+METADATA_SESSION_TRANSFORM = """
+    BEGIN
+        DBMS_METADATA.SET_TRANSFORM_PARAM(DBMS_METADATA.SESSION_TRANSFORM, 
+        'STORAGE', FALSE);
+        DBMS_METADATA.SET_TRANSFORM_PARAM(DBMS_METADATA.SESSION_TRANSFORM, 
+        'TABLESPACE', FALSE);
+        DBMS_METADATA.SET_TRANSFORM_PARAM(DBMS_METADATA.SESSION_TRANSFORM, 
+        'SEGMENT_ATTRIBUTES', FALSE);
+        DBMS_METADATA.SET_TRANSFORM_PARAM(DBMS_METADATA.SESSION_TRANSFORM, 
+        'CONSTRAINTS_AS_ALTER', TRUE);
+    END;
+"""
+
+# tag of the sessions initialised with METADATA_SESSION_TRANSFORM
+METADATA_SESSION_TAG = "METADATA"
+
+# collection type used to bind a list of table names (IN filter)
+NAMES_COLLECTION_TYPE = "SYS.ODCIVARCHAR2LIST"
+# max number of elements of NAMES_COLLECTION_TYPE (VARRAY)
+MAX_NAMES_COLLECTION = 32767
+# max length of the NAME_EXPR filter of DBMS_METADATA (VARCHAR2 in PL/SQL),
+# for longer lists all the DDL are read and filtered by the client
+MAX_NAME_EXPR_LENGTH = 32000
+
+
+def compute_hash(text):
+    """
+    sha256 of a string
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
 
 class SchemaManager(ABC):
     """
@@ -57,9 +100,17 @@ class SchemaManager(ABC):
 
         # for _process schema
         self.tables_list = []
-        # in this list we store the chunk of schema for each table
-        self.tables_chunk = []
+        # the catalog of the tables (with the chunk of schema for each table)
+        self.catalog = SchemaCatalog()
         self.summaries = []
+        # fingerprint of each table, stored in metadata (see _compute_fingerprint)
+        self.fingerprints = {}
+
+        # sessions used by the workers reading the schema (parallel mode)
+        register_session_tag(METADATA_SESSION_TAG, self._init_metadata_session)
+
+        # summaries already generated, saved on disk
+        self.summary_cache = SummaryCache(logger) if ENABLE_SUMMARY_CACHE else None
 
     @abstractmethod
     def init_schema_manager(self):
@@ -77,60 +128,57 @@ class SchemaManager(ABC):
         to be implemented
         """
 
-    def _get_raw_schema(self, schema_owner=DB_USER, n_samples=N_SAMPLES):
+    def _get_raw_schema(
+        self, schema_owner=DB_USER, n_samples=N_SAMPLES, selected_tables=None
+    ):
         """
         This is the new code (no LangChain for schema)
         Connect to data DB and get raw DB schema
 
         This function reads metadata and sample data for each table
+        and returns a SchemaCatalog (see schema_catalog.py)
+
+        The way metadata are read depends on SCHEMA_EXTRACTION_MODE:
+            - per_table: a query for DDL, comments, samples for each table
+            - bulk: DDL, comments and columns for all the tables in
+              a fixed number of set-based queries (better for big schemas)
+            - parallel: per_table queries, executed for many tables
+              concurrently with a connection pool
+
+        selected_tables: if provided, read only these tables
+        """
+        if SCHEMA_EXTRACTION_MODE == "bulk":
+            return self._get_raw_schema_bulk(schema_owner, n_samples, selected_tables)
+        if SCHEMA_EXTRACTION_MODE == "parallel":
+            return self._get_raw_schema_parallel(
+                schema_owner, n_samples, selected_tables
+            )
+
+        return self._get_raw_schema_per_table(schema_owner, n_samples, selected_tables)
+
+    def _get_raw_schema_per_table(
+        self, schema_owner=DB_USER, n_samples=N_SAMPLES, selected_tables=None
+    ):
         """
-        conn = oracledb.connect(**CONNECT_ARGS)
+        Read DDL, comments and sample data with (at least) 3 queries for each table
+        """
+        conn = get_connection(DATA_POOL)
 
-        # the dict that will contain the raw schema
-        output_dict = {"table_info": "", "table_names": ""}
+        # the catalog with the info for each table
+        catalog = SchemaCatalog()
 
         try:
             # Create a cursor object
             cursor = conn.cursor()
 
             # to simplify DDL generation removing info not needed
-            cursor.execute(
-                """
-                BEGIN
-                    DBMS_METADATA.SET_TRANSFORM_PARAM(DBMS_METADATA.SESSION_TRANSFORM, 
-                    'STORAGE', FALSE);
-                    DBMS_METADATA.SET_TRANSFORM_PARAM(DBMS_METADATA.SESSION_TRANSFORM, 
-                    'TABLESPACE', FALSE);
-                    DBMS_METADATA.SET_TRANSFORM_PARAM(DBMS_METADATA.SESSION_TRANSFORM, 
-                    'SEGMENT_ATTRIBUTES', FALSE);
-                    DBMS_METADATA.SET_TRANSFORM_PARAM(DBMS_METADATA.SESSION_TRANSFORM, 
-                    'CONSTRAINTS_AS_ALTER', TRUE);
-                END;
-            """
-            )
+            cursor.execute(METADATA_SESSION_TRANSFORM)
 
             # Query to get the table names sorted alphabetically
-            query = """
-                SELECT table_name
-                FROM all_tables
-                WHERE owner = :schema_owner
-                ORDER BY table_name
-            """
-
-            # Execute the query
-            cursor.execute(query, schema_owner=schema_owner)
-
-            # Fetch all table names
-            tables = cursor.fetchall()
-
-            # to memorize all the tables
-            table_names = []
+            table_names = self._read_table_names(cursor, schema_owner, selected_tables)
 
             # Iterate through each table and get its CREATE TABLE statement
-            for table in tqdm(tables):
-                table_name = table[0]
-                table_names.append(table_name)
-
+            for table_name in tqdm(table_names):
                 # Use DBMS_METADATA to generate the CREATE TABLE statement
                 cursor.execute(
                     f"""
@@ -142,20 +190,8 @@ class SchemaManager(ABC):
                 # Fetch the DDL
                 ddl_lob = cursor.fetchone()[0]
 
-                # Remove the collate clauses
                 # Convert LOB to string
                 ddl = ddl_lob.read() if isinstance(ddl_lob, oracledb.LOB) else ddl_lob
-                ddl_cleaned = ddl.replace('COLLATE "USING_NLS_COMP"', "")
-                ddl_cleaned = ddl_cleaned.replace(
-                    'DEFAULT COLLATION "USING_NLS_COMP"', ""
-                )
-                # remove schema from ddl
-                ddl_cleaned = ddl_cleaned.replace(f'"{schema_owner}".', "")
-                # remove "
-                ddl_cleaned = ddl_cleaned.replace('"', "")
-
-                # Build output for table info
-                table_info = f"{ddl_cleaned}\n\n"
 
                 # ADD COLUMN COMMENTS
                 cursor.execute(
@@ -167,60 +203,29 @@ class SchemaManager(ABC):
                     schema_owner=schema_owner,
                     table_name=table_name,
                 )
-                column_comments = cursor.fetchall()
+                columns = [
+                    ColumnInfo(column_name, comments=comments)
+                    for column_name, comments in cursor.fetchall()
+                ]
 
-                if column_comments:
-                    table_info += "--- Column Comments ---\n"
-                    for column_name, comment in column_comments:
-                        if comment:
-                            table_info += f"Column {column_name}: {comment}\n"
-                    table_info += "\n"
-
-                if DEBUG:
-                    self.logger.info(table_info)
-
-                # add output to dict
-                output_dict["table_info"] += table_info
-
-                # Query to get the first 3 records from the table
-                try:
-                    cursor.execute(
-                        f"""SELECT * FROM {schema_owner}.{table_name} 
-                        FETCH FIRST {n_samples} ROWS ONLY"""
-                    )
-                    records = cursor.fetchall()
-
-                    # Get the column names for better formatting
-                    columns = [col[0] for col in cursor.description]
-
-                    # output for records
-                    records_info = (
-                        f"--- First {n_samples} records from {table_name} ---\n"
-                    )
-                    if records:
-                        # add columns headers
-                        records_info += " | ".join(columns) + "\n"
-
-                        # add records
-                        for record in records:
-                            records_info += str(record) + "\n"
-                    else:
-                        records_info += f"No records found in {table_name}\n"
+                table = TableInfo(
+                    table_name, self._clean_ddl(ddl, schema_owner), columns, n_samples
+                )
 
-                    if DEBUG:
-                        self.logger.info(records_info)
+                # Query to get the first records from the table
+                self._read_sample_records(cursor, schema_owner, table)
 
-                    # add output to dict
-                    output_dict["table_info"] += records_info + "\n"
+                if DEBUG:
+                    self.logger.info(table.get_chunk())
 
-                except Exception as e:
-                    error_message = f"Error retrieving records from {table_name}: {e}\n"
-                    self.logger.error(error_message)
-                    # add nothings
-                    output_dict["table_info"] += "\n"
+                catalog.add(table)
 
-            # add table names comma separated
-            output_dict["table_names"] = ", ".join(table_names)
+            self._read_catalog_details(
+                cursor,
+                schema_owner,
+                catalog,
+                self._filter_names(table_names, selected_tables),
+            )
 
         except Exception as e:
             self.logger.error("Error: %s", e)
@@ -232,67 +237,581 @@ class SchemaManager(ABC):
             if conn:
                 conn.close()
 
-        return output_dict
+        # (also partial, in case of errors)
+        return catalog
+
+    def _get_raw_schema_bulk(
+        self, schema_owner=DB_USER, n_samples=N_SAMPLES, selected_tables=None
+    ):
+        """
+        Read DDL, comments and columns metadata for all the tables with
+        a fixed number of set-based queries:
+            - table names (ALL_TABLES)
+            - DDL for all tables (DBMS_METADATA OPEN/FETCH, a single ref cursor)
+            - columns and comments (ALL_TAB_COLUMNS + ALL_COL_COMMENTS)
+        Only the sample records are still read with a query for each table.
+
+        LOBs are fetched as strings and with a large arraysize,
+        to reduce round trips. Sample records are read with a plain cursor,
+        as in per_table mode: LOB values (and so chunks and fingerprints)
+        are the same in all the modes
+        """
+        conn = get_connection(DATA_POOL)
+
+        catalog = SchemaCatalog()
+
+        try:
+            cursor = self._get_bulk_cursor(conn)
+            sample_cursor = conn.cursor()
+
+            table_names = self._read_table_names(cursor, schema_owner, selected_tables)
+
+            # with selected tables the queries read only these tables
+            filter_names = self._filter_names(table_names, selected_tables)
+
+            self.logger.info("Reading DDL for %s tables...", len(table_names))
+            ddl_dict = self._read_all_ddl(conn, cursor, schema_owner, filter_names)
+
+            self.logger.info("Reading columns and comments...")
+            columns_dict = self._read_all_columns(cursor, schema_owner, filter_names)
+
+            for table_name in tqdm(table_names):
+                if table_name not in ddl_dict:
+                    self.logger.error("DDL not found for table %s", table_name)
+                    continue
+
+                table = TableInfo(
+                    table_name,
+                    self._clean_ddl(ddl_dict[table_name], schema_owner),
+                    columns_dict.get(table_name, []),
+                    n_samples,
+                )
+                self._read_sample_records(sample_cursor, schema_owner, table)
+
+                if DEBUG:
+                    self.logger.info(table.get_chunk())
+
+                catalog.add(table)
+
+            sample_cursor.close()
+
+            self._read_catalog_details(cursor, schema_owner, catalog, filter_names)
+
+        except Exception as e:
+            self.logger.error("Error in SchemaManager:_get_raw_schema_bulk: %s", e)
+
+        finally:
+            self._close_connection(conn)
+
+        return catalog
+
+    def _get_raw_schema_parallel(
+        self, schema_owner=DB_USER, n_samples=N_SAMPLES, selected_tables=None
+    ):
+        """
+        Read DDL, comments and sample data for many tables concurrently
+
+        Uses the shared pool of the Data Schema (see db_pools.py) and a pool of
+        SCHEMA_EXTRACTION_PARALLELISM workers (limited by DB_POOL_MAX sessions);
+        every worker reads all the info for one table.
+        The output is ordered by table name, as in the other modes
+        """
+        catalog = SchemaCatalog()
+
+        try:
+            with get_connection(DATA_POOL) as conn:
+                cursor = conn.cursor()
+                table_names = self._read_table_names(
+                    cursor, schema_owner, selected_tables
+                )
+                cursor.close()
+
+            self.logger.info(
+                "Reading %s tables with %s workers...",
+                len(table_names),
+                SCHEMA_EXTRACTION_PARALLELISM,
+            )
+
+            with ThreadPoolExecutor(
+                max_workers=SCHEMA_EXTRACTION_PARALLELISM
+            ) as executor:
+                # map returns results in the order of table_names
+                results = executor.map(
+                    lambda t_name: self._read_table_info(
+                        schema_owner, t_name, n_samples
+                    ),
+                    table_names,
+                )
+                for table in tqdm(results, total=len(table_names)):
+                    catalog.add(table)
+
+            with get_connection(DATA_POOL) as conn:
+                cursor = self._get_bulk_cursor(conn)
+                self._read_catalog_details(
+                    cursor,
+                    schema_owner,
+                    catalog,
+                    self._filter_names(table_names, selected_tables),
+                )
+                cursor.close()
+
+        except Exception as e:
+            self.logger.error("Error in SchemaManager:_get_raw_schema_parallel: %s", e)
+
+        return catalog
+
+    def _read_table_info(self, schema_owner, table_name, n_samples):
+        """
+        read DDL, comments and sample records for a table
+        (executed by a worker, with a connection from the pool)
+        """
+        # the session is initialised for DBMS_METADATA (see _init_metadata_session)
+        with get_connection(DATA_POOL, tag=METADATA_SESSION_TAG) as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(
+                """
+                SELECT DBMS_METADATA.GET_DDL('TABLE', :table_name, :schema_owner)
+                FROM dual
+                """,
+                table_name=table_name,
+                schema_owner=schema_owner,
+            )
+            ddl_lob = cursor.fetchone()[0]
+            ddl = ddl_lob.read() if isinstance(ddl_lob, oracledb.LOB) else ddl_lob
+
+            cursor.execute(
+                """
+                SELECT column_name, comments
+                FROM all_col_comments
+                WHERE owner = :schema_owner AND table_name = :table_name
+                """,
+                schema_owner=schema_owner,
+                table_name=table_name,
+            )
+            columns = [
+                ColumnInfo(column_name, comments=comments)
+                for column_name, comments in cursor.fetchall()
+            ]
+
+            table = TableInfo(
+                table_name, self._clean_ddl(ddl, schema_owner), columns, n_samples
+            )
+            self._read_sample_records(cursor, schema_owner, table)
+            cursor.close()
+
+        if DEBUG:
+            self.logger.info(table.get_chunk())
+
+        return table
+
+    def _init_metadata_session(self, conn):
+        """
+        init of a session of the pool (tag METADATA_SESSION_TAG):
+        to simplify DDL generation removing info not needed
+        """
+        cursor = conn.cursor()
+        cursor.execute(METADATA_SESSION_TRANSFORM)
+        cursor.close()
+
+    def _read_table_names(self, cursor, schema_owner, selected_tables=None):
+        """
+        return the list of the table names, sorted alphabetically
+
+        selected_tables: if provided, return only these tables
+        """
+        query = """
+            SELECT table_name
+            FROM all_tables
+            WHERE owner = :schema_owner
+            ORDER BY table_name
+        """
+        cursor.execute(query, schema_owner=schema_owner)
+
+        table_names = [row[0] for row in cursor.fetchall()]
+
+        if selected_tables is not None:
+            selected_tables = set(selected_tables)
+            table_names = [name for name in table_names if name in selected_tables]
+
+        return table_names
+
+    def _read_last_ddl_times(self, schema_owner=DB_USER):
+        """
+        return a dict {table_name: last_ddl_time (ISO format)}
+        for all the tables of the schema, with a single query
+        """
+        with get_connection(DATA_POOL) as conn:
+            cursor = conn.cursor()
+            cursor.arraysize = SCHEMA_FETCH_ARRAYSIZE
+
+            cursor.execute(
+                """
+                SELECT object_name, last_ddl_time
+                FROM all_objects
+                WHERE owner = :schema_owner AND object_type = 'TABLE'
+                """,
+                schema_owner=schema_owner,
+            )
+            last_ddl_times = {
+                table_name: last_ddl_time.isoformat()
+                for table_name, last_ddl_time in cursor
+            }
+            cursor.close()
+
+        return last_ddl_times
 
-    def _process_schema(self, tables, tables_dict):
+    def _read_all_ddl(self, conn, cursor, schema_owner, table_names=None):
+        """
+        return a dict {table_name: ddl} for all the tables of the schema
+        (only for table_names, if provided)
+
+        uses a DBMS_METADATA handle: all the DDL are fetched server side
+        and returned with a single ref cursor
+        """
+        if table_names is not None and len(table_names) == 0:
+            return {}
+
+        ref_cursor = self._get_bulk_cursor(conn)
+
+        name_expr = None
+        if table_names is not None:
+            name_expr = (
+                "IN ("
+                + ", ".join("'" + name.replace("'", "''") + "'" for name in table_names)
+                + ")"
+            )
+            if len(name_expr) > MAX_NAME_EXPR_LENGTH:
+                name_expr = None
+
+        cursor.execute(
+            """
+            DECLARE
+                h NUMBER;
+                th NUMBER;
+                l_ddls sys.ku$_ddls;
+                l_all sys.ku$_ddls := sys.ku$_ddls();
+            BEGIN
+                h := DBMS_METADATA.OPEN('TABLE');
+                DBMS_METADATA.SET_FILTER(h, 'SCHEMA', :schema_owner);
+                IF :name_expr IS NOT NULL THEN
+                    DBMS_METADATA.SET_FILTER(h, 'NAME_EXPR', :name_expr);
+                END IF;
+                DBMS_METADATA.SET_COUNT(h, :batch_size);
+                DBMS_METADATA.SET_PARSE_ITEM(h, 'NAME');
+
+                th := DBMS_METADATA.ADD_TRANSFORM(h, 'DDL');
+                DBMS_METADATA.SET_TRANSFORM_PARAM(th, 'STORAGE', FALSE);
+                DBMS_METADATA.SET_TRANSFORM_PARAM(th, 'TABLESPACE', FALSE);
+                DBMS_METADATA.SET_TRANSFORM_PARAM(th, 'SEGMENT_ATTRIBUTES', FALSE);
+                DBMS_METADATA.SET_TRANSFORM_PARAM(th, 'CONSTRAINTS_AS_ALTER', TRUE);
+
+                LOOP
+                    l_ddls := DBMS_METADATA.FETCH_DDL(h);
+                    EXIT WHEN l_ddls IS NULL;
+                    l_all := l_all MULTISET UNION ALL l_ddls;
+                END LOOP;
+
+                DBMS_METADATA.CLOSE(h);
+
+                OPEN :ddl_cursor FOR
+                    SELECT (SELECT p.value FROM TABLE(d.parsedItems) p
+                            WHERE p.item = 'NAME') AS table_name,
+                           d.ddlText
+                    FROM TABLE(l_all) d;
+            END;
+            """,
+            schema_owner=schema_owner,
+            name_expr=name_expr,
+            batch_size=SCHEMA_FETCH_ARRAYSIZE,
+            ddl_cursor=ref_cursor,
+        )
+
+        # with CONSTRAINTS_AS_ALTER we can have more statements for a table
+        ddl_dict = {}
+        for table_name, ddl_text in ref_cursor:
+            if table_name in ddl_dict:
+                ddl_dict[table_name] += "\n  " + ddl_text
+            else:
+                ddl_dict[table_name] = ddl_text
+
+        ref_cursor.close()
+
+        return ddl_dict
+
+    def _read_all_columns(self, cursor, schema_owner, table_names=None):
+        """
+        return a dict {table_name: [ColumnInfo]} for all the tables of the schema
+        (only for table_names, if provided)
+        """
+        names_filter, names_params = self._get_names_filter(
+            cursor, "c.table_name", table_names
+        )
+        cursor.execute(
+            f"""
+            SELECT c.table_name, c.column_name, c.data_type, c.data_length,
+                   c.nullable, cc.comments
+            FROM all_tab_columns c
+            LEFT JOIN all_col_comments cc
+              ON cc.owner = c.owner
+             AND cc.table_name = c.table_name
+             AND cc.column_name = c.column_name
+            WHERE c.owner = :schema_owner {names_filter}
+            ORDER BY c.table_name, c.column_id
+            """,
+            schema_owner=schema_owner,
+            **names_params,
+        )
+
+        columns_dict = {}
+        for table_name, column_name, data_type, length, nullable, comments in cursor:
+            columns_dict.setdefault(table_name, []).append(
+                ColumnInfo(column_name, data_type, length, nullable == "Y", comments)
+            )
+
+        return columns_dict
+
+    def _read_catalog_details(self, cursor, schema_owner, catalog, table_names=None):
+        """
+        add to the tables in the catalog foreign keys and stats,
+        for all the tables with two set-based queries
+        (only for table_names, if provided)
+        """
+        names_filter, names_params = self._get_names_filter(
+            cursor, "c.table_name", table_names
+        )
+        cursor.execute(
+            f"""
+            SELECT c.table_name, c.constraint_name, cc.column_name,
+                   r.table_name, rc.column_name
+            FROM all_constraints c
+            JOIN all_cons_columns cc
+              ON cc.owner = c.owner AND cc.constraint_name = c.constraint_name
+            JOIN all_constraints r
+              ON r.owner = c.r_owner AND r.constraint_name = c.r_constraint_name
+            JOIN all_cons_columns rc
+              ON rc.owner = r.owner AND rc.constraint_name = r.constraint_name
+             AND rc.position = cc.position
+            WHERE c.owner = :schema_owner AND c.constraint_type = 'R'
+            {names_filter}
+            ORDER BY c.table_name, c.constraint_name, cc.position
+            """,
+            schema_owner=schema_owner,
+            **names_params,
+        )
+
+        # key: (table_name, constraint_name)
+        foreign_keys = {}
+        for table_name, fk_name, column_name, ref_table, ref_column in cursor:
+            table = catalog.get(table_name)
+            if table is None:
+                continue
+
+            foreign_key = foreign_keys.get((table_name, fk_name))
+            if foreign_key is None:
+                foreign_key = ForeignKeyInfo(fk_name, [], ref_table, [])
+                foreign_keys[(table_name, fk_name)] = foreign_key
+                table.foreign_keys.append(foreign_key)
+
+            foreign_key.columns.append(column_name)
+            foreign_key.ref_columns.append(ref_column)
+
+        names_filter, names_params = self._get_names_filter(
+            cursor, "table_name", table_names
+        )
+        cursor.execute(
+            f"""
+            SELECT table_name, num_rows, last_analyzed
+            FROM all_tables
+            WHERE owner = :schema_owner {names_filter}
+            """,
+            schema_owner=schema_owner,
+            **names_params,
+        )
+        for table_name, num_rows, last_analyzed in cursor:
+            table = catalog.get(table_name)
+            if table is not None:
+                table.stats = {"num_rows": num_rows, "last_analyzed": last_analyzed}
+
+    def _read_sample_records(self, cursor, schema_owner, table):
+        """
+        read the first table.n_samples records of the table
+        """
+        try:
+            cursor.execute(
+                f"""SELECT * FROM {schema_owner}.{table.name} 
+                FETCH FIRST {table.n_samples} ROWS ONLY"""
+            )
+            table.sample_rows = cursor.fetchall()
+
+            # Get the column names for better formatting
+            table.sample_columns = [col[0] for col in cursor.description]
+
+        except Exception as e:
+            error_message = f"Error retrieving records from {table.name}: {e}\n"
+            self.logger.error(error_message)
+            # add nothings
+            table.sample_rows = None
+
+    def _filter_names(self, table_names, selected_tables):
+        """
+        the names to pass to the set-based queries: None (no filter)
+        when all the tables are read (or too many to be bound)
+        """
+        if selected_tables is None or len(table_names) > MAX_NAMES_COLLECTION:
+            return None
+
+        return table_names
+
+    def _get_names_filter(self, cursor, column, table_names):
+        """
+        return (condition, bind params) to restrict a query to table_names,
+        binding the names as a collection; ("", {}) if table_names is None
+        """
+        if table_names is None:
+            return "", {}
+
+        names_type = cursor.connection.gettype(NAMES_COLLECTION_TYPE)
+
+        return (
+            f"AND {column} IN (SELECT column_value FROM TABLE(:table_names))",
+            {"table_names": names_type.newobject(list(table_names))},
+        )
+
+    def _clean_ddl(self, ddl, schema_owner):
+        """
+        remove from the DDL the parts not needed in the prompt
+        """
+        # Remove the collate clauses
+        ddl_cleaned = ddl.replace('COLLATE "USING_NLS_COMP"', "")
+        ddl_cleaned = ddl_cleaned.replace('DEFAULT COLLATION "USING_NLS_COMP"', "")
+        # remove schema from ddl
+        ddl_cleaned = ddl_cleaned.replace(f'"{schema_owner}".', "")
+        # remove "
+        ddl_cleaned = ddl_cleaned.replace('"', "")
+
+        return ddl_cleaned
+
+    def _get_bulk_cursor(self, conn):
+        """
+        a cursor with large arraysize and prefetch, to reduce round trips
+
+        CLOB are fetched as strings (like fetch_lobs=False). The handler
+        is set on the cursor, not on the connection: connections are
+        returned to the pool
+        """
+        cursor = conn.cursor()
+        cursor.arraysize = SCHEMA_FETCH_ARRAYSIZE
+        cursor.prefetchrows = SCHEMA_FETCH_ARRAYSIZE
+        cursor.outputtypehandler = self._lob_as_string_handler
+
+        return cursor
+
+    def _lob_as_string_handler(self, cursor, metadata):
+        """
+        output type handler: fetch CLOB as str (no LOB round trips)
+        """
+        if metadata.type_code is oracledb.DB_TYPE_CLOB:
+            return cursor.var(oracledb.DB_TYPE_LONG, arraysize=cursor.arraysize)
+        if metadata.type_code is oracledb.DB_TYPE_BLOB:
+            return cursor.var(oracledb.DB_TYPE_LONG_RAW, arraysize=cursor.arraysize)
+        return None
+
+    def _process_schema(self, catalog, tables_dict):
         """
         populate:
         * self.tables_list
-        * self.tables_chunk
+        * self.catalog
         * self.summaries
         """
         try:
             self.tables_list = []
-            # in this list we store the chunk of schema for each table
-            self.tables_chunk = []
+            self.catalog = catalog
             self.summaries = []
 
             self.logger.info("Processing tables...")
 
-            for table_chunk in tqdm(tables):
-                # check that it is not an empty string
-                if table_chunk.strip():
-                    match = re.search(r"^\s*([a-zA-Z_][\w]*)\s*\(", table_chunk)
+            # one entry for each table: (table_chunk, sample queries)
+            summary_inputs = []
+
+            for table in catalog:
+                self.logger.info("Table name: %s", table.name)
 
-                    if match:
-                        table_name = match.group(1)
+                self.tables_list.append(table.name)
 
-                        # normalize all table names in capital letters
-                        table_name = table_name.upper()
-                        self.logger.info("Table name: %s", table_name)
+                queries_list = self.get_sample_queries(table.name, tables_dict)
+                # concatenate into a single string
+                summary_inputs.append((table.get_chunk(), "\n".join(queries_list)))
 
-                        self.tables_list.append(table_name)
+            # create the summaries, with SUMMARY_CONCURRENCY LLM calls in parallel
+            # map returns the results in the same order of tables_list
+            self.logger.info("Generating summaries...")
 
-                        # create the summary for the table
+            with ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY) as executor:
+                summaries = executor.map(
+                    lambda args: self._get_table_summary(*args),
+                    summary_inputs,
+                )
 
-                        # remove not needed line (see above)
-                        table_chunk = self._remove_compress_line(table_chunk)
+                for table_name, summary in tqdm(
+                    zip(self.tables_list, summaries), total=len(summary_inputs)
+                ):
+                    self.summaries.append(summary)
 
-                        table_chunk = "CREATE TABLE " + table_chunk
-                        self.tables_chunk.append(
-                            {"table": table_name, "chunk": table_chunk}
-                        )
+                    if DEBUG:
+                        self.logger.info("Summary for %s:", table_name)
+                        self.logger.info(summary)
 
-                        queries_list = self.get_sample_queries(table_name, tables_dict)
-                        # concatenate into a single string
-                        queries_string = "\n".join(queries_list)
+        except Exception as e:
+            self.logger.error("Error in _process_schema...")
+            self.logger.error(e)
 
-                        summary = self._generate_table_summary(
-                            table_chunk, queries_string
-                        )
+    def _get_table_summary(self, table_chunk, sample_queries):
+        """
+        return the summary from the summary cache, if found,
+        otherwise generate it (LLM call) and store it in the cache
+        """
+        if self.summary_cache is None:
+            return self._generate_table_summary_with_retry(table_chunk, sample_queries)
+
+        key = self.summary_cache.make_key(
+            table_chunk,
+            sample_queries,
+            PROMPT_TABLE_SUMMARY,
+            self.llm_manager.model_list[INDEX_MODEL_FOR_SUMMARY],
+        )
+        summary = self.summary_cache.get(key)
 
-                        self.summaries.append(summary)
+        if summary is None:
+            summary = self._generate_table_summary_with_retry(
+                table_chunk, sample_queries
+            )
+            self.summary_cache.put(key, summary)
 
-                        if DEBUG:
-                            self.logger.info("Summary:")
-                            self.logger.info(summary)
+        return summary
 
-                    else:
-                        self.logger.error("Table name not found !")
+    def _generate_table_summary_with_retry(self, table_chunk, sample_queries):
+        """
+        call _generate_table_summary, retrying with exponential backoff
+        (ex: throttling of the LLM service)
+        """
+        for attempt in range(1, SUMMARY_MAX_ATTEMPTS + 1):
+            try:
+                return self._generate_table_summary(table_chunk, sample_queries)
+            except Exception as e:
+                if attempt == SUMMARY_MAX_ATTEMPTS:
+                    raise
+
+                wait_time = SUMMARY_RETRY_BACKOFF * 2 ** (attempt - 1)
+                self.logger.warning(
+                    "Error generating summary (attempt %s), retrying in %s sec.: %s",
+                    attempt,
+                    wait_time,
+                    e,
+                )
+                time.sleep(wait_time)
 
-        except Exception as e:
-            self.logger.error("Error in _process_schema...")
-            self.logger.error(e)
+        return None
 
     def _generate_table_summary(self, table_chunk, sample_queries):
         """
@@ -347,6 +866,14 @@ class SchemaManager(ABC):
 
         return tables_dict
 
+    def read_samples_query(self):
+        """
+        Reads all the sample queries (from file or DB, depends on subclass)
+
+        returns a dict: {table_name: {"sample_queries": [...]}}
+        """
+        return self._read_samples_query()
+
     def get_sample_queries(self, table_name, data):
         """
         return a list of sample queries for the given table
@@ -369,28 +896,68 @@ class SchemaManager(ABC):
 
             # retrieve table_chunk
             table_chunk = self._find_chunk_by_table_name(table_name)
+            metadata = {"table": table_name, "table_chunk": table_chunk}
+            # used to detect changes (see incremental sync)
+            if table_name in self.fingerprints:
+                metadata["fingerprint"] = self.fingerprints[table_name]
+
             # all data stored in Vector Store
-            doc = Document(
-                page_content=content,
-                metadata={"table": table_name, "table_chunk": table_chunk},
-            )
+            doc = Document(page_content=content, metadata=metadata)
             docs.append(doc)
         return docs
 
-    def _rerank_table_list(self, query, top_k_schemas):
+    def _compute_fingerprint(self, table, sample_queries, last_ddl_time):
+        """
+        Compute the fingerprint of a table, used to detect changes
+
+        table: TableInfo (records are not part of the fingerprint:
+        data change every day)
+        sample_queries: list of sample queries for the table
+        """
+        return {
+            "ddl_hash": compute_hash(table.ddl.strip()),
+            "comments_hash": compute_hash(table.get_comments_text()),
+            "sample_queries_hash": self._compute_samples_hash(sample_queries),
+            "last_ddl_time": last_ddl_time,
+        }
+
+    def _compute_samples_hash(self, sample_queries):
+        """
+        hash of the list of sample queries (order doesn't matter)
+        """
+        return compute_hash("\n".join(sorted(sample_queries)))
+
+    def _compute_fingerprints(self, tables_dict, last_ddl_times):
+        """
+        compute the fingerprints for all the tables in self.catalog
+        """
+        self.fingerprints = {
+            table.name: self._compute_fingerprint(
+                table,
+                self.get_sample_queries(table.name, tables_dict),
+                last_ddl_times.get(table.name),
+            )
+            for table in self.catalog
+        }
+
+    def _rerank_table_list(
+        self, query, top_k_schemas, top_n=TOP_N, schema_version=None
+    ):
         """
         Get TOP_N tables from step1 in schema selection and use an LLM
         to rerank the TOP_N
 
         query: user query in NL
         top_k_schemas: schemas for top_k tables
+        top_n: max number of tables returned
+        schema_version: version of the vector store (for the rerank cache)
         produce a restricted TOP_N list
         """
         # to be implemented and plugged in get_restricted schema
         reranker = Reranker(self.llm_manager, self.logger)
 
         self.logger.info("Calling reranker...")
-        result = reranker.rerank_table_list(query, top_k_schemas)
+        result = reranker.rerank_table_list(query, top_k_schemas, top_n, schema_version)
 
         # extract the table list (in result it is surrounded by triple backtick)
         reranked_tables_list = self._extract_list(result.content)
@@ -400,30 +967,13 @@ class SchemaManager(ABC):
     #
     # Resource management and helper functions
     #
-    def _get_table_name_from_table_chunk(self, chunk):
-        """
-        extract only the table name
-        """
-        table_name = ""
-
-        if chunk.strip():
-            match = re.search(r"^\s*([a-zA-Z_][\w]*)\s*\(", chunk)
-
-            if match:
-                table_name = match.group(1)
-                table_name = table_name.upper()
-
-        return table_name
-
     def _find_chunk_by_table_name(self, table_name):
         """
         Finds the chunk of schema corresponding to the given table name.
         """
-        # loop in the dictionary list
-        for entry in self.tables_chunk:
-            if entry["table"] == table_name:
-                return entry["chunk"]
-        return None
+        table = self.catalog.get(table_name)
+
+        return table.get_chunk() if table is not None else None
 
     def _extract_list(self, input_string):
         """
@@ -440,23 +990,6 @@ class SchemaManager(ABC):
 
         return tables_list
 
-    def _remove_compress_line(self, chunk):
-        """ "
-        remove the line containing COMPRESS FOR...
-        fro the chunk of schema
-        to reduce prompt length
-        """
-        # Split the string into lines
-        lines = chunk.splitlines()
-
-        # Filter out the line containing "COMPRESS"
-        lines = [line for line in lines if "COMPRESS" not in line]
-
-        # Join the lines back into a single string
-        updated_chunk = "\n".join(lines)
-
-        return updated_chunk
-
     def _close_connection(self, conn):
         """
         close properly the conn
@@ -11,20 +11,74 @@ The number of candidate tables is limited to TOP_N
 (configurable in the settings).
 """
 
+import os
+import time
+import json
+import queue
+import threading
 import oracledb
-from langchain_community.vectorstores.oraclevs import OracleVS
+from langchain_community.vectorstores.oraclevs import OracleVS, drop_table_purge
 
 from schema_manager import SchemaManager
+from schema_vector_index import SchemaVectorIndex
+from hybrid_retriever import HybridRetriever
+from db_pools import get_connection, DATA_POOL, VECTOR_POOL
+from vector_index_manager import (
+    HNSW,
+    IVF,
+    create_vector_index,
+    drop_vector_index,
+    rebuild_vector_index,
+    vector_index_exists,
+    approx_similarity_search_with_scores,
+    distance_to_similarity,
+)
+from vector_generations import (
+    get_generation_table_name,
+    get_next_generation,
+    get_serving_table,
+    list_generations,
+    migrate_to_generations,
+    needs_migration,
+    switch_generation,
+    drop_old_generations,
+    count_rows,
+    index_exists,
+)
+from rerank_gate import RerankGate
+from adaptive_top_k import select_adaptive_top_k
 from config import (
     TOP_K,
-    CONNECT_ARGS_VECTOR,
+    TOP_N,
     VECTOR_TABLE_NAME,
     DISTANCE_STRATEGY,
     ENABLE_RERANKING,
+    ENABLE_RERANK_GATE,
     # the name of the table from where we get the samples queries
     TABLE_NAME_SQ,
     INCLUDE_TABLES_PREFIX,
+    SCHEMA_VERSION_TABLE_NAME,
+    SCHEMA_VERSION_CHECK_INTERVAL,
+    SCHEMA_LOAD_STREAMING,
+    SCHEMA_LOAD_BATCH_SIZE,
+    SCHEMA_LOAD_QUEUE_SIZE,
+    SCHEMA_LOAD_CHECKPOINT_FILE,
+    SCHEMA_LOAD_BLUE_GREEN,
+    SCHEMA_GENERATIONS_TO_KEEP,
+    ENABLE_SCHEMA_VECTOR_INDEX,
+    ENABLE_HYBRID_RETRIEVAL,
+    VECTOR_INDEX_TYPE,
+    ENABLE_APPROX_SEARCH,
+    APPROX_SEARCH_TARGET_ACCURACY,
+    ENABLE_ADAPTIVE_TOP_K,
+    ADAPTIVE_TOP_K_MAX,
 )
+from config_private import DB_USER
+
+# virtual column, with an index, with the name of the table in METADATA
+TABLE_NAME_COLUMN = "TABLE_NAME"
+# ORA-00942: table or view does not exist
+ORA_TABLE_NOT_FOUND = 942
 
 
 class SchemaManager23AI(SchemaManager):
@@ -37,9 +91,43 @@ class SchemaManager23AI(SchemaManager):
     its functionality with 23AI capabilities.
     """
 
-    # init defined in the superclass
+    def __init__(self, db_manager, llm_manager, embed_model, logger):
+        """
+        Initializes the SchemaManager23AI (see SchemaManager)
+        """
+        super().__init__(db_manager, llm_manager, embed_model, logger)
+
+        # last version of the vector table read, and when (see get_schema_version)
+        self._schema_version = None
+        self._schema_version_checked_at = 0.0
+        # the version table exists (see _ensure_schema_version_table)
+        self._schema_version_table_checked = False
+
+        # vector tables with the indexed TABLE_NAME column
+        # (see _ensure_table_name_column)
+        self._tables_with_name_column = set()
+
+        # in-process copy of the vector table, for the similarity search
+        self.vector_index = (
+            SchemaVectorIndex(
+                self._get_vector_db_connection,
+                self.get_schema_version,
+                embed_model,
+                logger,
+            )
+            if ENABLE_SCHEMA_VECTOR_INDEX
+            else None
+        )
+        # lexical + vector retrieval (needs the in-process vector index)
+        self.hybrid_retriever = (
+            HybridRetriever(self.vector_index, logger)
+            if ENABLE_HYBRID_RETRIEVAL and self.vector_index is not None
+            else None
+        )
+        # to skip the LLM rerank when retrieval is confident
+        self.rerank_gate = RerankGate(logger) if ENABLE_RERANK_GATE else None
 
-    def _load_and_process_schema(self, table_filter_func):
+    def _load_and_process_schema(self, table_filter_func, selected_tables=None):
         """
         Loads the schema from the database, processes the table chunks,
         filters them based on the provided table filter function, and prepares
@@ -49,8 +137,9 @@ class SchemaManager23AI(SchemaManager):
         The difference is only in the filter_func
 
         Args:
-            table_filter_func (callable): A function that takes a table chunk
+            table_filter_func (callable): A function that takes a table name
             and returns True if the table should be included, False otherwise.
+            selected_tables (list): if provided, only these tables are read from DB
 
         Returns:
             docs (list): The prepared documents for embedding.
@@ -59,21 +148,23 @@ class SchemaManager23AI(SchemaManager):
         try:
             self.logger.info("Reading schema from DB...")
 
-            # Read the raw schema from the database
-            raw_schema = self._get_raw_schema()
-
-            # Split the schema for tables (output is a list of table chunks)
-            tables = raw_schema["table_info"].split("CREATE TABLE")
+            # Read the raw schema from the database (a SchemaCatalog)
+            catalog = self._get_raw_schema(selected_tables=selected_tables)
 
             # Filter tables using the provided filter function
-            tables = [t_chunk for t_chunk in tables if table_filter_func(t_chunk)]
+            catalog = catalog.filter(table_filter_func)
 
             # Read the sample queries for each table and build a structure
             # with table_name and sample_queries
             tables_with_samples_dict = self._read_samples_query()
 
             # Process the schema to populate summaries and table list
-            self._process_schema(tables, tables_with_samples_dict)
+            self._process_schema(catalog, tables_with_samples_dict)
+
+            # fingerprints are stored in metadata, to detect changes (see sync)
+            self._compute_fingerprints(
+                tables_with_samples_dict, self._read_last_ddl_times()
+            )
 
             # Ensure consistency between summaries and table list
             assert len(self.summaries) == len(
@@ -100,42 +191,406 @@ class SchemaManager23AI(SchemaManager):
         processes the table chunks, and optionally filters them based
         on the prefix defined by INCLUDE_TABLES_PREFIX.
 
+        With SCHEMA_LOAD_STREAMING the load is done in batches
+        (see _init_schema_manager_streaming)
+
+        With SCHEMA_LOAD_BLUE_GREEN the load is done in a new generation
+        of the vector table, used by the API only when completed and verified
+        (see _complete_load)
+
         Raises:
             Exception: If the schema cannot be loaded.
         """
-        try:
-            # Define a filter function for table names based on the prefix
-            if INCLUDE_TABLES_PREFIX == "ALL":
-                table_filter_func = lambda t_chunk: True  # Include all tables
-            else:
-                table_filter_func = (
-                    lambda t_chunk: self._get_table_name_from_table_chunk(t_chunk)
-                    .upper()
-                    .startswith(INCLUDE_TABLES_PREFIX)
-                )
+        if SCHEMA_LOAD_STREAMING:
+            self._init_schema_manager_streaming()
+            return
 
-            # call the helper function to Load and process the schema with the table filter
-            docs = self._load_and_process_schema(table_filter_func)
+        try:
+            # resolved before the load: the rows expected in the vector table
+            # (tables lost in extraction or summary must fail the verification)
+            included_tables = [
+                table_name
+                for table_name in self._read_all_table_names()
+                if self._is_included(table_name)
+            ]
+
+            # call the helper function to Load and process the schema
+            # with the table filter, based on the prefix
+            docs = self._load_and_process_schema(self._is_included)
 
             # init the vector store
             self.logger.info("Loading in Oracle 23AI...")
 
             # reload all the tables and schemas in vector store
-            # replacing old data
+            # replacing old data (or in a new generation)
             with self._get_vector_db_connection() as conn:
+                target_table = self._get_load_target_table(conn)
+
                 OracleVS.from_documents(
                     docs,
                     self.embed_model,
-                    table_name=VECTOR_TABLE_NAME,
+                    table_name=target_table,
                     client=conn,
                     distance_strategy=DISTANCE_STRATEGY,
                 )
+                # the table has been re-created
+                self._tables_with_name_column.discard(target_table)
+                self._ensure_table_name_column(conn, target_table)
+                self._create_vector_index(conn, target_table)
+
+                self._complete_load(conn, target_table, len(included_tables))
 
             self.logger.info("SchemaManager initialisation done!")
 
         except Exception as e:
             self._handle_exception(e, "Error in SchemaManager:init_schema_manager...")
 
+    def _init_schema_manager_streaming(self):
+        """
+        Load the Schema Manager as a pipeline, in batches of tables:
+            - producer (thread): extract and summarize a batch of tables
+            - consumer: embed (one call for the batch), insert and commit
+
+        The queue between the two is bounded, so at most SCHEMA_LOAD_QUEUE_SIZE
+        batches are kept in memory. After every commit the tables loaded are
+        saved in a checkpoint: if the load is interrupted, the next run resumes
+        from the last committed batch.
+        """
+        try:
+            checkpoint = self._read_checkpoint()
+
+            if checkpoint is not None:
+                done_tables = set(checkpoint["done_tables"])
+                self.logger.info(
+                    "Resuming load, %s tables already loaded...", len(done_tables)
+                )
+            else:
+                done_tables = set()
+
+            # resolved before the load: the rows expected in the vector table
+            included_tables = [
+                table_name
+                for table_name in self._read_all_table_names()
+                if self._is_included(table_name)
+            ]
+            table_names = [
+                table_name
+                for table_name in included_tables
+                if table_name not in done_tables
+            ]
+            tables_with_samples_dict = self._read_samples_query()
+            last_ddl_times = self._read_last_ddl_times()
+
+            self.logger.info("Loading %s tables in Oracle 23AI...", len(table_names))
+
+            batches_queue = queue.Queue(maxsize=SCHEMA_LOAD_QUEUE_SIZE)
+            producer = threading.Thread(
+                target=self._produce_batches,
+                args=(
+                    table_names,
+                    tables_with_samples_dict,
+                    last_ddl_times,
+                    batches_queue,
+                ),
+                name="schema_load_producer",
+                daemon=True,
+            )
+            producer.start()
+
+            with self._get_vector_db_connection() as conn:
+                target_table = self._get_load_target_table(conn, checkpoint)
+
+                if checkpoint is None:
+                    # full reload: replace old data
+                    drop_table_purge(conn, target_table)
+                    self._tables_with_name_column.discard(target_table)
+
+                # creates the table, if needed
+                v_store = OracleVS(
+                    client=conn,
+                    table_name=target_table,
+                    distance_strategy=DISTANCE_STRATEGY,
+                    embedding_function=self.embed_model,
+                )
+                self._ensure_table_name_column(conn, target_table)
+                # the vector index is built at the end, not for every batch
+                drop_vector_index(conn, target_table)
+
+                # from here, a new run must resume
+                self._write_checkpoint(done_tables, target_table)
+
+                while True:
+                    docs = batches_queue.get()
+
+                    if docs is None:
+                        # end of input
+                        break
+                    if isinstance(docs, Exception):
+                        raise docs
+
+                    # rows of a batch committed before an interruption (and
+                    # not in the checkpoint) are replaced, not duplicated
+                    self.delete_tables_from_schema_manager(
+                        conn, [doc.metadata["table"] for doc in docs], target_table
+                    )
+
+                    # a single call to embed the batch, and a batch insert
+                    # (same transaction as the delete)
+                    v_store.add_documents(docs)
+                    conn.commit()
+
+                    done_tables.update(doc.metadata["table"] for doc in docs)
+                    self._write_checkpoint(done_tables, target_table)
+
+                    self.logger.info("Loaded %s tables...", len(done_tables))
+
+                self._create_vector_index(conn, target_table)
+
+                self._complete_load(conn, target_table, len(included_tables))
+
+            # load completed, next run will be a new full load
+            self._remove_checkpoint()
+
+            self.logger.info("SchemaManager initialisation done!")
+
+        except Exception as e:
+            self._handle_exception(
+                e, "Error in SchemaManager:_init_schema_manager_streaming..."
+            )
+
+    def _produce_batches(
+        self, table_names, tables_with_samples_dict, last_ddl_times, batches_queue
+    ):
+        """
+        Producer of the load pipeline: for every batch of tables extract
+        metadata, generate summaries and put the documents in the queue
+        (put blocks if the queue is full)
+
+        At the end puts None, in case of errors the exception
+        """
+        try:
+            for start in range(0, len(table_names), SCHEMA_LOAD_BATCH_SIZE):
+                batch = table_names[start : start + SCHEMA_LOAD_BATCH_SIZE]
+
+                catalog = self._get_raw_schema(selected_tables=batch)
+                self._process_schema(catalog, tables_with_samples_dict)
+
+                if len(self.summaries) != len(self.tables_list):
+                    raise ValueError(
+                        f"Summaries not generated for tables in batch: {batch}"
+                    )
+
+                self._compute_fingerprints(tables_with_samples_dict, last_ddl_times)
+
+                batches_queue.put(self._prepare_documents())
+
+            batches_queue.put(None)
+
+        except Exception as e:
+            self._handle_exception(e, "Error in SchemaManager:_produce_batches...")
+            batches_queue.put(e)
+
+    def _read_all_table_names(self):
+        """
+        return the names of all the tables in the Data Schema
+        """
+        with get_connection(DATA_POOL) as conn:
+            cursor = conn.cursor()
+            table_names = self._read_table_names(cursor, DB_USER)
+            cursor.close()
+
+        return table_names
+
+    def _read_checkpoint(self):
+        """
+        return the checkpoint of an interrupted load, None if not found
+        """
+        try:
+            with open(SCHEMA_LOAD_CHECKPOINT_FILE, "r", encoding="UTF-8") as file:
+                checkpoint = json.load(file)
+        except FileNotFoundError:
+            return None
+
+        # a checkpoint for another vector table is ignored
+        if checkpoint.get("vector_table") != VECTOR_TABLE_NAME:
+            return None
+
+        return checkpoint
+
+    def _write_checkpoint(self, done_tables, target_table):
+        """
+        save the list of tables loaded, and the table where they are
+        loaded (atomic: write and rename)
+        """
+        tmp_file = SCHEMA_LOAD_CHECKPOINT_FILE + ".tmp"
+
+        with open(tmp_file, "w", encoding="UTF-8") as file:
+            json.dump(
+                {
+                    "vector_table": VECTOR_TABLE_NAME,
+                    "target_table": target_table,
+                    "done_tables": sorted(done_tables),
+                },
+                file,
+            )
+        os.replace(tmp_file, SCHEMA_LOAD_CHECKPOINT_FILE)
+
+    def _remove_checkpoint(self):
+        if os.path.exists(SCHEMA_LOAD_CHECKPOINT_FILE):
+            os.remove(SCHEMA_LOAD_CHECKPOINT_FILE)
+
+    #
+    # Blue/green load (see vector_generations.py)
+    #
+    def _get_load_target_table(self, conn, checkpoint=None):
+        """
+        The table for a full load: with SCHEMA_LOAD_BLUE_GREEN a new
+        generation (or the one of the interrupted load), otherwise
+        the table in use
+        """
+        if not SCHEMA_LOAD_BLUE_GREEN:
+            return get_serving_table(conn, VECTOR_TABLE_NAME)
+
+        if checkpoint is not None and checkpoint.get("target_table"):
+            return checkpoint["target_table"]
+
+        # checked before the load, not at the switch
+        if needs_migration(conn, VECTOR_TABLE_NAME):
+            raise ValueError(
+                f"{VECTOR_TABLE_NAME} is a table: run "
+                "batch_migrate_vector_store_23ai.py before a blue/green load"
+            )
+
+        target_table = get_generation_table_name(
+            VECTOR_TABLE_NAME, get_next_generation(conn, VECTOR_TABLE_NAME)
+        )
+        self.logger.info("Loading new generation %s...", target_table)
+
+        return target_table
+
+    def _complete_load(self, conn, target_table, expected_rows):
+        """
+        End of a full load: with SCHEMA_LOAD_BLUE_GREEN verify the new
+        generation and switch the API to it, then signal the change
+        (the API picks up the new generation at the next version check)
+
+        If the verification fails the new generation is dropped and the
+        API keeps using the current one
+        """
+        if SCHEMA_LOAD_BLUE_GREEN:
+            if not self._verify_generation(conn, target_table, expected_rows):
+                drop_table_purge(conn, target_table)
+                # a checkpoint would refer to the table dropped
+                self._remove_checkpoint()
+
+                raise ValueError(f"Verification failed for {target_table}")
+
+            switch_generation(conn, VECTOR_TABLE_NAME, target_table)
+            self.logger.info("%s now uses %s", VECTOR_TABLE_NAME, target_table)
+
+        # to signal the change to the API (caches)
+        self._bump_schema_version(conn)
+        conn.commit()
+
+        if SCHEMA_LOAD_BLUE_GREEN:
+            dropped_tables = drop_old_generations(
+                conn, VECTOR_TABLE_NAME, SCHEMA_GENERATIONS_TO_KEEP
+            )
+            if dropped_tables:
+                self.logger.info("Dropped old generations: %s", dropped_tables)
+
+    def _verify_generation(self, conn, target_table, expected_rows):
+        """
+        Check a new generation before using it: number of rows, index on
+        TABLE_NAME and vector index (if VECTOR_INDEX_TYPE is set)
+
+        expected_rows: the number of tables to load, as resolved before the
+        load (a row for each table)
+        """
+        n_rows = count_rows(conn, target_table)
+
+        if n_rows == 0 or n_rows != expected_rows:
+            self.logger.error(
+                "%s: %s rows, expected %s", target_table, n_rows, expected_rows
+            )
+            return False
+        if not index_exists(conn, f"{target_table}_TNAME_IDX"):
+            self.logger.error(
+                "%s: index on %s missing", target_table, TABLE_NAME_COLUMN
+            )
+            return False
+        if VECTOR_INDEX_TYPE is not None and not vector_index_exists(
+            conn, target_table
+        ):
+            self.logger.error("%s: vector index missing", target_table)
+            return False
+
+        return True
+
+    def migrate_to_generations(self):
+        """
+        One-time migration to blue/green loads: the vector table becomes
+        generation 0 and VECTOR_TABLE_NAME a synonym for it
+
+        For a moment VECTOR_TABLE_NAME doesn't exist: run with the API stopped
+        """
+        try:
+            with self._get_vector_db_connection() as conn:
+                table_name = migrate_to_generations(conn, VECTOR_TABLE_NAME)
+
+            if table_name is None:
+                self.logger.info("%s: nothing to migrate", VECTOR_TABLE_NAME)
+            else:
+                self.logger.info("%s now uses %s", VECTOR_TABLE_NAME, table_name)
+
+        except oracledb.DatabaseError as e:
+            self._handle_exception(
+                e, "Error in SchemaManager:migrate_to_generations..."
+            )
+
+    def rollback_schema_generation(self):
+        """
+        Switch the API back to the previous generation of the vector table
+        (generations kept: SCHEMA_GENERATIONS_TO_KEEP)
+        """
+        try:
+            with self._get_vector_db_connection() as conn:
+                serving_table = get_serving_table(conn, VECTOR_TABLE_NAME)
+                generations = list_generations(conn, VECTOR_TABLE_NAME)
+
+                serving_generation = next(
+                    (
+                        generation
+                        for generation, table_name in generations.items()
+                        if table_name == serving_table
+                    ),
+                    None,
+                )
+                previous = [
+                    generation
+                    for generation in generations
+                    if serving_generation is not None
+                    and generation < serving_generation
+                ]
+                if not previous:
+                    self.logger.warning(
+                        "No previous generation of %s", VECTOR_TABLE_NAME
+                    )
+                    return
+
+                target_table = generations[max(previous)]
+                switch_generation(conn, VECTOR_TABLE_NAME, target_table)
+
+                self._bump_schema_version(conn)
+                conn.commit()
+
+            self.logger.info("%s now uses %s", VECTOR_TABLE_NAME, target_table)
+
+        except oracledb.DatabaseError as e:
+            self._handle_exception(
+                e, "Error in SchemaManager:rollback_schema_generation..."
+            )
+
     def update_schema_manager(self, selected_tables_list):
         """
         Update the data for selected tables in the Schema Manager DB
@@ -147,24 +602,26 @@ class SchemaManager23AI(SchemaManager):
         try:
             # Define a filter function for selected tables; in this case only the tables in
             # selected_tables_list
-            table_filter_func = (
-                lambda t_chunk: self._get_table_name_from_table_chunk(t_chunk).upper()
-                in selected_tables_list
-            )
+            table_filter_func = lambda t_name: t_name in selected_tables_list
 
             # Load and process the schema with the table filter
-            docs = self._load_and_process_schema(table_filter_func)
+            docs = self._load_and_process_schema(
+                table_filter_func, selected_tables=selected_tables_list
+            )
 
             # update the vector store
             self.logger.info("Updating Oracle 23AI...")
 
             with self._get_vector_db_connection() as conn:
-                # delete record in vector store for selected tables
-                for doc in docs:
-                    self.logger.info(" Deleting %s", doc.metadata["table"])
-                    self.delete_from_schema_manager(conn, doc.metadata["table"])
+                self._ensure_table_name_column(conn)
 
-                # loading
+                # delete records in vector store for selected tables
+                # (a single executemany, using the index on TABLE_NAME)
+                tables_to_delete = [doc.metadata["table"] for doc in docs]
+                self.logger.info(" Deleting %s", tables_to_delete)
+                self.delete_tables_from_schema_manager(conn, tables_to_delete)
+
+                # loading: one call to embed all the docs, and a batch insert
                 self.logger.info("Saving new records to Vector Store...")
 
                 v_store = OracleVS(
@@ -179,33 +636,377 @@ class SchemaManager23AI(SchemaManager):
                 self.logger.info("")
                 self.logger.info("SchemaManager update done!")
 
+                # to signal the change to the API (caches)
+                self._bump_schema_version(conn)
+
                 # end the transaction
                 conn.commit()
 
         except Exception as e:
             self._handle_exception(e, "Error in SchemaManager:update_schema_manager...")
 
-    def delete_from_schema_manager(self, conn, t_name):
+    def sync_schema_manager(self):
         """
-        Delete the record for a selected table from the VECTOR tables
+        Incremental refresh: update the Schema Manager DB only for the tables
+        changed since the last load/update
+
+        Changes are detected comparing LAST_DDL_TIME and the sample queries
+        with the fingerprint stored in metadata. For the candidate tables
+        DDL and comments are read and compared with the stored hashes:
+            - content changed: new summary and embedding (LLM call)
+            - only LAST_DDL_TIME changed (ex: grant, stats): update metadata
+            - table dropped: delete from Vector Store
         """
         try:
-            # Create a cursor object
-            cursor = conn.cursor()
+            with self._get_vector_db_connection() as conn:
+                stored_fingerprints = self._read_stored_fingerprints(conn)
+
+            last_ddl_times = {
+                table_name: last_ddl_time
+                for table_name, last_ddl_time in self._read_last_ddl_times().items()
+                if self._is_included(table_name)
+            }
+            tables_with_samples_dict = self._read_samples_query()
+
+            # step 1: candidates, using only catalog info (cheap)
+            candidates = []
+            for table_name, last_ddl_time in last_ddl_times.items():
+                stored = stored_fingerprints.get(table_name)
+                samples_hash = self._compute_samples_hash(
+                    self.get_sample_queries(table_name, tables_with_samples_dict)
+                )
+
+                if (
+                    stored is None
+                    or stored.get("last_ddl_time") != last_ddl_time
+                    or stored.get("sample_queries_hash") != samples_hash
+                ):
+                    candidates.append(table_name)
+
+            dropped_tables = sorted(set(stored_fingerprints) - set(last_ddl_times))
+
+            self.logger.info(
+                "Sync: %s candidate tables: %s", len(candidates), candidates
+            )
+
+            # step 2: compare content hashes for candidates
+            changed_tables = []
+            touched_tables = []
+
+            if candidates:
+                catalog = self._get_raw_schema(selected_tables=candidates)
+
+                for table in catalog:
+                    table_name = table.name
+                    fingerprint = self._compute_fingerprint(
+                        table,
+                        self.get_sample_queries(table_name, tables_with_samples_dict),
+                        last_ddl_times.get(table_name),
+                    )
+                    stored = stored_fingerprints.get(table_name) or {}
+
+                    if all(
+                        stored.get(key) == fingerprint[key]
+                        for key in ("ddl_hash", "comments_hash", "sample_queries_hash")
+                    ):
+                        touched_tables.append(
+                            (table_name, fingerprint["last_ddl_time"])
+                        )
+                    else:
+                        changed_tables.append(table_name)
+
+            self.logger.info("Sync: tables changed: %s", changed_tables)
+            self.logger.info(
+                "Sync: tables with only LAST_DDL_TIME changed: %s",
+                [table_name for table_name, _ in touched_tables],
+            )
+            self.logger.info("Sync: tables dropped: %s", dropped_tables)
+
+            if not (changed_tables or touched_tables or dropped_tables):
+                self.logger.info("SchemaManager is up to date!")
+                return
+
+            if changed_tables:
+                # summaries and embeddings only for changed tables
+                self.update_schema_manager(changed_tables)
+
+            with self._get_vector_db_connection() as conn:
+                self._ensure_table_name_column(conn)
 
-            # SQL statement to delete a record where t_name matches
-            sql = f"""DELETE FROM {VECTOR_TABLE_NAME} WHERE
-                   json_value(METADATA, '$.table') = :t_name_value
-                   """
+                self._update_last_ddl_times(conn, touched_tables)
 
-            # Execute the DELETE SQL with the value of t_name
-            cursor.execute(sql, {"t_name_value": t_name})
+                self.logger.info(" Deleting %s", dropped_tables)
+                self.delete_tables_from_schema_manager(conn, dropped_tables)
+
+                if dropped_tables:
+                    # to signal the change to the API (caches)
+                    self._bump_schema_version(conn)
+
+                conn.commit()
+
+            self.logger.info("SchemaManager sync done!")
 
         except Exception as e:
-            self._handle_exception(
-                e, "Error in SchemaManager:delete_from_schema_manager..."
+            self._handle_exception(e, "Error in SchemaManager:sync_schema_manager...")
+
+    def _read_stored_fingerprints(self, conn):
+        """
+        return a dict {table_name: fingerprint} read from the Vector Store
+
+        fingerprint is None for records loaded before fingerprints were added
+        """
+        cursor = conn.cursor()
+        cursor.execute(
+            f"""SELECT json_value(METADATA, '$.table'),
+                   json_query(METADATA, '$.fingerprint')
+            FROM {VECTOR_TABLE_NAME}"""
+        )
+
+        stored_fingerprints = {
+            table_name: json.loads(fingerprint) if fingerprint else None
+            for table_name, fingerprint in cursor
+        }
+        cursor.close()
+
+        return stored_fingerprints
+
+    def _update_last_ddl_times(self, conn, touched_tables):
+        """
+        update only the LAST_DDL_TIME in the fingerprint (no LLM, no embeddings)
+
+        touched_tables: list of (table_name, last_ddl_time)
+        """
+        if not touched_tables:
+            return
+
+        cursor = conn.cursor()
+        cursor.executemany(
+            f"""UPDATE {VECTOR_TABLE_NAME}
+            SET METADATA = json_transform(METADATA,
+                SET '$.fingerprint.last_ddl_time' = :last_ddl_time)
+            WHERE {TABLE_NAME_COLUMN} = :t_name_value""",
+            [
+                {"last_ddl_time": last_ddl_time, "t_name_value": table_name}
+                for table_name, last_ddl_time in touched_tables
+            ],
+        )
+        cursor.close()
+
+    def _is_included(self, table_name):
+        """
+        check if the table must be in the Schema Manager (INCLUDE_TABLES_PREFIX)
+        """
+        if INCLUDE_TABLES_PREFIX == "ALL":
+            return True
+        return table_name.upper().startswith(INCLUDE_TABLES_PREFIX)
+
+    def delete_tables_from_schema_manager(
+        self, conn, table_names, vector_table_name=VECTOR_TABLE_NAME
+    ):
+        """
+        Delete the records for a list of tables from the VECTOR table,
+        with a single executemany (commit is done by the caller)
+        """
+        if not table_names:
+            return
+
+        cursor = conn.cursor()
+        cursor.executemany(
+            f"DELETE FROM {vector_table_name} WHERE {TABLE_NAME_COLUMN} = :t_name_value",
+            [{"t_name_value": table_name} for table_name in table_names],
+        )
+        cursor.close()
+
+    def _ensure_table_name_column(self, conn, vector_table_name=None):
+        """
+        Add to the vector table (created by OracleVS) a virtual column
+        with the name of the table (from METADATA) and an index on it,
+        so that delete and update for a table don't scan the whole table.
+        The column is virtual: it is maintained by the DB for every insert.
+
+        vector_table_name: default, the table in use (see vector_generations.py)
+
+        Note: DDL, it commits the current transaction
+        """
+        if vector_table_name is None:
+            vector_table_name = get_serving_table(conn, VECTOR_TABLE_NAME)
+
+        if vector_table_name in self._tables_with_name_column:
+            return
+
+        cursor = conn.cursor()
+        cursor.execute(
+            """SELECT COUNT(*) FROM user_tab_columns
+            WHERE table_name = :t_name AND column_name = :c_name""",
+            t_name=vector_table_name.upper(),
+            c_name=TABLE_NAME_COLUMN,
+        )
+
+        if cursor.fetchone()[0] == 0:
+            self.logger.info("Adding column %s...", TABLE_NAME_COLUMN)
+
+            cursor.execute(
+                f"""ALTER TABLE {vector_table_name} ADD ({TABLE_NAME_COLUMN}
+                VARCHAR2(128) GENERATED ALWAYS AS
+                (json_value(METADATA, '$.table' RETURNING VARCHAR2(128))) VIRTUAL)"""
+            )
+            cursor.execute(
+                f"""CREATE INDEX {vector_table_name}_TNAME_IDX
+                ON {vector_table_name} ({TABLE_NAME_COLUMN})"""
             )
 
+        cursor.close()
+        self._tables_with_name_column.add(vector_table_name)
+
+    def _create_vector_index(self, conn, vector_table_name):
+        """
+        Create the vector index (VECTOR_INDEX_TYPE) on the vector table.
+        If HNSW can't be created (ex: no VECTOR_MEMORY_SIZE) an IVF index
+        is created instead. If it fails the load is not affected: the
+        similarity search will be exact
+        (with SCHEMA_LOAD_BLUE_GREEN the new generation is not used)
+        """
+        try:
+            if create_vector_index(conn, vector_table_name):
+                self.logger.info("Created %s vector index...", VECTOR_INDEX_TYPE)
+
+        except oracledb.DatabaseError as e:
+            if VECTOR_INDEX_TYPE.upper() != HNSW:
+                self._handle_exception(
+                    e, "Error in SchemaManager:_create_vector_index..."
+                )
+                return
+
+            self.logger.warning("HNSW vector index not created (%s), using IVF", e)
+            try:
+                create_vector_index(conn, vector_table_name, index_type=IVF)
+                self.logger.info("Created IVF vector index...")
+
+            except oracledb.DatabaseError as e_ivf:
+                self._handle_exception(
+                    e_ivf, "Error in SchemaManager:_create_vector_index..."
+                )
+
+    def rebuild_vector_index(self):
+        """
+        Drop and create the vector index on the vector table
+        (ex: after many updates, or to change type or accuracy)
+        """
+        try:
+            with self._get_vector_db_connection() as conn:
+                # the index is on the table, not on the synonym
+                rebuild_vector_index(conn, get_serving_table(conn, VECTOR_TABLE_NAME))
+
+            self.logger.info("Rebuilt %s vector index...", VECTOR_INDEX_TYPE)
+
+        except oracledb.DatabaseError as e:
+            self._handle_exception(e, "Error in SchemaManager:rebuild_vector_index...")
+
+    def get_schema_version(self):
+        """
+        Return the version of the vector table, incremented at every load/update.
+
+        The version is read from the DB at most every SCHEMA_VERSION_CHECK_INTERVAL
+        sec. Returns 0 if the version table doesn't exist yet (it is created
+        by the first load/update, see _ensure_schema_version_table)
+        """
+        if (
+            time.time() - self._schema_version_checked_at
+            < SCHEMA_VERSION_CHECK_INTERVAL
+        ):
+            return self._schema_version
+
+        try:
+            with self._get_vector_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"""SELECT version FROM {SCHEMA_VERSION_TABLE_NAME}
+                    WHERE vector_table_name = :t_name""",
+                    t_name=VECTOR_TABLE_NAME,
+                )
+                row = cursor.fetchone()
+                cursor.close()
+
+            self._schema_version = row[0] if row is not None else 0
+
+        except oracledb.DatabaseError as e:
+            (error,) = e.args
+
+            if error.code == ORA_TABLE_NOT_FOUND:
+                # when the loader creates it, the version changes to >= 1
+                if self._schema_version is None:
+                    self.logger.warning(
+                        "%s not found, using version 0", SCHEMA_VERSION_TABLE_NAME
+                    )
+                self._schema_version = 0
+            else:
+                self._handle_exception(
+                    e, "Error in SchemaManager:get_schema_version..."
+                )
+
+        self._schema_version_checked_at = time.time()
+
+        return self._schema_version
+
+    def _bump_schema_version(self, conn):
+        """
+        Increment the version of the vector table (commit is done by the caller)
+        """
+        try:
+            self._ensure_schema_version_table(conn)
+
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""
+                MERGE INTO {SCHEMA_VERSION_TABLE_NAME} v
+                USING (SELECT :t_name AS vector_table_name FROM dual) s
+                ON (v.vector_table_name = s.vector_table_name)
+                WHEN MATCHED THEN UPDATE
+                    SET v.version = v.version + 1, v.updated_at = SYSTIMESTAMP
+                WHEN NOT MATCHED THEN INSERT (vector_table_name, version)
+                    VALUES (s.vector_table_name, 1)
+                """,
+                t_name=VECTOR_TABLE_NAME,
+            )
+            cursor.close()
+
+            # don't wait for the next check in this process
+            self._schema_version_checked_at = 0.0
+
+        except oracledb.DatabaseError as e:
+            self._handle_exception(e, "Error in SchemaManager:_bump_schema_version...")
+
+    def _ensure_schema_version_table(self, conn):
+        """
+        Create the version table (see sql_scripts/create_schema_version.sql),
+        if it doesn't exist
+
+        Note: DDL, it commits the current transaction
+        """
+        if self._schema_version_table_checked:
+            return
+
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT COUNT(*) FROM user_tables WHERE table_name = :t_name",
+            t_name=SCHEMA_VERSION_TABLE_NAME.upper(),
+        )
+
+        if cursor.fetchone()[0] == 0:
+            self.logger.info("Creating table %s...", SCHEMA_VERSION_TABLE_NAME)
+
+            cursor.execute(
+                f"""CREATE TABLE {SCHEMA_VERSION_TABLE_NAME} (
+                vector_table_name VARCHAR2(128) NOT NULL,
+                version NUMBER DEFAULT 0 NOT NULL,
+                updated_at TIMESTAMP DEFAULT SYSTIMESTAMP,
+                CONSTRAINT {SCHEMA_VERSION_TABLE_NAME}_PK
+                    PRIMARY KEY (vector_table_name))"""
+            )
+
+        cursor.close()
+        self._schema_version_table_checked = True
+
     def _read_samples_query(self):
         """
         Reads sample queries from the DB.
@@ -243,10 +1044,42 @@ class SchemaManager23AI(SchemaManager):
 
         return tables_dict
 
-    def _similarity_search(self, query, conn):
+    def _similarity_search(self, query, conn, target_accuracy=None, k=TOP_K):
         """
-        execute the search for TOP_K tables using 23AI
+        execute the search for k tables using 23AI,
+        return the list of Document (see _similarity_search_with_scores)
         """
+        return [
+            doc
+            for doc, _ in self._similarity_search_with_scores(
+                query, conn, target_accuracy, k
+            )
+        ]
+
+    def _similarity_search_with_scores(
+        self, query, conn, target_accuracy=None, k=TOP_K
+    ):
+        """
+        execute the search for k tables using 23AI,
+        return the list of (Document, similarity)
+
+        with ENABLE_APPROX_SEARCH the search uses the vector index,
+        with target_accuracy (default: APPROX_SEARCH_TARGET_ACCURACY)
+        """
+        if ENABLE_APPROX_SEARCH:
+            if target_accuracy is None:
+                target_accuracy = APPROX_SEARCH_TARGET_ACCURACY
+
+            return approx_similarity_search_with_scores(
+                conn,
+                self.embed_model,
+                VECTOR_TABLE_NAME,
+                query,
+                k,
+                target_accuracy=target_accuracy,
+                distance_strategy=DISTANCE_STRATEGY,
+            )
+
         v_store = OracleVS(
             conn,
             self.embed_model,
@@ -254,68 +1087,122 @@ class SchemaManager23AI(SchemaManager):
             distance_strategy=DISTANCE_STRATEGY,
         )
 
-        # get TOP_K tables (step1)
-        results = v_store.similarity_search(query, k=TOP_K)
+        # get k tables (step1), with distances
+        results = v_store.similarity_search_with_score(query, k=k)
+
+        return [
+            (doc, distance_to_similarity(distance, DISTANCE_STRATEGY))
+            for doc, distance in results
+        ]
+
+    def _search_tables(self, query, target_accuracy=None):
+        """
+        return the TOP_K documents (tables) closer to the query, with the
+        similarity: list of (Document, score)
+        from the hybrid retriever or the in-process index if enabled,
+        otherwise from 23AI (target_accuracy is used only here)
+
+        with ENABLE_ADAPTIVE_TOP_K the number of tables is not fixed:
+        ADAPTIVE_TOP_K_MAX are retrieved and then cut (see adaptive_top_k.py)
+        """
+        k = ADAPTIVE_TOP_K_MAX if ENABLE_ADAPTIVE_TOP_K else TOP_K
+
+        if self.hybrid_retriever is not None:
+            results = self.hybrid_retriever.search_with_scores(query, k)
+        elif self.vector_index is not None:
+            results = self.vector_index.search_with_scores(query, k)
+        else:
+            # here we connect to vector not data schema
+            with self._get_vector_db_connection() as conn:
+                results = self._similarity_search_with_scores(
+                    query, conn, target_accuracy, k
+                )
+
+        if ENABLE_ADAPTIVE_TOP_K:
+            results = select_adaptive_top_k(results)
+            self.logger.info("Adaptive TOP_K: %s tables selected", len(results))
 
         return results
 
-    def get_restricted_schema(self, query):
+    def get_restricted_schema(self, query, target_accuracy=None):
         """
         Returns the portion of the schema relevant to the user query, based on similarity search.
 
         query: the user request in NL
+        target_accuracy: for the approximate search in 23AI (see _similarity_search)
         """
         # find TOP_N table summaries closer to query
         # this way we identify relevant tables for the query
         # step1: similarity search: returns TOP_K
         # step2: rerank, using LLM and returns TOP_N
+        #   (skipped if the rerank gate finds the retrieval confident)
         try:
-            # here we connect to vector not data schema
-            with self._get_vector_db_connection() as conn:
-
-                results = self._similarity_search(query, conn)
-
-                # now generate the portion of schema with the retrieved tables
+            scored_results = self._search_tables(query, target_accuracy)
+            results = [doc for doc, _ in scored_results]
 
-                # step 1: TOP_K
-                restricted_schema_parts = []
-
-                self.logger.info("Identifying relevant tables for query...")
-                for doc in results:
-                    table_name = doc.metadata.get("table")
-                    self.logger.info("- %s", table_name)
-
-                    # retrieve the portion of schema for the table
-                    table_chunk = doc.metadata.get("table_chunk")
-
-                    if table_chunk:
-                        restricted_schema_parts.append(table_chunk)
-                    else:
-                        self.logger.warning("No chunk found for table %s", table_name)
-
-                # Join the accumulated chunks into a single string
-                restricted_schema = "".join(restricted_schema_parts)
+            n_selected = None
+            if ENABLE_RERANKING and self.rerank_gate is not None:
+                n_selected = self.rerank_gate.select(
+                    [score for _, score in scored_results]
+                )
+            skip_rerank = n_selected is not None and not self.rerank_gate.should_audit()
+
+            if skip_rerank:
+                self.logger.info("Retrieval confident, reranking skipped")
+                results = results[:n_selected]
+
+            # now generate the portion of schema with the retrieved tables
+
+            # step 1: TOP_K
+            restricted_schema_parts = []
+
+            self.logger.info("Identifying relevant tables for query...")
+            for doc in results:
+                table_name = doc.metadata.get("table")
+                self.logger.info("- %s", table_name)
+
+                # retrieve the portion of schema for the table
+                table_chunk = doc.metadata.get("table_chunk")
+
+                if table_chunk:
+                    restricted_schema_parts.append(table_chunk)
+                else:
+                    self.logger.warning("No chunk found for table %s", table_name)
+
+            # Join the accumulated chunks into a single string
+            restricted_schema = "".join(restricted_schema_parts)
+
+            # added this part (20/09) for reranking table list
+            if ENABLE_RERANKING and not skip_rerank and len(restricted_schema) > 0:
+                # step2
+                restricted_schema2_parts = []
+                # rerank  and restrict (call LLM)
+                # with adaptive TOP_K the tables selected can be more than TOP_N
+                top_n = max(TOP_N, len(results)) if ENABLE_ADAPTIVE_TOP_K else TOP_N
+                table_top_n_list = self._rerank_table_list(
+                    query, restricted_schema, top_n, self.get_schema_version()
+                )
 
-                # added this part (20/09) for reranking table list
-                if ENABLE_RERANKING and len(restricted_schema) > 0:
-                    # step2
-                    restricted_schema2_parts = []
-                    # rerank  and restrict (call LLM)
-                    table_top_n_list = self._rerank_table_list(query, restricted_schema)
+                self.logger.info("Reranker result:")
+                self.logger.info(table_top_n_list)
+                self.logger.info("")
 
-                    self.logger.info("Reranker result:")
-                    self.logger.info(table_top_n_list)
-                    self.logger.info("")
+                if n_selected is not None:
+                    # audit of a confident result
+                    self.rerank_gate.record_audit(
+                        [doc.metadata.get("table") for doc in results[:n_selected]],
+                        table_top_n_list,
+                    )
 
-                    for table_name in table_top_n_list:
-                        # find the table chunk
-                        for doc in results:
-                            if doc.metadata.get("table") == table_name.upper():
-                                table_chunk = doc.metadata.get("table_chunk")
-                                restricted_schema2_parts.append(table_chunk)
-                                break
+                for table_name in table_top_n_list:
+                    # find the table chunk
+                    for doc in results:
+                        if doc.metadata.get("table") == table_name.upper():
+                            table_chunk = doc.metadata.get("table_chunk")
+                            restricted_schema2_parts.append(table_chunk)
+                            break
 
-                    restricted_schema = "".join(restricted_schema2_parts)
+                restricted_schema = "".join(restricted_schema2_parts)
 
         except Exception as e:
             self._handle_exception(e, "Error in SchemaManager:get_restricted_schema...")
@@ -334,5 +1221,5 @@ class SchemaManager23AI(SchemaManager):
         self.logger.error("Error in %s: %s", context, e)
 
     def _get_vector_db_connection(self):
-        """Return a database connection to the vector store."""
-        return oracledb.connect(**CONNECT_ARGS_VECTOR)
+        """Return a database connection (from the pool) to the vector store."""
+        return get_connection(VECTOR_POOL)
@@ -0,0 +1,196 @@
+"""
+File name: schema_vector_index.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide a class to handle an in-process copy of the
+    Vector Store with the table summaries (VECTOR_TABLE_NAME)
+
+    The table has only hundreds/thousands of rows: all the embeddings are
+    loaded in a single float32 matrix (normalized, for cosine similarity)
+    and the search of the TOP_K tables is a matrix-vector product plus
+    argpartition, without a connection to the DB.
+    The index is reloaded when the version of the vector table changes
+    (see SchemaManager23AI:get_schema_version).
+
+Inspired by:
+
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        vector_index = SchemaVectorIndex(get_connection, get_version, embed_model, logger)
+        docs = vector_index.search(user_request, k=TOP_K)
+        docs_and_scores = vector_index.search_with_scores(user_request, k=TOP_K)
+
+Dependencies:
+    numpy
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+    The ranking is by cosine similarity: it is the same of the Vector Store
+    for COSINE (and for DOT, EUCLIDEAN with normalized embeddings).
+"""
+
+import json
+import time
+import threading
+import numpy as np
+from langchain.docstore.document import Document
+
+from config import VECTOR_TABLE_NAME
+
+
+class SchemaVectorIndex:
+    """
+    In memory index of the rows of the vector table
+
+    Loaded lazily at the first search, the data are replaced
+    (never modified) on refresh: searches in progress are not affected
+    """
+
+    def __init__(self, get_connection, get_version, embed_model, logger):
+        """
+        get_connection: returns a connection to the vector schema
+        get_version: returns the version of the vector table
+        """
+        self.get_connection = get_connection
+        self.get_version = get_version
+        self.embed_model = embed_model
+        self.logger = logger
+
+        # (matrix, docs): row i of the matrix is the embedding of docs[i]
+        # a single attribute, so that a refresh replaces both atomically
+        self.data = (None, [])
+        self.version = None
+        self.loaded = False
+
+        # only one thread reloads the index
+        self.load_lock = threading.Lock()
+
+        self.stats = {"loads": 0, "searches": 0, "last_load_sec": None}
+
+    def search(self, query, k):
+        """
+        return the Documents (content and metadata) of the k rows
+        most similar to the query, ordered by similarity
+        """
+        return [doc for doc, _ in self.search_with_scores(query, k)]
+
+    def search_with_scores(self, query, k):
+        """
+        return the list of (Document, cosine similarity) for the k rows
+        most similar to the query, ordered by similarity
+        """
+        self._refresh_if_needed()
+
+        matrix, docs = self.data
+
+        if matrix is None or len(docs) == 0:
+            return []
+
+        embedding = np.asarray(self.embed_model.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        if norm > 0:
+            embedding /= norm
+
+        similarities = matrix @ embedding
+
+        k = min(k, len(docs))
+        if k < len(docs):
+            top_k = np.argpartition(-similarities, k - 1)[:k]
+        else:
+            top_k = np.arange(len(docs))
+        top_k = top_k[np.argsort(-similarities[top_k])]
+
+        self.stats["searches"] += 1
+
+        return [(docs[i], float(similarities[i])) for i in top_k]
+
+    def load(self):
+        """
+        read all the rows of the vector table and build the matrix
+        """
+        start_time = time.time()
+
+        # read before the data: if it changes during the load, the next
+        # search will reload
+        version = self.get_version()
+
+        docs = []
+        embeddings = []
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.arraysize = 1000
+            cursor.execute(f"SELECT text, metadata, embedding FROM {VECTOR_TABLE_NAME}")
+
+            for text, metadata, embedding in cursor:
+                text = text.read() if hasattr(text, "read") else text
+                metadata = metadata.read() if hasattr(metadata, "read") else metadata
+                if isinstance(metadata, (str, bytes)):
+                    metadata = json.loads(metadata)
+
+                docs.append(Document(page_content=text, metadata=metadata))
+                embeddings.append(np.asarray(embedding, dtype=np.float32))
+
+            cursor.close()
+
+        matrix = np.vstack(embeddings) if embeddings else None
+        if matrix is not None:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix /= norms
+
+        self.data = (matrix, docs)
+        self.version = version
+        self.loaded = True
+
+        self.stats["loads"] += 1
+        self.stats["last_load_sec"] = round(time.time() - start_time, 3)
+
+        self.logger.info(
+            "Schema vector index loaded: %s rows (version %s)", len(docs), version
+        )
+
+    def get_docs(self):
+        """
+        return the Documents (content and metadata) in the index
+        """
+        return self.data[1]
+
+    def get_index_info(self):
+        """
+        get info on the index: size, version and number of loads and searches
+        """
+        return {
+            "entries": len(self.data[1]),
+            "version": self.version,
+            **self.stats,
+        }
+
+    #
+    # Helper
+    #
+    def _refresh_if_needed(self):
+        """
+        load the index at first use, and when the version changes
+        """
+        if self.loaded and self.get_version() == self.version:
+            return
+
+        with self.load_lock:
+            # check again: another thread could have reloaded
+            if self.loaded and self.get_version() == self.version:
+                return
+
+            self.load()
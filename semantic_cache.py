@@ -0,0 +1,223 @@
+"""
+File name: semantic_cache.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide a class to handle a semantic (similarity based) index
+    on the requests in the RequestCache.
+
+    It is the second tier of the SQL cache: if the request is not found
+    as it is, we search the most similar request (cosine similarity of the
+    embeddings) between the requests already translated with success.
+    Only the requests of the same user_group_id (RBAC) are compared.
+
+    The index is in memory, in every process: it contains the requests
+    translated by this process since its start, also when the RequestCache
+    is persistent (sqlite backend, shared between workers).
+
+Inspired by:
+
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        sem_cache = SemanticCache(embed_model, logger)
+        request_found = sem_cache.search(user_request)
+
+Dependencies:
+    numpy
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+"""
+
+import threading
+import numpy as np
+
+from config import (
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+)
+
+
+class SemanticCache:
+    """
+    In memory index of the embeddings of the cached requests
+
+    Embeddings are normalized and stored in a single float32 matrix,
+    so that the search is a single matrix-vector product
+    """
+
+    def __init__(
+        self,
+        embed_model,
+        logger,
+        threshold=SEMANTIC_CACHE_THRESHOLD,
+        max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+    ):
+        self.embed_model = embed_model
+        self.logger = logger
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        # row i of the matrix is the embedding of requests[i],
+        # a (request_nl, user_group_id) key
+        self.matrix = None
+        self.requests = []
+        self.positions = {}
+
+        self.lock = threading.RLock()
+
+        self.stats = {"searches": 0, "hits": 0, "embed_errors": 0}
+
+    def search(self, request_nl, user_group_id=None):
+        """
+        return (request, similarity) for the most similar request of the group
+        in the index if similarity >= threshold, otherwise None
+        """
+        with self.lock:
+            if len(self.requests) == 0:
+                return None
+
+        embedding = self.get_embedding(request_nl)
+
+        if embedding is None:
+            return None
+
+        with self.lock:
+            self.stats["searches"] += 1
+
+            n_rows = len(self.requests)
+            if n_rows == 0:
+                return None
+
+            # cosine similarity: vectors are normalized
+            similarities = self.matrix[:n_rows] @ embedding
+            # requests of other groups are never returned
+            in_group = np.array(
+                [group_id == user_group_id for _, group_id in self.requests]
+            )
+            similarities = np.where(in_group, similarities, -np.inf)
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+
+            if similarity < self.threshold:
+                return None
+
+            self.stats["hits"] += 1
+            return self.requests[best][0], similarity
+
+    def add(self, request_nl, user_group_id=None):
+        """
+        add a request (translated with success) to the index
+        """
+        key = (request_nl, user_group_id)
+
+        with self.lock:
+            if key in self.positions:
+                return
+
+        embedding = self.get_embedding(request_nl)
+
+        if embedding is None:
+            return
+
+        with self.lock:
+            if key in self.positions:
+                return
+
+            if len(self.requests) >= self.max_entries:
+                # remove the oldest (dict keeps insertion order)
+                self._remove_at(self.positions[next(iter(self.positions))])
+
+            n_rows = len(self.requests)
+            self._ensure_capacity(n_rows + 1, embedding.shape[0])
+
+            self.matrix[n_rows] = embedding
+            self.requests.append(key)
+            self.positions[key] = n_rows
+
+    def remove(self, request_nl, user_group_id=None):
+        """
+        remove a request from the index (for example, evicted from the cache)
+        """
+        key = (request_nl, user_group_id)
+
+        with self.lock:
+            if key in self.positions:
+                self._remove_at(self.positions[key])
+
+    def get_embedding(self, request_nl):
+        """
+        return the normalized embedding (float32) for the request
+
+        the embeddings of the last requests are cached by the
+        embedding service (see embedding_service.py)
+        """
+        try:
+            embedding = np.asarray(
+                self.embed_model.embed_query(request_nl), dtype=np.float32
+            )
+        except Exception as e:
+            self.logger.error("Error in SemanticCache:get_embedding: %s", e)
+            with self.lock:
+                self.stats["embed_errors"] += 1
+            return None
+
+        norm = np.linalg.norm(embedding)
+        if norm > 0:
+            embedding /= norm
+
+        return embedding
+
+    def get_cache_info(self):
+        """
+        get info on the index: size, threshold and hits
+        """
+        with self.lock:
+            return {
+                "entries": len(self.requests),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                **self.stats,
+            }
+
+    #
+    # Helper
+    #
+    def _ensure_capacity(self, n_rows, dim):
+        """
+        grow the matrix (doubling) to contain at least n_rows
+        """
+        if self.matrix is None:
+            self.matrix = np.zeros((max(n_rows, 16), dim), dtype=np.float32)
+        elif self.matrix.shape[0] < n_rows:
+            new_matrix = np.zeros(
+                (max(n_rows, 2 * self.matrix.shape[0]), dim), dtype=np.float32
+            )
+            new_matrix[: len(self.requests)] = self.matrix[: len(self.requests)]
+            self.matrix = new_matrix
+
+    def _remove_at(self, position):
+        """
+        remove the row in position, moving the last row in its place
+        """
+        last = len(self.requests) - 1
+        removed = self.requests[position]
+
+        if position != last:
+            self.matrix[position] = self.matrix[last]
+            self.requests[position] = self.requests[last]
+            self.positions[self.requests[position]] = position
+
+        self.requests.pop()
+        del self.positions[removed]
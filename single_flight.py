@@ -0,0 +1,106 @@
+"""
+File name: single_flight.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide a class to deduplicate concurrent identical requests
+
+    When the same request (same key) arrives while the first one
+    is still in progress, the new caller doesn't start a new computation:
+    it waits for the first one and shares its result (or its exception).
+
+Inspired by:
+    the singleflight package in Go
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        single_flight = SingleFlight()
+        result = single_flight.do(key, func, arg1, arg2)
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+"""
+
+import threading
+
+
+class _Call:
+    """
+    A computation in progress
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.n_waiting = 0
+
+
+class SingleFlight:
+    """
+    Registry of the computations in progress, by key
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+        self.stats = {"executed": 0, "shared": 0}
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        execute func(*args, **kwargs), unless a computation with the same key
+        is in progress: in this case wait and return its result
+        """
+        with self.lock:
+            call = self.calls.get(key)
+
+            if call is not None:
+                call.n_waiting += 1
+                self.stats["shared"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self.calls[key] = call
+                self.stats["executed"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+        return call.result
+
+    def get_stats(self):
+        """
+        return the number of computations executed, shared and in progress
+        """
+        with self.lock:
+            return {
+                **self.stats,
+                "in_flight": len(self.calls),
+                "waiting": sum(call.n_waiting for call in self.calls.values()),
+            }
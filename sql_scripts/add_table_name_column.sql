@@ -0,0 +1,8 @@
+-- Indexed column with the name of the table, for the vector table (ex: SCHEMA_VECTORS)
+-- Added automatically by SchemaManager23AI at load/update, this script is for existing tables
+ALTER TABLE SCHEMA_VECTORS ADD (
+    TABLE_NAME VARCHAR2(128) GENERATED ALWAYS AS
+        (json_value(METADATA, '$.table' RETURNING VARCHAR2(128))) VIRTUAL   -- Name of the table described by the row
+);
+
+CREATE INDEX SCHEMA_VECTORS_TNAME_IDX ON SCHEMA_VECTORS (TABLE_NAME);
@@ -0,0 +1,8 @@
+-- Version of the vector tables, read by the API to reload index and caches
+-- Created automatically at the first load/update (SchemaManager23AI)
+CREATE TABLE SCHEMA_VECTORS_VERSION (
+    vector_table_name VARCHAR2(128) NOT NULL,   -- Name of the vector table (ex: SCHEMA_VECTORS)
+    version NUMBER DEFAULT 0 NOT NULL,          -- Incremented at every load/update of the vector table
+    updated_at TIMESTAMP DEFAULT SYSTIMESTAMP,  -- Time of the last load/update
+    CONSTRAINT schema_vectors_version_pk PRIMARY KEY (vector_table_name)
+);
@@ -0,0 +1,18 @@
+-- Vector indexes on the vector tables (ex: SCHEMA_VECTORS, POLICIES_COLLECTION)
+-- Created automatically at load by SchemaManager23AI if VECTOR_INDEX_TYPE is set
+-- in config.py (for POLICIES_COLLECTION see AIRAGAgent:ensure_vector_index);
+-- this script is for existing tables
+
+-- HNSW: in-memory neighbor graph (needs VECTOR_MEMORY_SIZE > 0)
+CREATE VECTOR INDEX SCHEMA_VECTORS_VIDX ON SCHEMA_VECTORS (embedding)
+    ORGANIZATION INMEMORY NEIGHBOR GRAPH
+    DISTANCE COSINE
+    WITH TARGET ACCURACY 95
+    PARAMETERS (TYPE HNSW, NEIGHBORS 32, EFCONSTRUCTION 300);
+
+-- IVF: neighbor partitions (on disk)
+CREATE VECTOR INDEX POLICIES_COLLECTION_VIDX ON POLICIES_COLLECTION (embedding)
+    ORGANIZATION NEIGHBOR PARTITIONS
+    DISTANCE COSINE
+    WITH TARGET ACCURACY 95
+    PARAMETERS (TYPE IVF);
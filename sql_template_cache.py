@@ -0,0 +1,310 @@
+"""
+File name: sql_template_cache.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide a class to handle a cache of parameterized SQL templates
+
+    Many requests differ only in literal values (years, top-N, names...),
+    for example:
+        "list the absences started in 2017"
+        "list the absences started in 2018"
+    The request (NL) and the generated SQL are normalized in templates,
+    where literals are replaced by slots. If a new request has the same
+    template, the new literals are bound in the SQL template and the
+    resulting SQL is validated against the DB: no LLM calls.
+
+    Literals handled: numbers and strings enclosed in quotes.
+
+Inspired by:
+
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        template_cache = SQLTemplateCache(logger)
+        sql = template_cache.get_sql(user_request, db_manager.test_query_syntax)
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+from config import TEMPLATE_CACHE_MAX_ENTRIES
+
+# literals in the NL request: quoted strings or numbers
+LITERAL_PATTERN = re.compile(
+    r"'(?P<s1>[^']+)'|\"(?P<s2>[^\"]+)\"|"
+    r"(?<![\w.])(?P<num>\d+(?:\.\d+)?)(?!\w|\.\d)"
+)
+
+# numbers in SQL
+SQL_NUMBER_PATTERN = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?!\w|\.\d)")
+
+# string literals in SQL
+SQL_STRING_PATTERN = re.compile(r"'(?:[^']|'')*'")
+
+# numbers with a single digit are too common in SQL (GROUP BY 1, ROWNUM = 1...)
+# they're accepted only if they're found once in the SQL
+MIN_AMBIGUOUS_LEN = 2
+
+NUMBER_TYPE = "N"
+STRING_TYPE = "S"
+
+
+def extract_literals(request_nl):
+    """
+    normalize the request and extract literals
+
+    return (template, literals) where literals is a list of (type, value)
+    """
+    literals = []
+
+    def to_slot(match):
+        if match.group("num") is not None:
+            literals.append((NUMBER_TYPE, match.group("num")))
+        else:
+            value = match.group("s1") or match.group("s2")
+            literals.append((STRING_TYPE, value))
+        return "{" + literals[-1][0] + "}"
+
+    template = LITERAL_PATTERN.sub(to_slot, request_nl)
+
+    # normalize case, blanks and final punctuation
+    template = " ".join(template.lower().split()).rstrip(" .?!;")
+
+    return template, literals
+
+
+class SQLTemplate:
+    """
+    A SQL query where literals are replaced by slots
+
+    parts: list of str (fixed text) and tuples (slot_index, case)
+    case is: "upper", "lower" or None (as in request)
+    """
+
+    def __init__(self, parts, literal_types):
+        self.parts = parts
+        self.literal_types = literal_types
+
+    def bind(self, literals):
+        """
+        return the SQL with the given literals in slots
+        """
+        sql_parts = []
+        for part in self.parts:
+            if isinstance(part, str):
+                sql_parts.append(part)
+            else:
+                slot_index, case = part
+                value = literals[slot_index][1]
+
+                if case == "upper":
+                    value = value.upper()
+                elif case == "lower":
+                    value = value.lower()
+                if literals[slot_index][0] == STRING_TYPE:
+                    # escape for SQL string literal
+                    value = value.replace("'", "''")
+
+                sql_parts.append(value)
+
+        return "".join(sql_parts)
+
+
+def build_sql_template(sql_query, literals):
+    """
+    Replace the literals of the request in the SQL query with slots
+
+    return a SQLTemplate, None if the SQL can't be parameterized
+    (a literal not found in SQL or ambiguous)
+    """
+    values = [value for _, value in literals]
+
+    # two slots with the same value: we don't know which is which
+    if len(set(v.lower() for v in values)) != len(values):
+        return None
+
+    # strings are searched only inside SQL string literals
+    string_spans = [m.span() for m in SQL_STRING_PATTERN.finditer(sql_query)]
+    sql_numbers = list(SQL_NUMBER_PATTERN.finditer(sql_query))
+
+    matches = []
+    for slot_index, (l_type, value) in enumerate(literals):
+        if l_type == NUMBER_TYPE:
+            found = [m for m in sql_numbers if m.group() == value]
+
+            # a value derived from the literal (ex: year + 1 as upper bound
+            # of a range, ROWNUM < N + 1) can't be bound
+            if _has_derived_number(value, sql_numbers):
+                return None
+        else:
+            found = [
+                match
+                for match in re.finditer(re.escape(value), sql_query, re.IGNORECASE)
+                if any(
+                    start < match.start() and match.end() < end
+                    for start, end in string_spans
+                )
+            ]
+
+        if len(found) == 0:
+            return None
+        if len(value) < MIN_AMBIGUOUS_LEN and len(found) > 1:
+            return None
+
+        for match in found:
+            matches.append((match.start(), match.end(), slot_index))
+
+    matches.sort()
+
+    parts = []
+    last_end = 0
+    for start, end, slot_index in matches:
+        if start < last_end:
+            # overlapping literals
+            return None
+
+        parts.append(sql_query[last_end:start])
+        parts.append((slot_index, _get_case(sql_query[start:end], values[slot_index])))
+        last_end = end
+    parts.append(sql_query[last_end:])
+
+    return SQLTemplate(parts, [l_type for l_type, _ in literals])
+
+
+def _has_derived_number(value, sql_numbers):
+    """
+    check if the SQL contains value + 1 or value - 1
+    """
+    if "." in value:
+        return False
+
+    derived = {str(int(value) + 1), str(int(value) - 1)}
+    return any(match.group() in derived for match in sql_numbers)
+
+
+def _get_case(text_in_sql, value):
+    """
+    how the literal has been transformed in SQL
+    """
+    if text_in_sql == value:
+        return None
+    if text_in_sql == value.upper():
+        return "upper"
+    if text_in_sql == value.lower():
+        return "lower"
+    return None
+
+
+class SQLTemplateCache:
+    """
+    In memory cache of SQL templates, the key is
+    (template of the request, user_group_id)
+
+    bounded, with LRU eviction
+    """
+
+    def __init__(self, logger, max_entries=TEMPLATE_CACHE_MAX_ENTRIES):
+        self.logger = logger
+        self.max_entries = max_entries
+
+        self.cache = OrderedDict()
+        self.lock = threading.RLock()
+
+        self.stats = {
+            "lookups": 0,
+            "hits": 0,
+            "substitution_failures": 0,
+            "templates_stored": 0,
+            "not_parameterizable": 0,
+        }
+
+    def get_sql(self, request_nl, validate_func, user_group_id=None):
+        """
+        return the SQL for the request, binding the literals in a cached
+        template, None if not found or if the SQL is not valid
+
+        validate_func: function to check the SQL (ex: test_query_syntax)
+        """
+        template, literals = extract_literals(request_nl)
+
+        # requests without literals are handled by the request cache
+        if len(literals) == 0:
+            return None
+
+        with self.lock:
+            self.stats["lookups"] += 1
+            sql_template = self.cache.get((template, user_group_id))
+
+            if sql_template is None:
+                return None
+            self.cache.move_to_end((template, user_group_id))
+
+        if [l_type for l_type, _ in literals] != sql_template.literal_types:
+            return None
+
+        sql_query = sql_template.bind(literals)
+
+        if not validate_func(sql_query):
+            self.logger.info("SQL from template not valid, removing template...")
+            with self.lock:
+                self.stats["substitution_failures"] += 1
+                self.cache.pop((template, user_group_id), None)
+            return None
+
+        with self.lock:
+            self.stats["hits"] += 1
+
+        self.logger.info("")
+        self.logger.info("Found request template in cache...")
+
+        return sql_query
+
+    def add(self, request_nl, sql_query, user_group_id=None):
+        """
+        store the template for the request and the generated SQL
+        (only if the SQL has been generated with success)
+        """
+        template, literals = extract_literals(request_nl)
+
+        if len(literals) == 0:
+            return
+
+        sql_template = build_sql_template(sql_query, literals)
+
+        with self.lock:
+            if sql_template is None:
+                self.stats["not_parameterizable"] += 1
+                return
+
+            self.cache[(template, user_group_id)] = sql_template
+            self.cache.move_to_end((template, user_group_id))
+            self.stats["templates_stored"] += 1
+
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+
+    def get_cache_info(self):
+        """
+        get info on the template cache: size, hits and failures
+        """
+        with self.lock:
+            return {
+                "entries": len(self.cache),
+                "max_entries": self.max_entries,
+                **self.stats,
+            }
@@ -0,0 +1,131 @@
+"""
+File name: summary_cache.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide a class to handle a persistent (on disk) cache
+    of the summaries of tables generated by the LLM.
+
+    A summary is a function only of: table chunk, sample queries,
+    prompt and model. The key is the hash of these inputs
+    (content addressed), so an entry is never stale: if something changes
+    the key changes. Re-running the load of the Vector Store (after an error,
+    or changing only the embedding model) doesn't call the LLM for
+    unchanged tables.
+
+Inspired by:
+
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        summary_cache = SummaryCache(logger)
+        key = summary_cache.make_key(table_chunk, sample_queries, prompt, model_id)
+        summary = summary_cache.get(key)
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+from config import SUMMARY_CACHE_DIR
+
+
+class SummaryCache:
+    """
+    Cache of table summaries: one JSON file for each entry,
+    named by the hash of the inputs
+    """
+
+    def __init__(self, logger, cache_dir=SUMMARY_CACHE_DIR):
+        self.logger = logger
+        self.cache_dir = cache_dir
+
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "errors": 0}
+
+    def make_key(self, table_chunk, sample_queries, prompt, model_id):
+        """
+        the key: sha256 of all the inputs of the summary
+        """
+        key_data = json.dumps(
+            {
+                "table_chunk": table_chunk,
+                "sample_queries": sample_queries,
+                "prompt": prompt,
+                "model_id": model_id,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        return the cached summary, None if not found
+        """
+        try:
+            with open(self._get_path(key), "r", encoding="UTF-8") as file:
+                summary = json.load(file)["summary"]
+
+            self._count("hits")
+            return summary
+
+        except FileNotFoundError:
+            self._count("misses")
+        except Exception as e:
+            self.logger.error("Error in SummaryCache:get: %s", e)
+            self._count("errors")
+
+        return None
+
+    def put(self, key, summary):
+        """
+        store the summary (atomic: write to a temp file and rename)
+        """
+        path = self._get_path(key)
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="UTF-8") as file:
+                json.dump({"summary": summary}, file)
+            os.replace(tmp_path, path)
+
+            self._count("stored")
+
+        except Exception as e:
+            self.logger.error("Error in SummaryCache:put: %s", e)
+            self._count("errors")
+
+    def get_cache_info(self):
+        """
+        get info on the cache: hits, misses, entries stored
+        """
+        with self.lock:
+            return {"cache_dir": self.cache_dir, **self.stats}
+
+    #
+    # Helper
+    #
+    def _get_path(self, key):
+        # two levels, to avoid too many files in a single dir
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def _count(self, counter):
+        with self.lock:
+            self.stats[counter] += 1
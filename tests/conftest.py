@@ -0,0 +1,38 @@
+"""
+Shared setup of the unit tests (no DB needed)
+
+run with pytest, from this directory (see set_pythonpath.sh)
+"""
+
+import os
+import sys
+import logging
+
+import pytest
+from langchain.docstore.document import Document
+
+# the modules to test are in the parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def logger():
+    return logging.getLogger("tests")
+
+
+@pytest.fixture
+def make_table_doc():
+    """
+    return a function to build the Document of a table, as in the Vector Store
+    """
+
+    def _make_table_doc(table_name, summary="", table_chunk=None):
+        return Document(
+            page_content=table_name + "\nSummary:\n" + summary,
+            metadata={
+                "table": table_name,
+                "table_chunk": table_chunk or f"CREATE TABLE {table_name}",
+            },
+        )
+
+    return _make_table_doc
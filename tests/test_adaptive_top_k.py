@@ -0,0 +1,71 @@
+"""
+Test the adaptive selection of TOP_K
+"""
+
+import pytest
+
+from adaptive_top_k import find_knee, select_adaptive_top_k
+
+
+@pytest.fixture
+def make_docs_and_scores(make_table_doc):
+    def _make_docs_and_scores(scores, chunk_len=40):
+        return [
+            (make_table_doc(f"T{i}", table_chunk="x" * chunk_len), score)
+            for i, score in enumerate(scores)
+        ]
+
+    return _make_docs_and_scores
+
+
+def test_knee_at_largest_drop():
+    assert find_knee([0.9, 0.88, 0.5, 0.48, 0.47], min_k=1, min_gap=0.05) == 2
+
+
+def test_flat_scores_have_no_knee():
+    assert find_knee([0.6, 0.59, 0.58, 0.57], min_k=1, min_gap=0.05) is None
+
+
+def test_knee_not_before_min_k():
+    assert find_knee([0.9, 0.4, 0.39, 0.1], min_k=2, min_gap=0.05) == 3
+
+
+def test_too_few_candidates():
+    assert find_knee([0.8], min_k=1, min_gap=0.05) is None
+    assert find_knee([], min_k=1, min_gap=0.05) is None
+
+
+def test_zero_scores():
+    assert find_knee([0.7, 0.0, 0.0], min_k=1, min_gap=0.05) == 1
+    assert find_knee([0.0, 0.0, 0.0], min_k=1, min_gap=0.05) is None
+
+
+def test_tables_after_the_knee_are_dropped(make_docs_and_scores):
+    selected = select_adaptive_top_k(
+        make_docs_and_scores([0.9, 0.88, 0.5, 0.48]),
+        min_k=1,
+        max_k=10,
+        min_gap=0.05,
+        token_budget=10000,
+    )
+
+    assert [doc.metadata["table"] for doc, _ in selected] == ["T0", "T1"]
+
+
+def test_token_budget_keeps_min_k(make_docs_and_scores):
+    # flat scores (no knee), each chunk is about 11 tokens
+    selected = select_adaptive_top_k(
+        make_docs_and_scores([0.6, 0.59, 0.58, 0.57]),
+        min_k=2,
+        max_k=10,
+        min_gap=0.05,
+        token_budget=5,
+    )
+
+    assert len(selected) == 2
+
+
+def test_lexical_only_tables_are_not_cut():
+    # None: table found only by BM25, the knee can only be after it
+    assert find_knee([0.9, None, 0.3, 0.2], min_k=1, min_gap=0.05) == 2
+    assert find_knee([0.9, 0.3, None], min_k=1, min_gap=0.05) is None
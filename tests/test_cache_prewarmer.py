@@ -0,0 +1,123 @@
+"""
+Test the prewarm of the SQL cache
+"""
+
+import os
+import json
+from collections import Counter
+
+import pytest
+
+import cache_prewarmer
+from cache_prewarmer import CachePrewarmer, _rotate_log, log_request
+
+
+class FakeSchemaManager:
+    def read_samples_query(self):
+        return {"SALES": {"sample_queries": ["sales by year", "top customers"]}}
+
+
+class FakeSQLAgent:
+    """
+    requests in cached are in cache, the SQL of requests in failing is empty
+    """
+
+    def __init__(self, cached=(), failing=()):
+        self.cached = set(cached)
+        self.failing = set(failing)
+        self.schema_manager = FakeSchemaManager()
+
+    def get_sql_from_cache(self, user_request):
+        return "SELECT 1" if user_request in self.cached else None
+
+    def generate_sql_query(self, user_request):
+        if user_request == "boom":
+            raise RuntimeError("LLM not available")
+        return "" if user_request in self.failing else "SELECT 2"
+
+
+@pytest.fixture
+def samples_file(tmp_path, monkeypatch):
+    file_path = tmp_path / "sample_queries.json"
+    file_path.write_text(json.dumps([{"sample_queries": ["top customers", "costs"]}]))
+    monkeypatch.setattr(cache_prewarmer, "SAMPLES_FILE", str(file_path))
+    return file_path
+
+
+def make_prewarmer(tmp_path, ai_sql_agent, logger, **kwargs):
+    return CachePrewarmer(
+        ai_sql_agent,
+        logger,
+        log_file=str(tmp_path / "request_log.jsonl"),
+        lock_file=str(tmp_path / "prewarm.lock"),
+        **kwargs,
+    )
+
+
+def test_most_frequent_logged_requests_first(tmp_path, logger, samples_file):
+    prewarmer = make_prewarmer(tmp_path, FakeSQLAgent(), logger, max_requests=4)
+    for user_query in ["costs", "sales by year", "costs"]:
+        log_request(user_query, prewarmer.log_file)
+
+    # from the log, then from the samples file and table, without duplicates
+    assert prewarmer._collect_requests() == [
+        "costs",
+        "sales by year",
+        "top customers",
+    ]
+
+    prewarmer.max_requests = 2
+    assert prewarmer._collect_requests() == ["costs", "sales by year"]
+
+
+def test_outcomes_are_counted(tmp_path, logger, samples_file):
+    samples_file.write_text(json.dumps([{"sample_queries": ["costs", "boom"]}]))
+    ai_sql_agent = FakeSQLAgent(cached=["sales by year"], failing=["top customers"])
+    prewarmer = make_prewarmer(tmp_path, ai_sql_agent, logger)
+
+    prewarmer.start()
+    prewarmer.thread.join(5)
+
+    status = prewarmer.get_status()
+    assert prewarmer.is_warm()
+    assert status["state"] == "completed"
+    assert (status["total"], status["done"]) == (4, 4)
+    assert (status["generated"], status["already_cached"], status["failed"]) == (
+        1,
+        1,
+        2,
+    )
+
+
+def test_missing_samples_file_is_not_fatal(tmp_path, logger, monkeypatch):
+    monkeypatch.setattr(cache_prewarmer, "SAMPLES_FILE", str(tmp_path / "missing"))
+    prewarmer = make_prewarmer(tmp_path, FakeSQLAgent(), logger)
+
+    assert prewarmer._collect_requests() == ["sales by year", "top customers"]
+
+
+def test_rotated_log_is_still_read(tmp_path, logger):
+    prewarmer = make_prewarmer(tmp_path, FakeSQLAgent(), logger)
+    log_request("costs", prewarmer.log_file)
+
+    _rotate_log(prewarmer.log_file, max_bytes=1)
+    log_request("costs", prewarmer.log_file)
+
+    assert os.path.exists(prewarmer.log_file + ".1")
+    assert prewarmer._read_request_log() == Counter({"costs": 2})
+
+
+def test_prewarm_skipped_if_another_worker_has_the_lock(tmp_path, logger, samples_file):
+    other_worker = make_prewarmer(tmp_path, FakeSQLAgent(), logger)
+    lock_fd = other_worker._acquire_lock()
+    prewarmer = make_prewarmer(tmp_path, FakeSQLAgent(), logger)
+
+    try:
+        prewarmer.start()
+        prewarmer.thread.join(5)
+    finally:
+        os.close(lock_fd)
+
+    assert prewarmer.is_warm()
+    assert prewarmer.get_status()["state"] == "skipped"
+    assert prewarmer.get_status()["total"] == 0
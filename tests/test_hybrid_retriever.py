@@ -0,0 +1,105 @@
+"""
+Test BM25 and the rank fusion of the hybrid retriever
+"""
+
+from hybrid_retriever import BM25Index, HybridRetriever, tokenize
+
+
+class FakeVectorIndex:
+    """
+    in-process vector index with fixed results
+    """
+
+    def __init__(self, docs, results):
+        self.docs = docs
+        self.results = results
+        self.stats = {"loads": 1}
+
+    def get_docs(self):
+        return self.docs
+
+    def search(self, query, k):
+        return [doc for doc, _ in self.results[:k]]
+
+    def search_with_scores(self, query, k):
+        return self.results[:k]
+
+
+def test_identifiers_are_split():
+    assert tokenize("CUST_ID, Amount") == ["cust_id", "cust", "id", "amount"]
+
+
+def test_bm25_returns_only_matching_documents():
+    index = BM25Index()
+    index.set_document("SALES", "sales amount sold")
+    index.set_document("CUSTOMERS", "customers names and cities")
+
+    results = index.search("amount sold", k=10)
+
+    assert [doc_id for doc_id, _ in results] == ["SALES"]
+    assert results[0][1] > 0
+
+
+def test_bm25_without_matches():
+    index = BM25Index()
+    assert index.search("anything", k=5) == []
+
+    index.set_document("SALES", "sales amount")
+    assert index.search("weather", k=5) == []
+
+
+def test_bm25_removed_document():
+    index = BM25Index()
+    index.set_document("SALES", "sales amount")
+    index.remove_document("SALES")
+
+    assert len(index) == 0
+    assert index.search("sales", k=5) == []
+
+
+def test_table_found_only_by_bm25_is_added(logger, make_table_doc):
+    docs = [
+        make_table_doc("SALES", "sales by product"),
+        make_table_doc("PROMOTIONS", "promotions"),
+        make_table_doc("COSTS", "unit cost and price"),
+    ]
+    # COSTS is not in the vector results
+    vector_index = FakeVectorIndex(docs, [(docs[0], 0.62), (docs[1], 0.41)])
+    retriever = HybridRetriever(
+        vector_index, logger, vector_weight=1.0, lexical_weight=1.0, rrf_k=60
+    )
+
+    tables = [
+        doc.metadata["table"] for doc in retriever.search("unit_cost of sales", k=3)
+    ]
+
+    # in both rankings: first
+    assert tables[0] == "SALES"
+    assert set(tables) == {"SALES", "PROMOTIONS", "COSTS"}
+
+
+def test_k_limits_the_fused_results(logger, make_table_doc):
+    docs = [make_table_doc("SALES", "sales"), make_table_doc("COSTS", "costs")]
+    vector_index = FakeVectorIndex(docs, [(docs[0], 0.8), (docs[1], 0.5)])
+    retriever = HybridRetriever(vector_index, logger)
+
+    assert [doc.metadata["table"] for doc in retriever.search("sales", k=1)] == [
+        "SALES"
+    ]
+
+
+def test_lexical_only_table_has_no_score(logger, make_table_doc):
+    docs = [
+        make_table_doc("SALES", "sales by product"),
+        make_table_doc("PROMOTIONS", "promotions"),
+        make_table_doc("COSTS", "unit cost and price"),
+    ]
+    vector_index = FakeVectorIndex(docs, [(docs[0], 0.62), (docs[1], 0.41)])
+    retriever = HybridRetriever(vector_index, logger)
+
+    results = retriever.search_with_scores("unit_cost of sales", k=3)
+    scores = {doc.metadata["table"]: score for doc, score in results}
+
+    assert scores["SALES"] == 0.62
+    # never a 0.0 similarity, that would look like a confident gap
+    assert scores["COSTS"] is None
@@ -0,0 +1,79 @@
+"""
+Test the negative cache of failed requests
+"""
+
+import pytest
+
+import negative_cache
+from negative_cache import NegativeCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(negative_cache, "time", fake_clock)
+    return fake_clock
+
+
+def test_ttl_doubles_up_to_max_ttl(clock):
+    cache = NegativeCache(ttl=10, max_ttl=25, max_entries=10)
+
+    cache.add("q1")
+    clock.now = 9.9
+    assert cache.contains("q1")
+    clock.now = 10
+    assert not cache.contains("q1")
+
+    # second failure: 20 sec.
+    cache.add("q1")
+    clock.now = 29.9
+    assert cache.contains("q1")
+    clock.now = 30
+    assert not cache.contains("q1")
+
+    # third failure: 40 sec., limited to max_ttl
+    cache.add("q1")
+    clock.now = 54.9
+    assert cache.contains("q1")
+    clock.now = 55
+    assert not cache.contains("q1")
+
+
+def test_schema_change_clears_the_cache(clock):
+    cache = NegativeCache(ttl=10, max_ttl=100, max_entries=10)
+    cache.add("q1", schema_version=1)
+
+    # without a version (not known) the entries are kept
+    assert cache.contains("q1")
+    assert cache.contains("q1", schema_version=1)
+    assert not cache.contains("q1", schema_version=2)
+
+    cache_info = cache.get_cache_info()
+    assert cache_info["invalidations"] == 1
+    assert cache_info["schema_version"] == 2
+    assert cache_info["entries"] == 0
+
+
+def test_success_removes_the_request(clock):
+    cache = NegativeCache(ttl=10, max_ttl=100, max_entries=10)
+    cache.add("q1")
+    cache.remove("q1")
+
+    assert not cache.contains("q1")
+
+
+def test_oldest_request_dropped_when_full(clock):
+    cache = NegativeCache(ttl=10, max_ttl=100, max_entries=2)
+    for key in ["q1", "q2", "q3"]:
+        cache.add(key)
+
+    assert not cache.contains("q1")
+    assert cache.contains("q2") and cache.contains("q3")
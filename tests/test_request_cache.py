@@ -0,0 +1,129 @@
+"""
+Test the request cache, in memory and SQLite backends
+"""
+
+import sqlite3
+
+import pytest
+
+from request_cache import PersistentRequestCache, RequestCache
+
+
+def test_lru_eviction_after_lookup():
+    cache = RequestCache(max_entries=2, max_bytes=None, ttl=None)
+    cache.add_to_cache("q1", "SELECT 1")
+    cache.add_to_cache("q2", "SELECT 2")
+
+    # the lookup makes q1 the most recently used
+    assert cache.get_request_with_stats("q1") is not None
+    cache.add_to_cache("q3", "SELECT 3")
+
+    assert cache.get_request_with_stats("q2") is None
+    assert set(cache.get_all_stats()) == {"q1", "q3"}
+    assert cache.get_cache_info()["evictions"]["capacity"] == 1
+
+
+def test_memory_ceiling_keeps_last_entry():
+    cache = RequestCache(max_entries=None, max_bytes=1, ttl=None)
+    cache.add_to_cache("q1", "SELECT 1")
+    cache.add_to_cache("q2", "SELECT 2")
+
+    cache_info = cache.get_cache_info()
+
+    assert list(cache.get_all_stats()) == ["q2"]
+    assert cache_info["evictions"]["memory"] == 1
+    assert cache_info["approx_bytes"] > 0
+
+
+def test_expired_entry_is_removed():
+    cache = RequestCache(max_entries=None, max_bytes=None, ttl=0)
+    cache.add_to_cache("q1", "SELECT 1")
+
+    assert cache.get_request_with_stats("q1") is None
+    assert cache.get_cache_info()["entries"] == 0
+    assert cache.get_cache_info()["evictions"]["expired"] == 1
+
+
+def test_failure_keeps_the_last_good_sql():
+    cache = RequestCache(ttl=None)
+    cache.add_to_cache("q1", "SELECT 1", generation_time=2.0)
+    cache.add_to_cache("q1", "", success=False, generation_time=4.0)
+
+    stats = cache.get_request_with_stats("q1")
+
+    assert stats["sql"] == "SELECT 1"
+    assert (stats["success_count"], stats["failure_count"]) == (1, 1)
+    assert stats["average_generation_time"] == "3.0"
+
+
+def test_sqlite_entries_survive_reopen(tmp_path):
+    db_path = str(tmp_path / "request_cache.db")
+    PersistentRequestCache(db_path, ttl=None).add_to_cache("q1", "SELECT 1")
+
+    stats = PersistentRequestCache(db_path, ttl=None).get_request_with_stats("q1")
+
+    assert stats["sql"] == "SELECT 1"
+    assert stats["total_count"] == 1
+
+
+def test_sqlite_upsert_updates_stats(tmp_path):
+    cache = PersistentRequestCache(str(tmp_path / "request_cache.db"), ttl=None)
+    cache.add_to_cache("q1", "SELECT 1", generation_time=1.0)
+    cache.add_to_cache("q1", "", success=False, generation_time=3.0)
+
+    stats = cache.get_request_with_stats("q1")
+
+    assert stats["sql"] == "SELECT 1"
+    assert (stats["success_count"], stats["failure_count"]) == (1, 1)
+    assert stats["average_generation_time"] == "2.0"
+
+
+def test_sqlite_capacity_evicts_oldest(tmp_path):
+    cache = PersistentRequestCache(
+        str(tmp_path / "request_cache.db"), max_entries=2, max_bytes=None, ttl=None
+    )
+    for i in range(3):
+        cache.add_to_cache(f"q{i}", f"SELECT {i}")
+
+    assert set(cache.get_all_stats()) == {"q1", "q2"}
+    assert cache.get_cache_info()["evictions"]["capacity"] == 1
+
+
+def test_sqlite_expired_entry_not_returned(tmp_path):
+    cache = PersistentRequestCache(str(tmp_path / "request_cache.db"), ttl=0)
+    cache.add_to_cache("q1", "SELECT 1")
+
+    assert cache.get_request_with_stats("q1") is None
+    assert cache.get_all_stats() == {}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def any_cache(request, tmp_path):
+    if request.param == "memory":
+        return RequestCache(ttl=None)
+    return PersistentRequestCache(str(tmp_path / "request_cache.db"), ttl=None)
+
+
+def test_same_request_is_cached_per_group(any_cache):
+    any_cache.add_to_cache("q1", "SELECT 1", user_group_id=1)
+    any_cache.add_to_cache("q1", "SELECT 2", user_group_id=2)
+
+    assert any_cache.get_request_with_stats("q1", user_group_id=1)["sql"] == "SELECT 1"
+    assert any_cache.get_request_with_stats("q1", user_group_id=2)["sql"] == "SELECT 2"
+    assert any_cache.get_request_with_stats("q1") is None
+    assert set(any_cache.get_all_stats(user_group_id=2)) == {"q1"}
+
+
+def test_sqlite_table_without_group_is_rebuilt(tmp_path):
+    db_path = str(tmp_path / "request_cache.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE request_cache (request_nl TEXT PRIMARY KEY, sql TEXT)")
+    conn.execute("INSERT INTO request_cache VALUES ('q1', 'SELECT 1')")
+    conn.commit()
+    conn.close()
+
+    cache = PersistentRequestCache(db_path, ttl=None)
+    assert cache.get_request_with_stats("q1") is None
+
+    cache.add_to_cache("q1", "SELECT 1", user_group_id=1)
+    assert cache.get_request_with_stats("q1", user_group_id=1)["sql"] == "SELECT 1"
@@ -0,0 +1,46 @@
+"""
+Test the confidence gate of the table reranker
+"""
+
+import pytest
+
+from rerank_gate import RerankGate
+
+
+@pytest.fixture
+def gate(logger):
+    return RerankGate(logger, min_score=0.5, min_gap=0.15, max_selected=3)
+
+
+def test_cut_at_the_gap(gate):
+    assert gate._find_cut([0.82, 0.79, 0.41, 0.38]) == (2, "confident")
+
+
+def test_nothing_retrieved(gate):
+    assert gate._find_cut([]) == (None, "no_results")
+
+
+def test_one_candidate(gate):
+    # nothing after the cut: the gap is infinite
+    assert gate._find_cut([0.8]) == (1, "confident")
+    assert gate._find_cut([0.3]) == (None, "low_score")
+
+
+def test_all_scores_zero(gate):
+    assert gate._find_cut([0.0, 0.0]) == (None, "low_score")
+
+
+def test_gap_too_small(gate):
+    assert gate._find_cut([0.7, 0.65, 0.6, 0.55]) == (None, "small_gap")
+
+
+def test_gap_after_max_selected_is_ignored(gate):
+    # the best separation is after 4 tables, more than max_selected
+    assert gate._find_cut([0.9, 0.88, 0.86, 0.84, 0.3]) == (None, "small_gap")
+
+
+def test_lexical_only_candidate_forces_rerank(gate):
+    # a table found only by BM25 has no score: even a wide gap can't cut it
+    assert gate._find_cut([0.62, None, 0.41]) == (None, "lexical_only")
+    assert gate.select([0.62, None, 0.41]) is None
+    assert gate.get_gate_info()["lexical_only"] == 1
@@ -0,0 +1,85 @@
+"""
+Test the cache of query results
+"""
+
+from result_cache import ResultCache, extract_tables, normalize_sql
+
+
+def test_normalize_keeps_literals():
+    assert (
+        normalize_sql("select *\n  from Sales where country = 'Italy';")
+        == "SELECT * FROM SALES WHERE COUNTRY = 'Italy'"
+    )
+
+
+def test_tables_in_from_and_join():
+    sql_query = (
+        'SELECT * FROM sh.sales s, "COSTS" c '
+        "JOIN products p ON p.prod_id = s.prod_id "
+        "WHERE s.channel_id IN (SELECT channel_id FROM channels)"
+    )
+
+    assert extract_tables(sql_query) == {"SALES", "COSTS", "PRODUCTS", "CHANNELS"}
+
+
+def test_from_in_literal_is_ignored():
+    assert extract_tables("SELECT 'from dual' FROM sales") == {"SALES"}
+
+
+def test_results_are_per_group():
+    result_cache = ResultCache(ttl=60)
+    result_cache.put("SELECT * FROM sales", [{"AMOUNT": 10}], user_group_id=1)
+
+    assert result_cache.get("select *  from SALES", user_group_id=1) == [{"AMOUNT": 10}]
+    assert result_cache.get("SELECT * FROM sales", user_group_id=2) is None
+
+
+def test_expired_results_are_removed():
+    result_cache = ResultCache(ttl=0)
+    result_cache.put("SELECT * FROM sales", [{"AMOUNT": 10}])
+
+    assert result_cache.get("SELECT * FROM sales") is None
+    assert result_cache.get_cache_info()["expired"] == 1
+
+
+def test_too_many_rows_not_cached():
+    result_cache = ResultCache(max_rows=1, ttl=60)
+    result_cache.put("SELECT * FROM sales", [{"AMOUNT": 10}, {"AMOUNT": 20}])
+
+    assert result_cache.get("SELECT * FROM sales") is None
+    assert result_cache.get_cache_info()["not_cached_too_large"] == 1
+
+
+def test_invalidate_only_queries_on_the_table():
+    result_cache = ResultCache(ttl=60)
+    result_cache.put("SELECT * FROM sales JOIN costs USING (prod_id)", [])
+    result_cache.put("SELECT * FROM customers", [])
+
+    assert result_cache.invalidate_table("costs") == 1
+    assert result_cache.get("SELECT * FROM sales JOIN costs USING (prod_id)") is None
+    assert result_cache.get("SELECT * FROM customers") == []
+
+
+def test_least_recently_used_is_evicted():
+    result_cache = ResultCache(max_entries=2, ttl=60)
+    result_cache.put("SELECT * FROM t1", [])
+    result_cache.put("SELECT * FROM t2", [])
+    result_cache.get("SELECT * FROM t1")
+    result_cache.put("SELECT * FROM t3", [])
+
+    assert result_cache.get("SELECT * FROM t2") is None
+    assert result_cache.get("SELECT * FROM t1") == []
+    assert result_cache.get_cache_info()["evictions"] == 1
+
+
+def test_from_of_extract_and_trim_is_not_a_table():
+    sql_query = (
+        "SELECT EXTRACT(YEAR FROM hire_date), TRIM(LEADING '0' FROM emp_code) "
+        "FROM employees WHERE EXTRACT(MONTH FROM hire_date) = 1"
+    )
+
+    assert extract_tables(sql_query) == {"EMPLOYEES"}
+
+
+def test_trim_without_from_keeps_the_from_clause():
+    assert extract_tables("SELECT TRIM(name) FROM customers") == {"CUSTOMERS"}
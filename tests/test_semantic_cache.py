@@ -0,0 +1,82 @@
+"""
+Test the semantic tier of the request cache
+"""
+
+import pytest
+
+from semantic_cache import SemanticCache
+
+
+class KeywordEmbeddings:
+    """
+    one dimension for each keyword: requests with the same keywords
+    have similarity 1
+    """
+
+    KEYWORDS = ["sales", "customers", "country", "2017"]
+
+    def embed_query(self, text):
+        return [float(keyword in text.lower()) for keyword in self.KEYWORDS]
+
+
+class FailingEmbeddings:
+    def embed_query(self, text):
+        raise RuntimeError("embedding service not available")
+
+
+@pytest.fixture
+def semantic_cache(logger):
+    return SemanticCache(KeywordEmbeddings(), logger, threshold=0.9, max_entries=2)
+
+
+def test_rephrased_request_is_found(semantic_cache):
+    semantic_cache.add("total sales by country")
+
+    assert semantic_cache.search("sales, by country, total") == (
+        "total sales by country",
+        pytest.approx(1.0),
+    )
+
+
+def test_different_request_below_threshold(semantic_cache):
+    semantic_cache.add("total sales by country")
+
+    assert semantic_cache.search("list of customers") is None
+    assert semantic_cache.get_cache_info()["hits"] == 0
+
+
+def test_oldest_request_removed_when_full(semantic_cache):
+    semantic_cache.add("total sales")
+    semantic_cache.add("list of customers")
+    semantic_cache.add("customers by country")
+
+    assert semantic_cache.get_cache_info()["entries"] == 2
+    assert semantic_cache.search("sales") is None
+    assert semantic_cache.search("customers")[0] == "list of customers"
+
+
+def test_removed_request_not_found(semantic_cache):
+    semantic_cache.add("total sales")
+    semantic_cache.remove("total sales")
+
+    assert semantic_cache.search("total sales") is None
+
+
+def test_embedding_errors_are_counted(logger):
+    semantic_cache = SemanticCache(FailingEmbeddings(), logger)
+    semantic_cache.add("total sales")
+
+    assert semantic_cache.search("total sales") is None
+    assert semantic_cache.get_cache_info()["entries"] == 0
+    assert semantic_cache.get_cache_info()["embed_errors"] == 1
+
+
+def test_requests_of_other_groups_not_returned(semantic_cache):
+    semantic_cache.add("total sales", user_group_id=1)
+
+    assert semantic_cache.search("total sales", user_group_id=2) is None
+    assert semantic_cache.search("total sales") is None
+    assert semantic_cache.search("total sales", user_group_id=1)[0] == "total sales"
+
+    semantic_cache.remove("total sales", user_group_id=1)
+    assert semantic_cache.search("total sales", user_group_id=1) is None
@@ -0,0 +1,97 @@
+"""
+Test the deduplication of concurrent identical requests
+"""
+
+import time
+import threading
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timeout"
+        time.sleep(0.01)
+
+
+def run_leader_and_waiter(single_flight, func):
+    """
+    start the leader, then a second call with the same key while the
+    leader is blocked in func; return the two outcomes
+    """
+    outcomes = {}
+
+    def call(name):
+        try:
+            outcomes[name] = single_flight.do("key", func)
+        except Exception as e:
+            outcomes[name] = e
+
+    leader = threading.Thread(target=call, args=("leader",))
+    leader.start()
+    wait_for(lambda: single_flight.get_stats()["in_flight"] == 1)
+
+    waiter = threading.Thread(target=call, args=("waiter",))
+    waiter.start()
+    wait_for(lambda: single_flight.get_stats()["waiting"] == 1)
+
+    return leader, waiter, outcomes
+
+
+def test_waiter_gets_the_leader_result():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    n_calls = []
+
+    def generate():
+        n_calls.append(1)
+        release.wait(5)
+        return "SELECT 1"
+
+    leader, waiter, outcomes = run_leader_and_waiter(single_flight, generate)
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+
+    assert outcomes == {"leader": "SELECT 1", "waiter": "SELECT 1"}
+    assert len(n_calls) == 1
+    assert single_flight.get_stats() == {
+        "executed": 1,
+        "shared": 1,
+        "in_flight": 0,
+        "waiting": 0,
+    }
+
+
+def test_waiter_gets_the_leader_exception():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    error = ValueError("LLM not available")
+
+    def generate():
+        release.wait(5)
+        raise error
+
+    leader, waiter, outcomes = run_leader_and_waiter(single_flight, generate)
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+
+    assert outcomes["leader"] is error
+    assert outcomes["waiter"] is error
+
+
+def test_sequential_calls_are_executed():
+    single_flight = SingleFlight()
+
+    assert single_flight.do("key", lambda: 1) == 1
+    assert single_flight.do("key", lambda: 2) == 2
+    assert single_flight.get_stats()["executed"] == 2
+
+    with pytest.raises(ZeroDivisionError):
+        single_flight.do("key", lambda: 1 / 0)
+    # the failed call is not left in flight
+    assert single_flight.get_stats()["in_flight"] == 0
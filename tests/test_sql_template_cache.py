@@ -0,0 +1,89 @@
+"""
+Test the parameterized SQL template cache
+"""
+
+from sql_template_cache import (
+    NUMBER_TYPE,
+    STRING_TYPE,
+    SQLTemplateCache,
+    build_sql_template,
+    extract_literals,
+)
+
+
+def test_numbers_and_strings_become_slots():
+    template, literals = extract_literals("List the top 10 products sold in 'Italy'?")
+
+    assert template == "list the top {n} products sold in {s}"
+    assert literals == [(NUMBER_TYPE, "10"), (STRING_TYPE, "Italy")]
+
+
+def test_new_literals_are_bound():
+    _, literals = extract_literals("sales in 2017 for 'Italy'")
+    sql_template = build_sql_template(
+        "SELECT SUM(amount) FROM sales WHERE year = 2017 AND country = 'ITALY'",
+        literals,
+    )
+
+    _, new_literals = extract_literals("sales in 2019 for 'France'")
+
+    assert (
+        sql_template.bind(new_literals)
+        == "SELECT SUM(amount) FROM sales WHERE year = 2019 AND country = 'FRANCE'"
+    )
+
+
+def test_derived_upper_bound_is_rejected():
+    _, literals = extract_literals("absences started in 2017")
+
+    # the upper bound is derived from the literal: can't be bound
+    sql_template = build_sql_template(
+        "SELECT * FROM absences WHERE start_date >= DATE '2017-01-01' "
+        "AND start_date < DATE '2018-01-01'",
+        literals,
+    )
+
+    assert sql_template is None
+
+
+def test_ambiguous_number_is_rejected():
+    _, literals = extract_literals("top 10 customers")
+
+    sql_template = build_sql_template(
+        "SELECT * FROM customers WHERE ROWNUM <= 10 OR ROWNUM = 9", literals
+    )
+
+    assert sql_template is None
+
+
+def test_literal_missing_from_sql():
+    _, literals = extract_literals("sales in 2017")
+
+    assert build_sql_template("SELECT * FROM sales", literals) is None
+
+
+def test_templates_are_per_group(logger):
+    template_cache = SQLTemplateCache(logger)
+    template_cache.add(
+        "sales in 2017", "SELECT * FROM sales WHERE year = 2017", user_group_id=1
+    )
+
+    def always_valid(sql_query):
+        return True
+
+    assert (
+        template_cache.get_sql("sales in 2020", always_valid, user_group_id=1)
+        == "SELECT * FROM sales WHERE year = 2020"
+    )
+    assert template_cache.get_sql("sales in 2020", always_valid) is None
+
+
+def test_failed_validation_drops_template(logger):
+    template_cache = SQLTemplateCache(logger)
+    template_cache.add("sales in 2017", "SELECT * FROM sales WHERE year = 2017")
+
+    def never_valid(sql_query):
+        return False
+
+    assert template_cache.get_sql("sales in 2020", never_valid) is None
+    assert template_cache.get_cache_info()["substitution_failures"] == 1
@@ -0,0 +1,248 @@
+"""
+File name: vector_generations.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide the functions to handle generations of a vector
+    table (blue/green reload of SCHEMA_VECTORS)
+
+    Every full load is done in a new table (generation), named
+    {VECTOR_TABLE_NAME}_G{n}, while the API keeps using the current one.
+    VECTOR_TABLE_NAME is a synonym for the generation in use: the cutover
+    is a single DDL (CREATE OR REPLACE SYNONYM), so queries never see a
+    partially loaded table. Old generations are kept for rollback.
+
+    If VECTOR_TABLE_NAME is still a table (loaded before blue/green), it must
+    be migrated once with migrate_to_generations, with the API stopped:
+    the table is renamed as generation 0 and then the synonym is created,
+    two DDL and between them VECTOR_TABLE_NAME doesn't exist.
+    switch_generation refuses to run on a table not migrated.
+
+Inspired by:
+
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        migrate_to_generations(conn, "SCHEMA_VECTORS")
+        table_name = get_generation_table_name("SCHEMA_VECTORS", 2)
+        switch_generation(conn, "SCHEMA_VECTORS", table_name)
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+    DDL: rename, switch and drop commit the current transaction.
+"""
+
+import re
+
+# suffix of the tables of the generations
+GENERATION_SUFFIX = "_G"
+
+
+def get_generation_table_name(base_table_name, generation):
+    """
+    the name of the table for a generation
+    """
+    return f"{base_table_name.upper()}{GENERATION_SUFFIX}{generation}"
+
+
+def list_generations(conn, base_table_name):
+    """
+    return the generations in the DB: {generation: table name}
+    """
+    base_table_name = base_table_name.upper()
+    pattern = re.compile(rf"^{re.escape(base_table_name + GENERATION_SUFFIX)}(\d+)$")
+
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT table_name FROM user_tables WHERE table_name LIKE :prefix",
+        prefix=base_table_name + GENERATION_SUFFIX + "%",
+    )
+
+    generations = {}
+    for (table_name,) in cursor:
+        match = pattern.match(table_name)
+        if match:
+            generations[int(match.group(1))] = table_name
+    cursor.close()
+
+    return generations
+
+
+def get_serving_table(conn, base_table_name):
+    """
+    return the table used by the queries on base_table_name: the
+    generation pointed by the synonym, or the table itself (no generations)
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT table_name FROM user_synonyms WHERE synonym_name = :syn_name",
+        syn_name=base_table_name.upper(),
+    )
+    row = cursor.fetchone()
+    cursor.close()
+
+    return row[0] if row is not None else base_table_name.upper()
+
+
+def get_next_generation(conn, base_table_name):
+    """
+    the number for a new generation
+    """
+    return max(list_generations(conn, base_table_name), default=0) + 1
+
+
+def needs_migration(conn, base_table_name):
+    """
+    True if base_table_name is still a table (see migrate_to_generations)
+    """
+    return _is_table(conn, base_table_name.upper())
+
+
+def migrate_to_generations(conn, base_table_name):
+    """
+    one-time migration: the table base_table_name becomes generation 0
+    and base_table_name a synonym for it
+
+    Two DDL (rename, create synonym): between them base_table_name
+    doesn't exist, to be run with the API stopped
+
+    return the table of generation 0, None if there is nothing to migrate
+    """
+    base_table_name = base_table_name.upper()
+
+    if not _is_table(conn, base_table_name):
+        return None
+
+    table_name = get_generation_table_name(base_table_name, 0)
+    _rename_table(conn, base_table_name, table_name)
+    _create_synonym(conn, base_table_name, table_name)
+
+    return table_name
+
+
+def switch_generation(conn, base_table_name, table_name):
+    """
+    make table_name the table used by the queries on base_table_name
+    """
+    base_table_name = base_table_name.upper()
+
+    if _is_table(conn, base_table_name):
+        # the rename would leave a gap: see migrate_to_generations
+        raise ValueError(
+            f"{base_table_name} is a table: run migrate_to_generations first"
+        )
+
+    _create_synonym(conn, base_table_name, table_name)
+
+
+def drop_old_generations(conn, base_table_name, n_to_keep):
+    """
+    drop the generations older than the one in use, keeping the
+    n_to_keep most recent (for rollback)
+
+    newer generations are not dropped (ex: a load in progress)
+
+    return the list of the tables dropped
+    """
+    serving_table = get_serving_table(conn, base_table_name)
+    generations = list_generations(conn, base_table_name)
+
+    serving_generation = next(
+        (gen for gen, table_name in generations.items() if table_name == serving_table),
+        None,
+    )
+    if serving_generation is None:
+        return []
+
+    older = sorted(gen for gen in generations if gen < serving_generation)
+    to_drop = older[: max(len(older) - n_to_keep, 0)]
+
+    cursor = conn.cursor()
+    for gen in to_drop:
+        cursor.execute(f"DROP TABLE {generations[gen]} PURGE")
+    cursor.close()
+
+    return [generations[gen] for gen in to_drop]
+
+
+def count_rows(conn, table_name):
+    """
+    return the number of rows in the table
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+    n_rows = cursor.fetchone()[0]
+    cursor.close()
+
+    return n_rows
+
+
+def index_exists(conn, index_name):
+    """
+    return True if the index exists
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT COUNT(*) FROM user_indexes WHERE index_name = :idx_name",
+        idx_name=index_name.upper(),
+    )
+    exists = cursor.fetchone()[0] > 0
+    cursor.close()
+
+    return exists
+
+
+#
+# Helper
+#
+def _is_table(conn, table_name):
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT COUNT(*) FROM user_tables WHERE table_name = :t_name",
+        t_name=table_name,
+    )
+    exists = cursor.fetchone()[0] > 0
+    cursor.close()
+
+    return exists
+
+
+def _create_synonym(conn, synonym_name, table_name):
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE OR REPLACE SYNONYM {synonym_name} FOR {table_name}")
+    cursor.close()
+
+
+def _rename_table(conn, table_name, new_table_name):
+    """
+    rename the table and its indexes named after it
+    (ex: SCHEMA_VECTORS_VIDX -> SCHEMA_VECTORS_G0_VIDX)
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT index_name FROM user_indexes WHERE table_name = :t_name",
+        t_name=table_name,
+    )
+    index_names = [
+        index_name
+        for (index_name,) in cursor.fetchall()
+        if index_name.startswith(table_name + "_")
+    ]
+
+    cursor.execute(f"ALTER TABLE {table_name} RENAME TO {new_table_name}")
+
+    for index_name in index_names:
+        new_index_name = new_table_name + index_name[len(table_name) :]
+        cursor.execute(f"ALTER INDEX {index_name} RENAME TO {new_index_name}")
+
+    cursor.close()
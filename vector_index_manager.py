@@ -0,0 +1,276 @@
+"""
+File name: vector_index_manager.py
+Author: Luigi Saetta
+Date last modified: 2026-10-18
+Python Version: 3.11
+
+Description:
+    This file provide the functions to manage the 23AI vector indexes
+    on the vector tables (SCHEMA_VECTORS, POLICIES_COLLECTION) and the
+    approximate similarity search that uses them.
+
+    Without a vector index every similarity search is an exact scan of
+    the table. Index types:
+        - HNSW: in-memory neighbor graph (needs VECTOR_MEMORY_SIZE)
+        - IVF: neighbor partitions (on disk)
+    The index is created with a target accuracy; the approximate search
+    (FETCH APPROX ... WITH TARGET ACCURACY) can use a different one
+    for every call, to trade recall for latency.
+
+Inspired by:
+    Oracle AI Vector Search User's Guide: Create Vector Indexes
+
+Usage:
+    Import this module into other scripts to use its functions.
+    Example:
+        create_vector_index(conn, "SCHEMA_VECTORS")
+        docs = approx_similarity_search(
+            conn, embed_model, "SCHEMA_VECTORS", user_request, k=TOP_K,
+            target_accuracy=90
+        )
+
+License:
+    This code is released under the MIT License.
+
+Notes:
+    This is a part of a set of demos showing how to build a SQL Agent
+    for Text2SQL taks
+
+Warnings:
+    This module is in development, may change in future versions.
+    DDL: create and drop commit the current transaction.
+"""
+
+import array
+import json
+from langchain.docstore.document import Document
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+from config import (
+    DISTANCE_STRATEGY,
+    VECTOR_INDEX_TYPE,
+    VECTOR_INDEX_TARGET_ACCURACY,
+    VECTOR_INDEX_HNSW_NEIGHBORS,
+    VECTOR_INDEX_HNSW_EFCONSTRUCTION,
+    VECTOR_INDEX_IVF_PARTITIONS,
+)
+
+HNSW = "HNSW"
+IVF = "IVF"
+
+# distance names used in SQL, for the LangChain strategies
+DISTANCE_NAMES = {
+    DistanceStrategy.COSINE: "COSINE",
+    DistanceStrategy.DOT_PRODUCT: "DOT",
+    DistanceStrategy.EUCLIDEAN_DISTANCE: "EUCLIDEAN",
+}
+
+
+def get_vector_index_name(table_name):
+    """
+    the name of the vector index for the table
+    """
+    return f"{table_name.upper()}_VIDX"
+
+
+def vector_index_exists(conn, table_name):
+    """
+    return True if the vector index on the table exists
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT COUNT(*) FROM user_indexes WHERE index_name = :idx_name",
+        idx_name=get_vector_index_name(table_name),
+    )
+    exists = cursor.fetchone()[0] > 0
+    cursor.close()
+
+    return exists
+
+
+def create_vector_index(
+    conn,
+    table_name,
+    index_type=VECTOR_INDEX_TYPE,
+    target_accuracy=VECTOR_INDEX_TARGET_ACCURACY,
+    distance_strategy=DISTANCE_STRATEGY,
+):
+    """
+    create the vector index (HNSW or IVF) on the EMBEDDING column,
+    if it doesn't exist
+
+    return True if the index has been created
+    """
+    if index_type is None or vector_index_exists(conn, table_name):
+        return False
+
+    index_type = index_type.upper()
+    distance = DISTANCE_NAMES[distance_strategy]
+    target_accuracy = _check_accuracy(target_accuracy)
+
+    if index_type == HNSW:
+        organization = "INMEMORY NEIGHBOR GRAPH"
+        parameters = (
+            f"TYPE HNSW, NEIGHBORS {int(VECTOR_INDEX_HNSW_NEIGHBORS)}, "
+            f"EFCONSTRUCTION {int(VECTOR_INDEX_HNSW_EFCONSTRUCTION)}"
+        )
+    elif index_type == IVF:
+        organization = "NEIGHBOR PARTITIONS"
+        parameters = "TYPE IVF"
+        # if not set, the number of partitions is chosen by the DB
+        if VECTOR_INDEX_IVF_PARTITIONS:
+            parameters += f", NEIGHBOR PARTITIONS {int(VECTOR_INDEX_IVF_PARTITIONS)}"
+    else:
+        raise ValueError(f"Unsupported vector index type: {index_type}")
+
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""CREATE VECTOR INDEX {get_vector_index_name(table_name)}
+        ON {table_name} (embedding)
+        ORGANIZATION {organization}
+        DISTANCE {distance}
+        WITH TARGET ACCURACY {target_accuracy}
+        PARAMETERS ({parameters})"""
+    )
+    cursor.close()
+
+    return True
+
+
+def drop_vector_index(conn, table_name):
+    """
+    drop the vector index on the table, if it exists
+
+    return True if the index has been dropped
+    """
+    if not vector_index_exists(conn, table_name):
+        return False
+
+    cursor = conn.cursor()
+    cursor.execute(f"DROP INDEX {get_vector_index_name(table_name)}")
+    cursor.close()
+
+    return True
+
+
+def rebuild_vector_index(
+    conn,
+    table_name,
+    index_type=VECTOR_INDEX_TYPE,
+    target_accuracy=VECTOR_INDEX_TARGET_ACCURACY,
+    distance_strategy=DISTANCE_STRATEGY,
+):
+    """
+    drop and create the vector index (ex: after a big load, or to
+    change type or accuracy)
+    """
+    drop_vector_index(conn, table_name)
+
+    return create_vector_index(
+        conn, table_name, index_type, target_accuracy, distance_strategy
+    )
+
+
+def approx_similarity_search(
+    conn,
+    embed_model,
+    table_name,
+    query,
+    k,
+    target_accuracy=None,
+    distance_strategy=DISTANCE_STRATEGY,
+):
+    """
+    return the Documents of the k rows closer to the query, using
+    the vector index (if it exists, otherwise it is an exact search)
+
+    target_accuracy: 1..100, if None the accuracy of the index is used
+    """
+    return [
+        doc
+        for doc, _ in approx_similarity_search_with_scores(
+            conn, embed_model, table_name, query, k, target_accuracy, distance_strategy
+        )
+    ]
+
+
+def approx_similarity_search_with_scores(
+    conn,
+    embed_model,
+    table_name,
+    query,
+    k,
+    target_accuracy=None,
+    distance_strategy=DISTANCE_STRATEGY,
+):
+    """
+    as approx_similarity_search, return the list of (Document, similarity)
+    (see distance_to_similarity)
+    """
+    embedding = array.array("f", embed_model.embed_query(query))
+
+    accuracy_clause = (
+        f" WITH TARGET ACCURACY {_check_accuracy(target_accuracy)}"
+        if target_accuracy is not None
+        else ""
+    )
+
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""SELECT text, metadata,
+            VECTOR_DISTANCE(embedding, :embedding,
+                {DISTANCE_NAMES[distance_strategy]}) AS distance
+        FROM {table_name}
+        ORDER BY distance
+        FETCH APPROX FIRST {int(k)} ROWS ONLY{accuracy_clause}""",
+        embedding=embedding,
+    )
+
+    docs_and_scores = [
+        (
+            _to_document(text, metadata),
+            distance_to_similarity(distance, distance_strategy),
+        )
+        for text, metadata, distance in cursor
+    ]
+    cursor.close()
+
+    return docs_and_scores
+
+
+def distance_to_similarity(distance, distance_strategy=DISTANCE_STRATEGY):
+    """
+    convert the distance returned by the DB into a similarity (higher is
+    closer): for COSINE it is the cosine similarity, as in SchemaVectorIndex
+    """
+    if distance_strategy == DistanceStrategy.COSINE:
+        return 1.0 - float(distance)
+
+    return -float(distance)
+
+
+#
+# Helper
+#
+def _check_accuracy(target_accuracy):
+    """
+    the accuracy goes in the SQL text: must be an int in 1..100
+    """
+    target_accuracy = int(target_accuracy)
+
+    if not 0 < target_accuracy <= 100:
+        raise ValueError(f"Target accuracy must be in 1..100: {target_accuracy}")
+
+    return target_accuracy
+
+
+def _to_document(text, metadata):
+    """
+    build the Document from a row of the vector table (LOB or JSON)
+    """
+    text = text.read() if hasattr(text, "read") else text
+    metadata = metadata.read() if hasattr(metadata, "read") else metadata
+    if isinstance(metadata, (str, bytes)):
+        metadata = json.loads(metadata)
+
+    return Document(page_content=text, metadata=metadata)